@@ -0,0 +1,496 @@
+"""
+Benchmark gluster-georep-setup end to end against a simulated cluster.
+
+Runs fully offline. Fake `gluster`, `glusterfs` and `umount`
+executables are put in front of PATH for the Primary side, and an
+in-process paramiko SSH/SFTP server plays the Main Secondary node. Every
+SSH command and SFTP operation is delayed by the link latency, every
+gluster command by the gluster latency, and glusterd operations which
+touch all the Secondary nodes (copy file, add_secret_pub, session
+create) by the node latency per node.
+
+Each scenario sets up a session in a fresh sandbox and then reruns the
+setup, the rerun shows the cost when the keys are already present.
+Reports wall time and the number of round trips.
+
+Usage:
+    python benchmarks/setup_bench.py
+    python benchmarks/setup_bench.py --link-latency 0,20,100 --nodes 3,60
+"""
+
+from argparse import ArgumentParser
+import hashlib
+import io
+import logging
+import os
+import shlex
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+from contextlib import redirect_stderr, redirect_stdout
+
+PRIMARY_VOL = "pvol"
+SECONDARY_VOL = "svol"
+TIB = 1 << 40
+
+# Source of the fake gluster CLI. Installed as an executable for the
+# Primary side, and executed in-process by the SSH server for the
+# Secondary side. Configured by FAKE_GLUSTER_* environment variables.
+FAKE_GLUSTER = r'''
+import os
+import sys
+import time
+
+VOLINFO = """<cliOutput><volInfo><volumes><volume><name>{vol}</name>
+<replicaCount>1</replicaCount><arbiterCount>0</arbiterCount>
+<disperseCount>0</disperseCount><redundancyCount>0</redundancyCount>
+<bricks>{bricks}</bricks></volume></volumes></volInfo></cliOutput>"""
+BRICK = "<brick><name>node{idx}:/bricks/{vol}</name></brick>"
+STATUS_DETAIL = """<cliOutput><volStatus><volumes><volume>
+<volName>{vol}</volName>{nodes}</volume></volumes></volStatus></cliOutput>"""
+PEER = """<peer><uuid>uuid-{idx}</uuid><hostname>{hostname}</hostname>
+<connected>1</connected></peer>"""
+STATUS_NODE = """<node><hostname>node{idx}</hostname>
+<path>/bricks/{vol}</path><status>1</status><sizeTotal>{total}</sizeTotal>
+<sizeFree>{free}</sizeFree></node>"""
+
+
+def add_secret_pub(env, user, pubfile):
+    home = "root" if user == "root" else os.path.join("home", user)
+    sshdir = os.path.join(env["FAKE_GLUSTER_HOMES"], home, ".ssh")
+    os.makedirs(sshdir, exist_ok=True)
+    keysfile = os.path.join(sshdir, "authorized_keys")
+    existing = set()
+    if os.path.exists(keysfile):
+        with open(keysfile) as keys:
+            existing = set(line.strip() for line in keys)
+
+    with open(os.path.join(env["FAKE_GLUSTER_WORKDIR"], pubfile)) as pub, \
+         open(keysfile, "a") as keys:
+        for line in pub:
+            if line.strip() and line.strip() not in existing:
+                keys.write(line)
+
+
+def gluster(argv, env):
+    """
+    Returns (returncode, stdout, stderr) of the gluster command
+    """
+    nodes = int(env.get("FAKE_GLUSTER_NODES", "1"))
+    node_latency = float(env.get("FAKE_GLUSTER_NODE_LATENCY", "0"))
+    brick_size = int(env.get("FAKE_GLUSTER_BRICK_SIZE", str(1 << 40)))
+    workdir = env["FAKE_GLUSTER_WORKDIR"]
+    time.sleep(float(env.get("FAKE_GLUSTER_LATENCY", "0")))
+
+    if argv == ["--version"]:
+        return 0, "glusterfs 11.0\nRepository revision: fake\n", ""
+
+    if argv == ["system::", "getwd"]:
+        return 0, workdir + "\n", ""
+
+    if argv == ["system::", "execute", "gsec_create"]:
+        os.makedirs(os.path.join(workdir, "geo-replication"), exist_ok=True)
+        with open(os.path.join(workdir, "geo-replication",
+                               "common_secret.pem.pub"), "w") as pub:
+            for idx in range(nodes):
+                pub.write('command="/usr/libexec/glusterfs/gsyncd" '
+                          'ssh-rsa AAAAfake{0} root@primary{0}\n'.format(idx))
+        return 0, "", ""
+
+    if argv[:3] == ["system::", "copy", "file"]:
+        time.sleep(node_latency * nodes)
+        if not os.path.exists(workdir + argv[3]):
+            return 1, "", "copy file failed: {0} missing\n".format(argv[3])
+        return 0, "", ""
+
+    if argv[:3] == ["system::", "execute", "add_secret_pub"]:
+        time.sleep(node_latency * nodes)
+        add_secret_pub(env, argv[3], argv[4])
+        return 0, "", ""
+
+    if argv[:2] == ["pool", "list"]:
+        # Loopback addresses, probes are refused without any delay
+        return 0, "<cliOutput><peerStatus>{0}</peerStatus></cliOutput>".format(
+            "".join(PEER.format(idx=idx, hostname="localhost" if idx == 0
+                                else "127.0.1.{0}".format(idx))
+                    for idx in range(nodes))), ""
+
+    if argv[:2] == ["volume", "info"]:
+        return 0, VOLINFO.format(vol=argv[2], bricks="".join(
+            BRICK.format(idx=idx, vol=argv[2]) for idx in range(nodes))), ""
+
+    if argv[:2] == ["volume", "status"]:
+        return 0, STATUS_DETAIL.format(vol=argv[2], nodes="".join(
+            STATUS_NODE.format(idx=idx, vol=argv[2], total=brick_size,
+                               free=brick_size // 2)
+            for idx in range(nodes))), ""
+
+    if argv[:2] == ["volume", "geo-replication"] and "create" in argv:
+        time.sleep(node_latency * nodes)
+        return 0, "Creating geo-replication session between {0} & {1} " \
+            "has been successful\n".format(argv[2], argv[3]), ""
+
+    return 1, "", "fake gluster: unsupported command {0}\n".format(argv)
+
+
+if __name__ == "__main__":
+    with open(os.environ["FAKE_GLUSTER_CALLS"], "a") as calls:
+        calls.write(" ".join(sys.argv) + "\n")
+
+    if os.environ["FAKE_GLUSTER_COMMAND"] == "gluster":
+        returncode, out, err = gluster(sys.argv[1:], os.environ)
+    else:
+        # glusterfs mount and umount
+        time.sleep(float(os.environ.get("FAKE_GLUSTER_LATENCY", "0")))
+        returncode, out, err = 0, "", ""
+
+    sys.stdout.write(out)
+    sys.stderr.write(err)
+    sys.exit(returncode)
+'''
+
+
+def load_fake_gluster():
+    namespace = {"__name__": "fake_gluster"}
+    exec(compile(FAKE_GLUSTER, "fake_gluster", "exec"), namespace)
+    return namespace["gluster"]
+
+
+class Sandbox:
+    """
+    Directories of one scenario. Secondary absolute paths are
+    mapped under secondary_root.
+    """
+    def __init__(self, nodes, gluster_latency, node_latency):
+        self.root = tempfile.mkdtemp(prefix="georep_setup_bench_")
+        self.bindir = os.path.join(self.root, "bin")
+        self.workdir = os.path.join(self.root, "primary", "glusterd")
+        self.secondary_root = os.path.join(self.root, "secondary")
+        self.calls_file = os.path.join(self.root, "calls")
+        self.journal_dir = os.path.join(self.root, "journal")
+        os.makedirs(self.bindir)
+        os.makedirs(os.path.join(self.workdir, "geo-replication"))
+        os.makedirs(self.secondary_path(
+            os.path.join(self.workdir, "geo-replication")))
+        os.makedirs(self.secondary_path("/root"))
+        open(self.calls_file, "w").close()
+
+        self.env = {
+            "FAKE_GLUSTER_NODES": str(nodes),
+            "FAKE_GLUSTER_LATENCY": str(gluster_latency),
+            "FAKE_GLUSTER_NODE_LATENCY": str(node_latency),
+            "FAKE_GLUSTER_CALLS": self.calls_file,
+        }
+        self.secondary_env = dict(
+            self.env,
+            FAKE_GLUSTER_WORKDIR=self.secondary_path(self.workdir),
+            FAKE_GLUSTER_HOMES=self.secondary_root,
+            FAKE_GLUSTER_BRICK_SIZE=str(2 * TIB))
+        self.install_executables()
+
+    def install_executables(self):
+        script = os.path.join(self.bindir, "fake_gluster.py")
+        with open(script, "w") as script_file:
+            script_file.write(FAKE_GLUSTER)
+
+        for name in ("gluster", "glusterfs", "umount"):
+            path = os.path.join(self.bindir, name)
+            with open(path, "w") as wrapper:
+                wrapper.write(
+                    "#!/bin/sh\nFAKE_GLUSTER_COMMAND={0} exec {1} -S {2} "
+                    "\"$@\"\n".format(name, shlex.quote(sys.executable),
+                                      shlex.quote(script)))
+            os.chmod(path, 0o755)
+
+    def local_calls(self):
+        with open(self.calls_file) as calls:
+            return len(calls.readlines())
+
+    def secondary_path(self, path):
+        return os.path.join(self.secondary_root, path.lstrip("/"))
+
+    def cleanup(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+class SecondaryServer:
+    """
+    In-process SSH and SFTP server for the Main Secondary node
+    """
+    def __init__(self, sandbox, link_latency):
+        import paramiko
+
+        # Failed handshakes of the reachability checks are expected
+        logging.getLogger("paramiko").setLevel(logging.CRITICAL)
+
+        self.paramiko = paramiko
+        self.sandbox = sandbox
+        self.link_latency = link_latency
+        self.gluster = load_fake_gluster()
+        self.host_key = paramiko.RSAKey.generate(2048)
+        self.commands = 0
+        self.sftp_ops = 0
+        self.lock = threading.Lock()
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen(16)
+        self.port = self.sock.getsockname()[1]
+        threading.Thread(target=self.accept_loop, daemon=True).start()
+
+    def count(self, sftp=False):
+        with self.lock:
+            if sftp:
+                self.sftp_ops += 1
+            else:
+                self.commands += 1
+
+    def accept_loop(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+
+            # Reachability check connects and closes without SSH
+            # handshake, that fails the negotiation
+            transport = self.paramiko.Transport(conn)
+            transport.add_server_key(self.host_key)
+            transport.set_subsystem_handler(
+                "sftp", self.paramiko.SFTPServer,
+                sftp_interface(self.paramiko, self))
+            try:
+                transport.start_server(
+                    server=server_interface(self.paramiko, self))
+            except self.paramiko.SSHException:
+                transport.close()
+
+    def execute(self, cmd):
+        """
+        Returns (returncode, stdout, stderr) of the remote command
+        """
+        argv = shlex.split(cmd)
+        if argv[0] == "sudo":
+            argv = argv[1:]
+
+        if argv[0] == "gluster":
+            return self.gluster(argv[1:], self.sandbox.secondary_env)
+
+        if argv[0] in ("cat", "sha256sum"):
+            path = argv[1]
+            if path.startswith("~"):
+                user, _, rest = path[1:].partition("/")
+                home = "/root" if user == "root" else "/home/" + user
+                path = home + "/" + rest
+            try:
+                with open(self.sandbox.secondary_path(path), "rb") as data:
+                    content = data.read()
+            except OSError as err:
+                return 1, "", "{0}: {1}\n".format(argv[0], err)
+
+            if argv[0] == "cat":
+                return 0, content.decode(), ""
+
+            return 0, "{0}  {1}\n".format(
+                hashlib.sha256(content).hexdigest(), argv[1]), ""
+
+        if argv[0] == "cp":
+            shutil.copy(self.sandbox.secondary_path(argv[1]),
+                        self.sandbox.secondary_path(argv[2]))
+            return 0, "", ""
+
+        return 127, "", "{0}: command not found\n".format(argv[0])
+
+    def close(self):
+        self.sock.close()
+
+
+def server_interface(paramiko, server):
+    class Server(paramiko.ServerInterface):
+        def get_allowed_auths(self, username):
+            return "password"
+
+        def check_auth_password(self, username, password):
+            return paramiko.AUTH_SUCCESSFUL
+
+        def check_channel_request(self, kind, chanid):
+            return paramiko.OPEN_SUCCEEDED
+
+        def check_channel_exec_request(self, channel, command):
+            def run():
+                time.sleep(server.link_latency)
+                server.count()
+                returncode, out, err = server.execute(command.decode())
+                channel.sendall(out.encode())
+                channel.sendall_stderr(err.encode())
+                channel.send_exit_status(returncode)
+                # Channel is closed by the client. Closing here may
+                # race with the reply to the exec request.
+                channel.shutdown_write()
+
+            threading.Thread(target=run, daemon=True).start()
+            return True
+
+    return Server()
+
+
+def sftp_interface(paramiko, server):
+    class SFTPInterface(paramiko.SFTPServerInterface):
+        def _path(self, path):
+            time.sleep(server.link_latency)
+            server.count(sftp=True)
+            return server.sandbox.secondary_path(path)
+
+        def open(self, path, flags, attr):
+            path = self._path(path)
+            try:
+                fd = os.open(path, flags, 0o644)
+            except OSError as err:
+                return paramiko.SFTPServer.convert_errno(err.errno)
+
+            mode = "rb"
+            if flags & os.O_WRONLY:
+                mode = "ab" if flags & os.O_APPEND else "wb"
+            elif flags & os.O_RDWR:
+                mode = "a+b" if flags & os.O_APPEND else "r+b"
+
+            handle = paramiko.SFTPHandle(flags)
+            handle.filename = path
+            handle.readfile = handle.writefile = os.fdopen(fd, mode)
+            return handle
+
+        def stat(self, path):
+            try:
+                return paramiko.SFTPAttributes.from_stat(
+                    os.stat(self._path(path)))
+            except OSError as err:
+                return paramiko.SFTPServer.convert_errno(err.errno)
+
+        lstat = stat
+
+    # SFTPServer instantiates the interface with the ServerInterface
+    return SFTPInterface
+
+
+def patch_environment(setup_cli, sandbox, server):
+    """
+    Redirect the parts of the setup which can't be faked from PATH
+    """
+    import paramiko
+    from gluster_georep_tools.setup import peers
+
+    os.environ["PATH"] = sandbox.bindir + os.pathsep + os.environ["PATH"]
+    os.environ.update(sandbox.env)
+    os.environ["FAKE_GLUSTER_WORKDIR"] = sandbox.workdir
+    os.environ["FAKE_GLUSTER_HOMES"] = os.path.join(sandbox.root, "primary")
+
+    # Setup refuses to run as non root
+    setup_cli.os.getuid = lambda: 0
+    setup_cli.getpass.getpass = lambda prompt: "secret"
+
+    # SSH server listens on a free port instead of 22
+    is_port_open = peers.is_port_open
+    peers.is_port_open = lambda host, port, *args: is_port_open(
+        host, server.port if (host, port) == ("127.0.0.1", 22) else port,
+        *args)
+    connect = paramiko.SSHClient.connect
+    paramiko.SSHClient.connect = \
+        lambda self, hostname, port=22, **kwargs: connect(
+            self, hostname, port=server.port, look_for_keys=False,
+            allow_agent=False, **kwargs)
+
+    # Fake glusterfs doesn't mount, consider the temp dir as mounted
+    ismount = os.path.ismount
+    os.path.ismount = lambda path: \
+        os.path.basename(path).startswith("georepsetup_") or ismount(path)
+
+
+def run_setup(setup_cli, sandbox):
+    sys.argv = ["gluster-georep-setup", PRIMARY_VOL,
+                "127.0.0.1::" + SECONDARY_VOL, "--no-color",
+                "--log-file", "", "--journal-dir", sandbox.journal_dir]
+    out = io.StringIO()
+    start = time.perf_counter()
+    try:
+        with redirect_stdout(out), redirect_stderr(out):
+            setup_cli.main()
+    except SystemExit as err:
+        if err.code:
+            sys.stderr.write(out.getvalue())
+            raise
+    return time.perf_counter() - start
+
+
+def run_scenario(setup_cli, link_latency, nodes, gluster_latency,
+                 node_latency):
+    sandbox = Sandbox(nodes, gluster_latency, node_latency)
+    server = SecondaryServer(sandbox, link_latency)
+    saved = (dict(os.environ), os.path.ismount)
+    import paramiko
+    saved_connect = paramiko.SSHClient.connect
+    saved_cli = (setup_cli.os.getuid, setup_cli.getpass.getpass,
+                 setup_cli.peers.is_port_open)
+    try:
+        patch_environment(setup_cli, sandbox, server)
+        results = []
+        for name in ("first run", "rerun"):
+            counts = (server.commands, server.sftp_ops, sandbox.local_calls())
+            elapsed = run_setup(setup_cli, sandbox)
+            results.append((link_latency * 1000, nodes, name, elapsed,
+                            server.commands - counts[0],
+                            server.sftp_ops - counts[1],
+                            sandbox.local_calls() - counts[2]))
+        return results
+    finally:
+        os.environ.clear()
+        os.environ.update(saved[0])
+        os.path.ismount = saved[1]
+        paramiko.SSHClient.connect = saved_connect
+        (setup_cli.os.getuid, setup_cli.getpass.getpass,
+         setup_cli.peers.is_port_open) = saved_cli
+        server.close()
+        sandbox.cleanup()
+
+
+def parse_list(value, conv=int):
+    return [conv(val) for val in value.split(",")]
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--link-latency", default=[0.0, 20.0, 100.0],
+                        type=lambda val: parse_list(val, float),
+                        help="Comma separated SSH link latency in ms per "
+                        "command or SFTP operation (Default: 0,20,100)")
+    parser.add_argument("--nodes", type=parse_list, default=[3, 60],
+                        help="Comma separated number of Primary and "
+                        "Secondary nodes (Default: 3,60)")
+    parser.add_argument("--gluster-latency", type=float, default=10.0,
+                        help="Latency in ms of each gluster command "
+                        "(Default: 10)")
+    parser.add_argument("--node-latency", type=float, default=2.0,
+                        help="Latency in ms per node of the glusterd "
+                        "operations run on all the nodes (Default: 2)")
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__))))
+    from gluster_georep_tools.setup import cli as setup_cli
+
+    print("{0:>8} {1:>6}  {2:<10} {3:>9} {4:>9} {5:>9} {6:>14}".format(
+        "LINK(ms)", "NODES", "RUN", "TIME(s)", "SSH CMDS", "SFTP OPS",
+        "LOCAL GLUSTER"))
+    for link_latency in args.link_latency:
+        for nodes in args.nodes:
+            for row in run_scenario(setup_cli, link_latency / 1000, nodes,
+                                    args.gluster_latency / 1000,
+                                    args.node_latency / 1000):
+                print("{0:>8.0f} {1:>6}  {2:<10} {3:>9.3f} {4:>9} {5:>9} "
+                      "{6:>14}".format(*row))
+
+
+if __name__ == "__main__":
+    main()
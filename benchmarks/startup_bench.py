@@ -0,0 +1,102 @@
+"""
+Startup time of the console scripts, guarded by a budget.
+
+Measures the wall time of `--help` of each tool in a fresh interpreter
+compared to a bare interpreter startup, and checks that the heavy
+dependencies(glustercli, prettytable, paramiko) are not imported
+just to parse the arguments. Exits with non zero status if any
+tool exceeds its budget.
+
+Usage:
+    python benchmarks/startup_bench.py
+    python benchmarks/startup_bench.py --runs 20 --budget-ms 80
+"""
+
+from argparse import ArgumentParser
+import os
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TOOLS = {
+    "gluster-georep-status": "gluster_georep_tools.status.cli",
+    "gluster-georep-setup": "gluster_georep_tools.setup.cli",
+}
+
+# These modules should not be imported to handle --help
+HEAVY_MODULES = ("glustercli", "prettytable", "paramiko", "cryptography",
+                 "sqlite3")
+
+# Imports the tool, parses --help and reports the heavy modules imported
+CHECK_SCRIPT = """
+import sys
+sys.argv = ["tool", "--help"]
+import {module} as tool
+try:
+    tool.get_args()
+except SystemExit:
+    pass
+loaded = [name for name in {heavy!r} if name in sys.modules]
+sys.stderr.write(",".join(loaded))
+"""
+
+
+def run_time(cmd, runs):
+    """
+    Best wall time of the command in seconds
+    """
+    env = dict(os.environ, PYTHONPATH=ROOT_DIR)
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(cmd, env=env, stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL, check=False)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best
+
+
+def heavy_imports(module):
+    env = dict(os.environ, PYTHONPATH=ROOT_DIR)
+    proc = subprocess.run(
+        [sys.executable, "-c",
+         CHECK_SCRIPT.format(module=module, heavy=HEAVY_MODULES)],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+        universal_newlines=True, check=False)
+    return [name for name in proc.stderr.strip().split(",") if name]
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10,
+                        help="Number of runs, best is reported (Default: 10)")
+    parser.add_argument("--budget-ms", type=float, default=100,
+                        help="Allowed startup time over the bare "
+                        "interpreter startup (Default: 100)")
+    args = parser.parse_args()
+
+    baseline = run_time([sys.executable, "-c", "pass"], args.runs)
+    print("{0:<24} {1:>10}".format("python -c pass",
+                                   "%.1fms" % (baseline * 1000)))
+
+    failed = False
+    for tool, module in TOOLS.items():
+        elapsed = run_time([sys.executable, "-m", module, "--help"],
+                           args.runs)
+        overhead = (elapsed - baseline) * 1000
+        loaded = heavy_imports(module)
+        ok = overhead <= args.budget_ms and not loaded
+        failed = failed or not ok
+        print("{0:<24} {1:>10} {2:>12}  {3}{4}".format(
+            tool, "%.1fms" % (elapsed * 1000), "+%.1fms" % overhead,
+            "OK" if ok else "OVER BUDGET",
+            " (imports: {0})".format(", ".join(loaded)) if loaded else ""))
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Benchmark the gluster-georep-status pipeline with synthetic clusters.
+
+Generates georep.status() shaped data for the requested number of
+sessions and bricks and measures filtering, summarising and every
+output format. Runs fully offline, glustercli.cli.georep is replaced
+by a stub returning the synthetic data.
+
+Usage:
+    python benchmarks/status_bench.py
+    python benchmarks/status_bench.py --sessions 1,500 --bricks 10,10000
+"""
+
+from argparse import ArgumentParser, Namespace
+import io
+import os
+import random
+import sys
+import time
+import tracemalloc
+import types
+from contextlib import redirect_stdout
+
+STATUSES = ["Active", "Passive", "Faulty", "Offline", "Created",
+            "Stopped", "Initializing..."]
+STATUS_WEIGHTS = [40, 40, 5, 5, 3, 4, 3]
+CRAWL_STATUSES = ["Changelog Crawl", "History Crawl", "Hybrid Crawl", "N/A"]
+CRAWL_STATUS_WEIGHTS = [70, 10, 5, 15]
+
+
+def install_glustercli_stub():
+    """
+    Stub glustercli.cli.georep so that the status modules can be
+    imported without glustercli or a Gluster cluster.
+    """
+    glustercli = types.ModuleType("glustercli")
+    cli = types.ModuleType("glustercli.cli")
+    georep = types.ModuleType("glustercli.cli.georep")
+    volume = types.ModuleType("glustercli.cli.volume")
+    parsers = types.ModuleType("glustercli.cli.parsers")
+    utils = types.ModuleType("glustercli.cli.utils")
+
+    georep.status = lambda **kwargs: []
+    volume.info = lambda volname=None: []
+    parsers.parse_georep_status = lambda data, volinfo: []
+    utils.georep_execute_xml = lambda cmd: ""
+    utils.GlusterCmdException = type("GlusterCmdException", (Exception,), {})
+
+    glustercli.cli = cli
+    cli.georep = georep
+    cli.volume = volume
+    cli.parsers = parsers
+    cli.utils = utils
+    sys.modules.update({
+        "glustercli": glustercli,
+        "glustercli.cli": cli,
+        "glustercli.cli.georep": georep,
+        "glustercli.cli.volume": volume,
+        "glustercli.cli.parsers": parsers,
+        "glustercli.cli.utils": utils,
+    })
+    return georep
+
+
+def generate_status(num_sessions, num_bricks, seed=0):
+    """
+    georep.status() shaped data, num_bricks distributed
+    across num_sessions.
+    """
+    rnd = random.Random(seed)
+    now = time.time()
+    per_session = max(1, num_bricks // num_sessions)
+    status_data = []
+    for sidx in range(num_sessions):
+        session = []
+        for bidx in range(per_session):
+            status = rnd.choices(STATUSES, STATUS_WEIGHTS)[0]
+            last_synced = "N/A"
+            if status in ("Active", "Stopped", "Faulty"):
+                last_synced = time.strftime(
+                    "%Y-%m-%d %H:%M:%S",
+                    time.localtime(now - rnd.randint(0, 86400)))
+
+            session.append({
+                "primary_volume": "pvol{0}".format(sidx),
+                "secondary_volume": "svol{0}".format(sidx),
+                "primary_node": "pnode{0}".format(bidx % 64),
+                "primary_brick": "/bricks/pvol{0}/b{1}".format(sidx, bidx),
+                "secondary_user": "root",
+                "secondary": "ssh://snode0::svol{0}".format(sidx),
+                "secondary_node": "snode{0}".format(bidx % 64),
+                "status": status,
+                "crawl_status": (rnd.choices(CRAWL_STATUSES,
+                                             CRAWL_STATUS_WEIGHTS)[0]
+                                 if status == "Active" else "N/A"),
+                "entry": "0", "data": "0", "meta": "0", "failures": "0",
+                "checkpoint_completed": "N/A",
+                "primary_node_uuid": "uuid-{0}".format(bidx % 64),
+                "last_synced": last_synced,
+                "checkpoint_time": "N/A",
+                "checkpoint_completion_time": "N/A",
+            })
+        status_data.append(session)
+
+    return status_data
+
+
+def filter_args(**kwargs):
+    args = Namespace(with_status=None, with_crawl_status=None)
+    args.__dict__.update(kwargs)
+    return args
+
+
+def measure(func, repeat):
+    """
+    Returns (best wall time, peak memory in bytes) of func()
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def run_scenario(status_cli, num_sessions, num_bricks, repeat):
+    status_data = generate_status(num_sessions, num_bricks)
+    total_rows = sum(len(session) for session in status_data)
+    summarised = status_cli.apply_filters(status_data, filter_args())
+
+    def output(fmt):
+        def func():
+            # Table cache would hide the rendering cost
+            status_cli._rendered_sessions.clear()
+            with redirect_stdout(io.StringIO()):
+                status_cli.OUTPUT_FORMATS[fmt](summarised)
+        return func
+
+    cases = [
+        ("summarise", lambda: status_cli.apply_filters(
+            status_data, filter_args())),
+        ("filter status", lambda: status_cli.apply_filters(
+            status_data, filter_args(with_status="active,faulty"))),
+        ("filter crawl regex", lambda: status_cli.apply_filters(
+            status_data, filter_args(crawl_status_regex="^(history|hybrid)"))),
+        ("filter brick+lag", lambda: status_cli.apply_filters(
+            status_data, filter_args(brick="/bricks/*/b1*", min_lag=3600))),
+    ]
+    for fmt in status_cli.OUTPUT_FORMATS:
+        cases.append(("output " + fmt, output(fmt)))
+
+    results = []
+    for name, func in cases:
+        elapsed, peak = measure(func, repeat)
+        results.append((num_sessions, total_rows, name, elapsed,
+                        total_rows / elapsed if elapsed else 0, peak))
+
+    return results
+
+
+def parse_list(value):
+    return [int(val) for val in value.split(",")]
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=parse_list, default=[1, 50, 500],
+                        help="Comma separated number of sessions "
+                        "(Default: 1,50,500)")
+    parser.add_argument("--bricks", type=parse_list,
+                        default=[10, 1000, 10000],
+                        help="Comma separated total number of bricks "
+                        "(Default: 10,1000,10000)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Number of runs, best is reported (Default: 3)")
+    args = parser.parse_args()
+
+    install_glustercli_stub()
+    sys.path.insert(0, os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__))))
+    from gluster_georep_tools.status import cli as status_cli
+
+    print("{0:>8} {1:>8}  {2:<20} {3:>10} {4:>12} {5:>10}".format(
+        "SESSIONS", "ROWS", "CASE", "TIME(ms)", "ROWS/S", "PEAK(KiB)"))
+    for num_sessions in args.sessions:
+        for num_bricks in args.bricks:
+            if num_bricks < num_sessions:
+                continue
+
+            for row in run_scenario(status_cli, num_sessions, num_bricks,
+                                    args.repeat):
+                print("{0:>8} {1:>8}  {2:<20} {3:>10.2f} {4:>12.0f} "
+                      "{5:>10.1f}".format(row[0], row[1], row[2],
+                                          row[3] * 1000, row[4],
+                                          row[5] / 1024))
+
+
+if __name__ == "__main__":
+    main()
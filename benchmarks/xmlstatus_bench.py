@@ -0,0 +1,229 @@
+"""
+Benchmark the streaming XML status backend against glustercli.
+
+Generates `gluster volume geo-replication status --xml` output for
+the requested number of bricks and measures the time and peak memory
+of parsing, summarising and filtering it. Runs fully offline, the
+glustercli parsers are used directly on the generated XML. Results
+of the backends are compared with the recorded fixtures in
+tests/test_xmlstream.py.
+
+Usage:
+    python benchmarks/xmlstatus_bench.py
+    python benchmarks/xmlstatus_bench.py --sessions 1,50 --bricks 1000,100000
+"""
+
+from argparse import ArgumentParser, Namespace
+import importlib.util
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+STATUSES = ["Active", "Passive", "Faulty", "Created", "Stopped",
+            "Initializing..."]
+STATUS_WEIGHTS = [40, 40, 5, 3, 4, 3]
+CRAWL_STATUSES = ["Changelog Crawl", "History Crawl", "Hybrid Crawl"]
+CRAWL_STATUS_WEIGHTS = [80, 15, 5]
+
+PAIR_XML = """          <pair>
+            <primary_node>pnode{node}</primary_node>
+            <primary_brick>/bricks/pvol{sidx}/b{bidx}</primary_brick>
+            <secondary_user>root</secondary_user>
+            <secondary>ssh://snode0::svol{sidx}</secondary>
+            <secondary_node>snode{node}</secondary_node>
+            <status>{status}</status>
+            <crawl_status>{crawl_status}</crawl_status>
+            <entry>0</entry>
+            <data>0</data>
+            <meta>0</meta>
+            <failures>0</failures>
+            <checkpoint_completed>N/A</checkpoint_completed>
+            <primary_node_uuid>uuid-{node}</primary_node_uuid>
+            <last_synced>{last_synced}</last_synced>
+            <checkpoint_time>N/A</checkpoint_time>
+            <checkpoint_completion_time>N/A</checkpoint_completion_time>
+          </pair>
+"""
+
+
+def write_xml(status_file, volinfo_file, num_sessions, num_bricks, seed=0):
+    """
+    Status and Volume info XML, num_bricks distributed across
+    num_sessions of one Primary Volume each. One brick in every
+    hundred is missing from the status and is shown as Offline.
+    """
+    rnd = random.Random(seed)
+    now = time.time()
+    per_session = max(1, num_bricks // num_sessions)
+    header = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+              '<cliOutput>\n  <opRet>0</opRet>\n  <opErrno>0</opErrno>\n'
+              '  <opErrstr/>\n')
+    status_file.write(header + "  <geoRep>\n")
+    volinfo_file.write(header + "  <volInfo>\n    <volumes>\n")
+    for sidx in range(num_sessions):
+        status_file.write(
+            "    <volume>\n      <name>pvol{0}</name>\n      <sessions>\n"
+            "        <session>\n          <session_secondary>uuid:"
+            "ssh://snode0::svol{0}:uuid</session_secondary>\n".format(sidx))
+        volinfo_file.write("      <volume>\n        <name>pvol{0}</name>\n"
+                           "        <bricks>\n".format(sidx))
+        for bidx in range(per_session):
+            node = bidx % 64
+            volinfo_file.write(
+                "          <brick>pnode{0}:/bricks/pvol{1}/b{2}"
+                "<name>pnode{0}:/bricks/pvol{1}/b{2}</name>"
+                "<hostUuid>uuid-{0}</hostUuid><isArbiter>0</isArbiter>"
+                "</brick>\n".format(node, sidx, bidx))
+            if bidx % 100 == 99:
+                continue
+
+            status = rnd.choices(STATUSES, STATUS_WEIGHTS)[0]
+            last_synced = "N/A"
+            if status in ("Active", "Stopped", "Faulty"):
+                last_synced = time.strftime(
+                    "%Y-%m-%d %H:%M:%S",
+                    time.localtime(now - rnd.randint(0, 86400)))
+
+            status_file.write(PAIR_XML.format(
+                node=node, sidx=sidx, bidx=bidx, status=status,
+                crawl_status=(rnd.choices(CRAWL_STATUSES,
+                                          CRAWL_STATUS_WEIGHTS)[0]
+                              if status == "Active" else "N/A"),
+                last_synced=last_synced))
+
+        status_file.write("        </session>\n      </sessions>\n"
+                          "    </volume>\n")
+        volinfo_file.write("        </bricks>\n      </volume>\n")
+
+    status_file.write("  </geoRep>\n</cliOutput>\n")
+    volinfo_file.write("    </volumes>\n  </volInfo>\n</cliOutput>\n")
+
+
+def filter_args(**kwargs):
+    args = Namespace(with_status=None, with_crawl_status=None)
+    args.__dict__.update(kwargs)
+    return args
+
+
+def glustercli_backend(status_path, volinfo_path, args):
+    """
+    Same as `collect_status` followed by `apply_filters`, glustercli
+    reads the complete output before parsing it.
+    """
+    from glustercli.cli.parsers import parse_georep_status
+    from gluster_georep_tools.status.api import apply_filters
+
+    with open(volinfo_path) as volinfo_file:
+        volinfo = parse_glustercli_volinfo(volinfo_file.read())
+
+    with open(status_path) as status_file:
+        status_data = parse_georep_status(status_file.read(), volinfo)
+
+    return apply_filters(status_data, args)
+
+
+def parse_glustercli_volinfo(data):
+    """
+    Name and bricks of each Volume, which is all that
+    parse_georep_status uses from the glustercli Volume info.
+    """
+    import xml.etree.ElementTree as ET
+
+    tree = ET.fromstring(data)
+    return [{"name": vol.findtext("name"),
+             "bricks": [{"name": brick.findtext("name"),
+                         "uuid": brick.findtext("hostUuid")}
+                        for brick in vol.findall("bricks/brick")]}
+            for vol in tree.findall("volInfo/volumes/volume")]
+
+
+def stream_backend(status_path, volinfo_path, args):
+    from gluster_georep_tools.status.filters import compile_filters
+    from gluster_georep_tools.status.xmlstream import parse_status_xml, \
+        parse_volume_info
+
+    now = time.time()
+    volinfo = parse_volume_info(volinfo_path)
+    return parse_status_xml(status_path, volinfo, now,
+                            compile_filters(args, now))
+
+
+def measure(func, repeat):
+    """
+    Returns (best wall time, peak memory in bytes) of func()
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def parse_list(value):
+    return [int(val) for val in value.split(",")]
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=parse_list, default=[1, 50],
+                        help="Comma separated number of sessions "
+                        "(Default: 1,50)")
+    parser.add_argument("--bricks", type=parse_list,
+                        default=[1000, 10000],
+                        help="Comma separated total number of bricks "
+                        "(Default: 1000,10000)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Number of runs, best is reported (Default: 3)")
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__))))
+    has_glustercli = importlib.util.find_spec("glustercli") is not None
+
+    backends = [("stream", stream_backend)]
+    if has_glustercli:
+        backends.insert(0, ("glustercli", glustercli_backend))
+
+    cases = [("summarise", filter_args()),
+             ("filter faulty", filter_args(with_status="faulty"))]
+
+    print("{0:>8} {1:>8}  {2:<12} {3:<14} {4:>10} {5:>10}".format(
+        "SESSIONS", "BRICKS", "BACKEND", "CASE", "TIME(ms)", "PEAK(KiB)"))
+    with tempfile.TemporaryDirectory() as tmpdir:
+        status_path = os.path.join(tmpdir, "status.xml")
+        volinfo_path = os.path.join(tmpdir, "volinfo.xml")
+        for num_sessions in args.sessions:
+            for num_bricks in args.bricks:
+                if num_bricks < num_sessions:
+                    continue
+
+                with open(status_path, "w") as status_file, \
+                        open(volinfo_path, "w") as volinfo_file:
+                    write_xml(status_file, volinfo_file, num_sessions,
+                              num_bricks)
+
+                for backend, func in backends:
+                    for case, case_args in cases:
+                        elapsed, peak = measure(
+                            lambda: func(status_path, volinfo_path,
+                                         case_args),
+                            args.repeat)
+                        print("{0:>8} {1:>8}  {2:<12} {3:<14} {4:>10.2f} "
+                              "{5:>10.1f}".format(num_sessions, num_bricks,
+                                                  backend, case,
+                                                  elapsed * 1000,
+                                                  peak / 1024))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+# Doc shown in CLI Help
+"""
+Gluster Geo-replication Events
+
+Polls the Geo-replication status and emits an event only when a
+brick worker changes its Status or Crawl status, as NDJSON in stdout
+or as a POST request with JSON list of events to a webhook.
+"""
+
+from argparse import ArgumentParser, Namespace, RawDescriptionHelpFormatter
+import json
+import sys
+import time
+
+from gluster_georep_tools.events.transitions import StateIndex
+from gluster_georep_tools.status.api import apply_filters, collect_status, \
+    parse_secondary, StatusError
+from gluster_georep_tools.status.parallel import DEFAULT_SESSION_TIMEOUT
+
+DEFAULT_INTERVAL = 10
+DEFAULT_DEBOUNCE = 30
+DEFAULT_WEBHOOK_TIMEOUT = 5
+
+
+def emit_ndjson(events, out=None):
+    """
+    One JSON document per event per line
+    """
+    out = sys.stdout if out is None else out
+    for event in events:
+        out.write(json.dumps(event) + "\n")
+    out.flush()
+
+
+def webhook_sender(url, timeout=DEFAULT_WEBHOOK_TIMEOUT):
+    """
+    Returns a function which POSTs the events of a poll as one
+    JSON list. Failures are reported and the events are dropped,
+    a slow or unavailable endpoint doesn't stop the polling.
+    """
+    # Imported only when the webhook is used
+    from urllib.error import URLError
+    from urllib.request import Request, urlopen
+
+    def send(events):
+        req = Request(url, data=json.dumps(events).encode("utf-8"),
+                      headers={"Content-Type": "application/json"},
+                      method="POST")
+        try:
+            with urlopen(req, timeout=timeout) as resp:
+                resp.read()
+        except (URLError, OSError) as err:
+            sys.stderr.write("Failed to send {0} events to {1}: "
+                             "{2}\n".format(len(events), url, err))
+
+    return send
+
+
+def poll_loop(args, index, emit):
+    """
+    Collect the status every interval and emit the transitions.
+    Failed polls are reported and the index is retained.
+    """
+    volname = args.primary_vol
+    secondary_user, secondary_host, secondary_vol = "root", None, None
+    if args.secondary is not None:
+        secondary_user, secondary_host, secondary_vol = \
+            parse_secondary(args.secondary)
+
+    while True:
+        # Status of the sessions which failed or timed out is missing,
+        # their bricks are not reported as removed
+        warnings = []
+
+        def warn(msg):
+            warnings.append(msg)
+            sys.stderr.write(msg + "\n")
+
+        try:
+            status_data = collect_status(
+                volname, secondary_host, secondary_vol, secondary_user,
+                parallel=args.parallel, session_timeout=args.session_timeout,
+                warn=warn)
+        except StatusError as err:
+            sys.stderr.write("Failed to collect status: {0} {1}\n".format(
+                err.msg, err.err))
+        else:
+            # No filters, track all the bricks. Status is empty if all
+            # the sessions are deleted
+            events = index.update(apply_filters(status_data, Namespace()),
+                                  time.time(), complete=not warnings)
+            if events:
+                emit(events)
+
+        time.sleep(args.interval)
+
+
+def get_args():
+    parser = ArgumentParser(formatter_class=RawDescriptionHelpFormatter,
+                            description=__doc__)
+    parser.add_argument("primary_vol", nargs="?", help="Primary Volume Name")
+    parser.add_argument("secondary", nargs="?", help="Secondary details. "
+                        "<secondary_host>::<secondary_vol>, "
+                        "Example: secondary_node1::myvol")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL,
+                        metavar="SECONDS",
+                        help="Collect the status every SECONDS "
+                        "(Default: {0})".format(DEFAULT_INTERVAL))
+    parser.add_argument("--debounce", type=float, default=DEFAULT_DEBOUNCE,
+                        metavar="SECONDS",
+                        help="Emit a transition only if the new state "
+                        "persists for SECONDS, 0 to emit all the "
+                        "transitions (Default: {0})".format(DEFAULT_DEBOUNCE))
+    parser.add_argument("--webhook", metavar="URL",
+                        help="POST the events of each poll as JSON list to "
+                        "URL instead of writing NDJSON to stdout")
+    parser.add_argument("--webhook-timeout", type=float,
+                        default=DEFAULT_WEBHOOK_TIMEOUT, metavar="SECONDS",
+                        help="Webhook request timeout "
+                        "(Default: {0})".format(DEFAULT_WEBHOOK_TIMEOUT))
+    parser.add_argument("--parallel", type=int, metavar="WORKERS",
+                        help="Collect the status of all sessions "
+                        "concurrently using WORKERS threads")
+    parser.add_argument("--session-timeout", type=float,
+                        default=DEFAULT_SESSION_TIMEOUT, metavar="SECONDS",
+                        help="With --parallel, skip the sessions whose "
+                        "status is not collected within SECONDS "
+                        "(Default: {0})".format(DEFAULT_SESSION_TIMEOUT))
+    return parser.parse_args()
+
+
+def main():
+    args = get_args()
+    emit = emit_ndjson
+    if args.webhook is not None:
+        emit = webhook_sender(args.webhook, args.webhook_timeout)
+
+    try:
+        poll_loop(args, StateIndex(args.debounce), emit)
+    except StatusError as err:
+        sys.stderr.write(err.msg + "\n")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
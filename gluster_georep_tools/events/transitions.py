@@ -0,0 +1,140 @@
+"""
+Last known state of each brick worker and the transitions between
+polls.
+
+State of a worker is its Status and Crawl status, indexed by session,
+Primary node and brick. Each poll is compared with the index and only
+the workers whose state changed are reported. A change is reported
+only if it persists for the debounce period, so a flapping worker
+(Active -> Faulty -> Active within the period) raises no event.
+"""
+
+import sys
+
+# Fields of the worker state included in the events
+STATE_FIELDS = ("status", "crawl_status")
+
+
+def worker_state(row):
+    """
+    State of the worker as a tuple of Status and CrawlStatus
+    """
+    return (row.status, row.crawl_status)
+
+
+class StateIndex:
+    """
+    Index of session => {(Primary node, brick): state}. First poll
+    only records the states, the later polls return the transitions.
+    """
+    def __init__(self, debounce=0):
+        self.debounce = debounce
+        self.sessions = {}
+        # (session, node, brick) => (observed state, first seen at)
+        self.pending = {}
+        self.initialized = False
+
+    def __len__(self):
+        return sum(len(workers) for workers in self.sessions.values())
+
+    def _observe(self, key, reported, observed, now):
+        """
+        Returns True if the observed state should be reported
+        """
+        if observed == reported:
+            # Flapped back to the reported state
+            self.pending.pop(key, None)
+            return False
+
+        if self.debounce <= 0:
+            return True
+
+        pending = self.pending.get(key)
+        if pending is None or pending[0] != observed:
+            self.pending[key] = (observed, now)
+            return False
+
+        if now - pending[1] < self.debounce:
+            return False
+
+        del self.pending[key]
+        return True
+
+    def update(self, status_data, now, complete=False):
+        """
+        Compare the summarised sessions with the index. Returns the
+        list of transition events. Bricks not present in a session are
+        reported as removed. Sessions not present in status_data (for
+        example, timed out) are retained as is, unless complete is True
+        in which case all their bricks are reported as removed.
+        """
+        events = []
+        sessions = [(sys.intern(session.name), session.rows)
+                    for session in status_data]
+        if complete:
+            # Sessions deleted since the last poll
+            present = set(name for name, _ in sessions)
+            sessions += [(name, []) for name in self.sessions
+                         if name not in present]
+
+        for name, rows in sessions:
+            workers = self.sessions.setdefault(name, {})
+
+            seen = set()
+            for row in rows:
+                worker = (row.primary_node, sys.intern(row.primary_brick))
+                seen.add(worker)
+                observed = worker_state(row)
+                reported = workers.get(worker)
+                if not self.initialized:
+                    workers[worker] = observed
+                    continue
+
+                if not self._observe((name,) + worker, reported, observed,
+                                     now):
+                    continue
+
+                workers[worker] = observed
+                events.append(transition_event(
+                    name, worker, row.secondary_node, reported,
+                    observed, now))
+
+            for worker in [worker for worker in workers
+                           if worker not in seen]:
+                if not self._observe((name,) + worker, workers[worker],
+                                     None, now):
+                    continue
+
+                events.append(transition_event(
+                    name, worker, None, workers.pop(worker), None, now))
+
+            # New bricks which disappeared before the debounce period
+            for key in [key for key in self.pending if key[0] == name and
+                        key[1:] not in seen and key[1:] not in workers]:
+                del self.pending[key]
+
+            if not workers and not seen:
+                del self.sessions[name]
+
+        self.initialized = True
+        return events
+
+
+def transition_event(session, worker, secondary_node, old, new, now):
+    """
+    Event of a worker transition. old is None for the newly added
+    bricks and new is None for the removed bricks.
+    """
+    event = {
+        "type": "transition",
+        "time": now,
+        "session": session,
+        "primary_node": worker[0],
+        "primary_brick": worker[1],
+        "secondary_node": secondary_node,
+    }
+    for idx, field in enumerate(STATE_FIELDS):
+        event["old_" + field] = None if old is None else old[idx].value
+        event[field] = None if new is None else new[idx].value
+
+    return event
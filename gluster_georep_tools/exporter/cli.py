@@ -0,0 +1,247 @@
+# Doc shown in CLI Help
+"""
+Gluster Geo-replication Metrics Exporter
+
+Serves the Geo-replication session summaries and per brick
+status in Prometheus text format. Status is collected in a
+background refresh loop, so a scrape never waits for gluster.
+"""
+
+from argparse import ArgumentParser, Namespace, RawDescriptionHelpFormatter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import sys
+import threading
+import time
+
+from gluster_georep_tools.status.api import apply_filters, collect_status
+from gluster_georep_tools.status.history import brick_lag
+from gluster_georep_tools.status.model import SUMMARY_KEYS
+from gluster_georep_tools.status.parallel import DEFAULT_SESSION_TIMEOUT
+
+DEFAULT_PORT = 9856
+DEFAULT_REFRESH_INTERVAL = 30
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def escape_label(value):
+    """
+    Escape the label value as per Prometheus text format
+    """
+    return str(value).replace("\\", "\\\\").replace(
+        "\"", "\\\"").replace("\n", "\\n")
+
+
+def metric_line(name, labels, value):
+    labels_txt = ",".join(
+        "{0}=\"{1}\"".format(key, escape_label(val))
+        for key, val in labels
+    )
+    return "{0}{{{1}}} {2}".format(name, labels_txt, value)
+
+
+def render_metrics(status_data, now):
+    """
+    Prometheus text format metrics from the filtered status
+    """
+    lines = [
+        "# HELP gluster_georep_session_workers Number of workers "
+        "of the session in each status",
+        "# TYPE gluster_georep_session_workers gauge",
+    ]
+    for session in status_data:
+        for key in SUMMARY_KEYS:
+            lines.append(metric_line(
+                "gluster_georep_session_workers",
+                [("session", session.name), ("status", key)],
+                getattr(session.summary, key)))
+
+    lines += [
+        "# HELP gluster_georep_session_workers_total Total number of "
+        "workers of the session",
+        "# TYPE gluster_georep_session_workers_total gauge",
+    ]
+    for session in status_data:
+        lines.append(metric_line(
+            "gluster_georep_session_workers_total",
+            [("session", session.name)], session.summary.total))
+
+    lines += [
+        "# HELP gluster_georep_session_lag_seconds Seconds since the "
+        "last sync of the worst brick of the session",
+        "# TYPE gluster_georep_session_lag_seconds gauge",
+    ]
+    for session in status_data:
+        if session.summary.lag is not None:
+            lines.append(metric_line(
+                "gluster_georep_session_lag_seconds",
+                [("session", session.name)], session.summary.lag))
+
+    brick_lines = []
+    age_lines = []
+    for session in status_data:
+        for row in session.rows:
+            labels = [("session", session.name),
+                      ("primary_node", row.primary_node),
+                      ("primary_brick", row.primary_brick),
+                      ("secondary_node", row.secondary_node)]
+            brick_lines.append(metric_line(
+                "gluster_georep_brick_status",
+                labels + [("status", row.status.value.replace("...", "")),
+                          ("crawl_status", row.crawl_status.value)],
+                1))
+
+            lag = brick_lag(row, now)
+            if lag is not None:
+                age_lines.append(metric_line(
+                    "gluster_georep_brick_last_synced_age_seconds",
+                    labels, lag))
+
+    lines += [
+        "# HELP gluster_georep_brick_status Status and Crawl status "
+        "of the brick worker",
+        "# TYPE gluster_georep_brick_status gauge",
+    ] + brick_lines
+    lines += [
+        "# HELP gluster_georep_brick_last_synced_age_seconds Seconds "
+        "since the last sync of the brick worker",
+        "# TYPE gluster_georep_brick_last_synced_age_seconds gauge",
+    ] + age_lines
+
+    return lines
+
+
+class MetricsCollector:
+    """
+    Refreshes the metrics in background and keeps the
+    rendered output ready for the scrapes.
+    """
+    def __init__(self, args):
+        self.args = args
+        self.lock = threading.Lock()
+        self.metrics = b""
+        self.last_refresh = 0
+        self.refresh_duration = 0
+        self.refresh_errors = 0
+
+    def collect(self):
+        # Empty if all the sessions are deleted, the metrics of the
+        # old sessions are not retained
+        status_data = collect_status(
+            parallel=self.args.parallel,
+            session_timeout=self.args.session_timeout,
+            warn=lambda msg: sys.stderr.write(msg + "\n"))
+
+        # No filters, export all the bricks
+        return apply_filters(status_data, Namespace())
+
+    def refresh(self):
+        start_time = time.time()
+        try:
+            status_data = self.collect()
+        except Exception as err:
+            # Retain the previously collected metrics
+            sys.stderr.write("Failed to collect status: {0}\n".format(err))
+            with self.lock:
+                self.refresh_errors += 1
+            return
+
+        metrics = "\n".join(render_metrics(status_data, time.time())) + "\n"
+        with self.lock:
+            self.metrics = metrics.encode("utf-8")
+            self.last_refresh = time.time()
+            self.refresh_duration = self.last_refresh - start_time
+
+    def refresh_loop(self):
+        while True:
+            self.refresh()
+            time.sleep(self.args.refresh_interval)
+
+    def start(self):
+        thread = threading.Thread(target=self.refresh_loop, daemon=True)
+        thread.start()
+
+    def output(self):
+        with self.lock:
+            exporter_lines = [
+                "# HELP gluster_georep_exporter_last_refresh_timestamp_"
+                "seconds Time of the last successful refresh",
+                "# TYPE gluster_georep_exporter_last_refresh_timestamp_"
+                "seconds gauge",
+                "gluster_georep_exporter_last_refresh_timestamp_seconds "
+                "{0}".format(self.last_refresh),
+                "# HELP gluster_georep_exporter_refresh_duration_seconds "
+                "Time taken by the last successful refresh",
+                "# TYPE gluster_georep_exporter_refresh_duration_seconds "
+                "gauge",
+                "gluster_georep_exporter_refresh_duration_seconds "
+                "{0:.3f}".format(self.refresh_duration),
+                "# HELP gluster_georep_exporter_refresh_errors_total "
+                "Number of failed refreshes",
+                "# TYPE gluster_georep_exporter_refresh_errors_total counter",
+                "gluster_georep_exporter_refresh_errors_total "
+                "{0}".format(self.refresh_errors),
+            ]
+            return self.metrics + ("\n".join(exporter_lines) +
+                                   "\n").encode("utf-8")
+
+
+def get_handler(collector):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+
+            body = collector.output()
+            self.send_response(200)
+            self.send_header("Content-Type", METRICS_CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # Do not log every scrape
+            pass
+
+    return MetricsHandler
+
+
+def get_args():
+    parser = ArgumentParser(formatter_class=RawDescriptionHelpFormatter,
+                            description=__doc__)
+    parser.add_argument("--listen-address", default="127.0.0.1",
+                        help="Address to serve the metrics "
+                        "(Default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT,
+                        help="Port to serve the metrics "
+                        "(Default: {0})".format(DEFAULT_PORT))
+    parser.add_argument("--refresh-interval", type=float,
+                        default=DEFAULT_REFRESH_INTERVAL, metavar="SECONDS",
+                        help="Collect the status every SECONDS "
+                        "(Default: {0})".format(DEFAULT_REFRESH_INTERVAL))
+    parser.add_argument("--parallel", type=int, metavar="WORKERS",
+                        help="Collect the status of all sessions "
+                        "concurrently using WORKERS threads")
+    parser.add_argument("--session-timeout", type=float,
+                        default=DEFAULT_SESSION_TIMEOUT, metavar="SECONDS",
+                        help="With --parallel, skip the sessions whose "
+                        "status is not collected within SECONDS "
+                        "(Default: {0})".format(DEFAULT_SESSION_TIMEOUT))
+    return parser.parse_args()
+
+
+def main():
+    args = get_args()
+    collector = MetricsCollector(args)
+    collector.start()
+
+    server = ThreadingHTTPServer((args.listen_address, args.port),
+                                 get_handler(collector))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,26 @@
 # -*- coding: utf-8 -*-
 
 from argparse import ArgumentParser, RawDescriptionHelpFormatter
-from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 import getpass
+import logging
 import os
-import socket
-import subprocess
 import sys
-import tempfile
 
-import paramiko
+from gluster_georep_tools.setup import journal, peers, runner, session, \
+    volstat
+from gluster_georep_tools.setup.errors import SetupError, PreflightError
+from gluster_georep_tools.setup.remote import DEFAULT_CONNECT_TIMEOUT, \
+    DEFAULT_KEEPALIVE
+from gluster_georep_tools.timings import phase, add_timings_args, \
+    enable_timings, TIMINGS
 
 PROG_DESCRIPTION = """
 CLI tool to setup Gluster Geo-replication Session between
 Primary Gluster Volume to Secondary Gluster Volume.
 """
-BUFFER_SIZE = 104857600  # Considering buffer_size 100MB
-SESSION_MOUNT_LOG_FILE = ("/var/log/glusterfs/geo-replication"
-                          "/georepsetup.mount.log")
-SYMBOLS = ('K', 'M', 'G', 'T', 'P', 'E', 'Z', 'Y')
-DEFAULT_GLUSTERD_WORKDIR = "/var/lib/glusterd"
 USE_CLI_COLOR = True
+DEFAULT_LOG_FILE = "/var/log/glusterfs/geo-replication/georepsetup.log"
 
 
 class COLORS:
@@ -33,95 +33,6 @@ class COLORS:
     NOCOLOR = "\033[0m"
 
 
-def human_readable_size(num):
-    """
-    To show size as 100K, 100M, 10G instead of
-    showing in bytes.
-    """
-    for s in reversed(SYMBOLS):
-        power = SYMBOLS.index(s)+1
-        if num >= 1024**power:
-            value = float(num) / (1024**power)
-            return '%.1f%s' % (value, s)
-
-    # if size less than 1024 or human readable not required
-    return '%s' % num
-
-
-def get_number_of_files(path):
-    """
-    Use find command to count the number of files present in
-    given path. Excluding .trashcan directory.
-    Ref: $GLUSTER_SRC/geo-replication/src/gverify.sh
-    """
-    cmd = ["find", path,
-           "-maxdepth", "1",
-           "-path", os.path.join(path, ".trashcan"),
-           "-prune", "-o", "-path", path, "-o", "-print0", "-quit"]
-    return execute(cmd,
-                   failure_msg="Unable to count number of files "
-                   "in Secondary Volume")
-
-
-def cleanup(hostname, volname, mnt):
-    """
-    Unmount the Volume and Remove the temporary directory
-    """
-    execute(["umount", mnt],
-            failure_msg="Unable to Unmount Gluster Volume "
-            "{0}:{1}(Mounted at {2})".format(hostname, volname, mnt))
-    execute(["rmdir", mnt],
-            failure_msg="Unable to Remove temp directory "
-            "{0}".format(mnt))
-
-
-@contextmanager
-def glustermount(hostname, volname):
-    """
-    Context manager for Mounting Gluster Volume
-    Use as
-        with glustermount(HOSTNAME, VOLNAME) as MNT:
-            # Do your stuff
-    Automatically unmounts it in case of Exceptions/out of context
-    """
-    mnt = tempfile.mkdtemp(prefix="georepsetup_")
-    execute(["glusterfs",
-             "--xlator-option=\"*dht.lookup-unhashed=off\"",
-             "--volfile-server", hostname,
-             "--volfile-id", volname,
-             "-l", SESSION_MOUNT_LOG_FILE,
-             "--client-pid=-1",
-             mnt],
-            failure_msg="Unable to Mount Gluster Volume "
-            "{0}:{1}".format(hostname, volname))
-    if os.path.ismount(mnt):
-        yield mnt
-    else:
-        output_notok("Unable to Mount Gluster Volume "
-                     "{0}:{1}".format(hostname, volname))
-    cleanup(hostname, volname, mnt)
-
-
-def is_port_enabled(hostname, port):
-    """
-    To check if a port is enabled or not. For example
-    To check ssh port is enabled or not,
-        is_port_enabled(HOSTNAME, 22)
-
-    To see glusterd port is enabled,
-        is_port_enabled(HOSTNAME, 24007)
-    """
-    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    try:
-        s.connect((hostname, port))
-        enabled = True
-    except socket.error:
-        enabled = False
-
-    s.close()
-    return enabled
-
-
 def color_txt(txt, color):
     """
     Adds the color requested and returns the text which
@@ -148,276 +59,61 @@ def output_warning(msg, color=True):
     sys.stdout.write("%s %s\n" % (pfx, msg))
 
 
-def output_notok(msg, err="", exitcode=1, color=True):
+def output_error(msg, err=""):
     """
-    Failure message handler. Exits after writing to stderr.
+    Failure message handler. Writes to stderr without exiting.
     """
     pfx = color_txt("[NOT OK]", COLORS.RED) if USE_CLI_COLOR else "[NOT OK]"
     sys.stderr.write("%s %s\n%s\n" % (pfx, msg, err))
-    sys.exit(exitcode)
-
-
-def execute(cmd, success_msg="", failure_msg="", exitcode=-1):
-    """
-    Generic wrapper to execute the CLI commands. Returns Output if success.
-    On success it can print message in stdout if specified.
-    On failure, exits after writing to stderr.
-    """
-    p = subprocess.Popen(cmd, universal_newlines=True,
-                         stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    out, err = p.communicate()
-    if p.returncode == 0:
-        if success_msg:
-            output_ok(success_msg)
-        return out
-    else:
-        err_msg = err if err else out
-        output_notok(failure_msg, err=err_msg, exitcode=exitcode)
-
-
-def get_glusterd_workdir():
-    """
-    Command to get Glusterd working dir. If failed returns the
-    default directory /var/lib/glusterd
-    """
-    p = subprocess.Popen(["gluster", "system::", "getwd"],
-                         universal_newlines=True,
-                         stdout=subprocess.PIPE)
-
-    out, _ = p.communicate()
-
-    if p.returncode == 0:
-        return out.strip()
-    else:
-        return DEFAULT_GLUSTERD_WORKDIR
 
 
-def check_host_reachable(secondary_host):
-    """
-    Check if SSH port is open for given secondary_host
-    """
-    if is_port_enabled(secondary_host, 22):
-        output_ok("{0} is Reachable(Port 22)".format(secondary_host))
-    else:
-        output_notok("{0} is Not Reachable(Port 22)".format(secondary_host))
-
-
-def ssh_initialize(secondary_host, username, passwd):
-    """
-    Initialize the SSH connection
-    """
-    ssh = paramiko.SSHClient()
-    try:
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        ssh.connect(secondary_host, username=username, password=passwd)
-        output_ok("SSH Connection established {0}@{1}".format(username, secondary_host))
-    except paramiko.ssh_exception.AuthenticationException as e:
-        output_notok("Unable to establish SSH connection "
-                     "to {0}@{1}:\n{2}".format(username, secondary_host, e))
-
-    return ssh
-
-
-def compare_gluster_versions(ssh):
-    """
-    Collect Primary version by directly executing CLI command, get
-    Secondary version via SSH command execution
-    """
-    # Collect Gluster Version from Primary
-    primary_version = execute(["gluster", "--version"],
-                              failure_msg="Failed to get Gluster version "
-                              "from Primary Cluster")
-    primary_version = primary_version.split()[1]
-
-    sudo_pfx = "sudo " if ssh.use_sudo else ""
-
-    # Collect Gluster Version from Secondary
-    stdin, stdout, stderr = ssh.exec_command(f"{sudo_pfx} gluster --version")
-    rc = stdout.channel.recv_exit_status()
-    if rc != 0:
-        output_notok("Unable to get Secondary Gluster Version")
-
-    secondary_version = stdout.readline().split()[1]
-
-    # Check for Version mismatch
-    if primary_version == secondary_version:
-        output_ok("Primary Volume and Secondary Volume are "
-                  "compatible (Version: {0})".format(primary_version))
-    else:
-        output_notok("Primary Volume({0}) and Secondary Volume({1}) "
-                     "versions not Compatible".format(primary_version,
-                                                      secondary_version))
-
-
-def compare_disk_sizes(args, secondary_host, secondary_vol):
-    """
-    Compare the disk sizes and available sizes. Also
-    Check Secondary volume is empty or not
-    """
-    primary_disk_size = None
-    secondary_disk_size = None
-    primary_used_size = None
-    secondary_used_size = None
-
-    with glustermount("localhost", args.primary_vol) as mnt:
-        data = os.statvfs(mnt)
-        primary_disk_size = data.f_blocks * data.f_bsize
-        primary_used_size = ((data.f_blocks - data.f_bavail) *
-                            data.f_bsize)
-
-    with glustermount(secondary_host, secondary_vol) as mnt:
-        if get_number_of_files(mnt):
-            if not args.force:
-                cleanup(secondary_host, secondary_vol, mnt)
-                output_notok("{0}::{1} is not empty. Please delete existing "
-                             "files in {0}::{1} and retry, or use --force to "
-                             "continue without deleting the existing "
-                             "files.".format(secondary_host, secondary_vol))
-            else:
-                output_warning("{0}::{1} is not empty.".format(secondary_host,
-                                                               secondary_vol))
-        data = os.statvfs(mnt)
-        secondary_disk_size = data.f_blocks * data.f_bsize
-        secondary_used_size = ((data.f_blocks - data.f_bavail) *
-                            data.f_bsize)
-
-    if primary_disk_size is None or primary_used_size is None:
-        msg = "Unable to get Disk size and Used size of Primary Volume"
-        if not args.force:
-            output_notok(msg)
-        else:
-            output_warning(msg)
-
-    if secondary_disk_size is None or secondary_used_size is None:
-        msg = "Unable to get Disk size and Used size of Secondary Volume"
-        if not args.force:
-            output_notok(msg)
-        else:
-            output_warning(msg)
-
-    if secondary_disk_size < primary_disk_size:
-        msg = ("Total disk size of primary({0}) is greater "
-               "than disk size of secondary({1})".format(
-                   human_readable_size(primary_disk_size),
-                   human_readable_size(secondary_disk_size)))
-        if not args.force:
-            output_notok(msg)
-        else:
-            output_warning(msg)
-
-    effective_primary_used_size = primary_used_size + BUFFER_SIZE
-    secondary_available_size = secondary_disk_size - secondary_used_size
-    primary_available_size = primary_disk_size - effective_primary_used_size
-
-    if secondary_available_size < primary_available_size:
-        msg = ("Total available size of primary({0}) is greater "
-               "than available size of secondary({1})".format(
-                   human_readable_size(primary_available_size),
-                   human_readable_size(secondary_available_size)))
-
-        if not args.force:
-            output_notok(msg)
-        else:
-            output_warning(msg)
-
-
-def run_gsec_create(georep_dir):
-    """
-    gsec_create command to generate pem keys in all the primary nodes
-    and collect all pub keys to single node
-    """
-    execute(["gluster", "system::", "execute", "gsec_create"],
-            success_msg="Common secret pub file present at "
-            "{0}/common_secret.pem.pub".format(georep_dir),
-            failure_msg="Common secret pub file generation failed")
-
-
-def copy_to_main_secondary_node(ssh, args, secondary_host, georep_dir, pubfile):
-    """
-    Copy common_secret.pem.pub file to Main Secondary node
-    """
-    home_dir = "/root"
-    if args.secondary_user != "root":
-        home_dir = f"/home/{args.secondary_user}"
-
-    # Copy common_secret.pem.pub file to Main Secondary node
-    ftp = ssh.open_sftp()
-    ftp.put(
-        f"{georep_dir}/common_secret.pem.pub",
-        f"{home_dir}/{pubfile}"
-    )
-    ftp.close()
-
-    sudo_pfx = "sudo " if ssh.use_sudo else ""
-    stdin, stdout, stderr = ssh.exec_command(
-        f"{sudo_pfx}cp {home_dir}/{pubfile} {georep_dir}/{pubfile}")
-
-    output_ok("common_secret.pem.pub file copied to {0}".format(secondary_host))
-
-
-def distribute_to_all_secondary_nodes(ssh, pubfile):
+def output_notok(msg, err="", exitcode=1, color=True):
     """
-    Distribute the pem.pub file to all the secondary nodes using
-    Glusterd copy file infrastructure
+    Failure message handler. Exits after writing to stderr.
     """
-    sudo_pfx = "sudo " if ssh.use_sudo else ""
-    stdin, stdout, stderr = ssh.exec_command(
-        f"{sudo_pfx}gluster system:: copy file /geo-replication/{pubfile}")
-
-    rc = stdout.channel.recv_exit_status()
-    if rc == 0:
-        output_ok("Primary SSH Keys copied to all Up "
-                  "Secondary nodes")
-    else:
-        output_notok("Unable to copy Primary SSH Keys to all Up "
-                     "Secondary nodes")
+    output_error(msg, err)
+    sys.exit(exitcode)
 
 
-def add_to_authorized_keys(ssh, pubfile, secondary_session_user):
+def show_secondary_nodes(nodes):
     """
-    Add these pub keys to authorized_keys file of all Secondary nodes
+    Show the reachability of the Secondary nodes as table
     """
-    sudo_pfx = "sudo " if ssh.use_sudo else ""
-    stdin, stdout, stderr = ssh.exec_command(
-        f"{sudo_pfx}gluster system:: execute add_secret_pub {secondary_session_user} "
-        f"geo-replication/{pubfile}"
-    )
+    from prettytable import PrettyTable
 
-    rc = stdout.channel.recv_exit_status()
-    if rc == 0:
-        output_ok("Updated Primary SSH Keys to all Up "
-                  "Secondary nodes authorized_keys file")
-    else:
-        output_notok("Unable to update Primary SSH Keys to all "
-                     "Up Secondary nodes authorized_keys file")
+    ports = (peers.SSH_PORT, peers.GLUSTERD_PORT)
+    table = PrettyTable(["SECONDARY NODE", "PEER STATUS",
+                         "SSH({0})".format(peers.SSH_PORT),
+                         "GLUSTERD({0})".format(peers.GLUSTERD_PORT)])
+    for node in nodes:
+        table.add_row([node["hostname"],
+                       "Connected" if node["connected"] else "Disconnected"] +
+                      ["OK" if node["ports"][port] else "NOT OK"
+                       for port in ports])
+    print(table)
 
 
-def create_georep_session(args, secondary_session_user, secondary_host, secondary_vol):
+def show_step(result):
     """
-    Create Geo-rep session using gluster volume geo-replication command
+    Listener of SessionSetup, prints the result of each step
+    as it completes.
     """
-    secondary = secondary_host
-    if secondary_session_user != "root":
-        secondary = "{0}@{1}".format(secondary_session_user, secondary_host)
+    if result.step == "scan" and result.details.get("nodes"):
+        show_secondary_nodes(result.details["nodes"])
 
-    cmd = ["gluster", "volume", "geo-replication",
-           args.primary_vol,
-           "{0}::{1}".format(secondary, secondary_vol),
-           "create",
-           "no-verify"]
+    for msg in result.warnings:
+        output_warning(msg)
 
-    cmd += ["force"] if args.force else []
-    execute(cmd,
-            success_msg="Geo-replication Session Established",
-            failure_msg="Failed to Establish Geo-replication Session")
+    if result.step != "scan" or not result.warnings:
+        output_ok(result.message)
 
 
-def setup_georep():
+def setup_georep(args):
     """
     Main function to setup Geo-replication. Steps involved are
     1.  Collect root@SECONDARY_HOST's password
     2.  Check if SSH port is open
-    3.  Initialize SSH Client
+    3.  Initialize SSH Client    (Steps 3, 4 and 5 run concurrently)
     4.  Compare the Gluster Versions
     5.  Compare disk sizes
     6.  Run gsec_create
@@ -426,9 +122,6 @@ def setup_georep():
     9.  Add to authorized_keys file
     10. Create Geo-replication Session
     """
-    # Parse/Validate the CLI arguments
-    args = get_args()
-
     if os.getuid() != 0:
         output_notok("Only root can run this tool!")
 
@@ -437,12 +130,33 @@ def setup_georep():
     if args.no_color:
         USE_CLI_COLOR = False
 
+    session.set_command_runner(runner.CommandRunner(
+        timeout=args.command_timeout, retries=args.retries,
+        backoff=args.retry_backoff))
+
+    # Output of all the commands is logged to the log file
+    if args.log_file:
+        os.makedirs(os.path.dirname(os.path.abspath(args.log_file)),
+                    exist_ok=True)
+        handler = logging.FileHandler(args.log_file)
+        handler.setFormatter(logging.Formatter(
+            "[%(asctime)s] %(levelname)s %(message)s"))
+        logger = logging.getLogger("gluster_georep_tools")
+        logger.addHandler(handler)
+        logger.setLevel(logging.DEBUG)
+
     # Collect Glusterd workdir, secondary information
-    georep_dir = os.path.join(get_glusterd_workdir(), "geo-replication")
-    secondary_host_data, secondary_vol = args.secondary.split("::")
-    secondary = secondary_host_data.split("@")
-    secondary_host = secondary[-1]
-    secondary_session_user = "root" if len(secondary) == 1 else secondary[0]
+    georep_dir = os.path.join(session.get_glusterd_workdir(),
+                              "geo-replication")
+
+    if args.manifest is not None:
+        setup_batch(args, georep_dir)
+        return
+
+    try:
+        _, secondary_host, _ = session.parse_secondary(args.secondary)
+    except SetupError as err:
+        output_notok(err.msg, err=err.err)
 
     # Get SECONDARY_HOST's root users password for administrative activities
     passwd_prompt_msg = (f"Geo-replication session will be established "
@@ -454,41 +168,114 @@ def setup_georep():
 
     passwd = getpass.getpass(passwd_prompt_msg)
 
-    # SSH Port check: Enabled/Disabled
-    check_host_reachable(secondary_host)
+    setup = session.SessionSetup(
+        args.primary_vol, args.secondary, passwd,
+        secondary_user=args.secondary_user, force=args.force,
+        georep_dir=georep_dir, connect_timeout=args.connect_timeout,
+        keepalive=args.keepalive, probe_timeout=args.probe_timeout,
+        volstat_backend=args.volstat_backend,
+        empty_check_timeout=args.empty_check_timeout,
+        redistribute_keys=args.redistribute_keys,
+        journal_dir=args.journal_dir, listener=show_step)
+    try:
+        setup.run(resume=args.resume, from_step=args.from_step)
+    except PreflightError as err:
+        for msg, detail in err.failures:
+            output_error(msg, detail)
+        sys.exit(1)
+    except SetupError as err:
+        output_notok(err.msg, err=err.err)
+    finally:
+        setup.close()
 
-    # Initiate SSH Client
-    ssh = ssh_initialize(secondary_host, args.secondary_user, passwd)
 
-    # Use sudo while running commands in secondary node
-    ssh.use_sudo = args.secondary_user != "root"
+def parse_manifest(path):
+    """
+    Manifest has one session per line as
+        PRIMARY_VOL [USER@]SECONDARY_HOST::SECONDARY_VOL
+    Empty lines and lines starting with # are ignored.
+    """
+    sessions = []
+    with open(path) as manifest:
+        for lineno, line in enumerate(manifest, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
 
-    # Compare Gluster Version in Primary Cluster and Secondary Cluster
-    compare_gluster_versions(ssh)
+            parts = line.split()
+            if len(parts) != 2 or "::" not in parts[1]:
+                output_notok("Invalid session in {0} line {1}: {2}".format(
+                    path, lineno, line))
 
-    # Compare disk size and used size to decide
-    # Primary and Secondary are compatible
-    # Also check if Secondary is empty or not
-    compare_disk_sizes(args, secondary_host, secondary_vol)
+            session_user, secondary_host, secondary_vol = \
+                session.parse_secondary(parts[1])
+            sessions.append({
+                "primary_vol": parts[0],
+                "secondary": parts[1],
+                "session_user": session_user,
+                "secondary_host": secondary_host,
+                "secondary_vol": secondary_vol,
+            })
 
-    # Run gsec_create command
-    run_gsec_create(georep_dir)
+    return sessions
 
-    # Target name for Pubfile
-    pubfile = "{primary_vol}_{secondary_vol}_common_secret.pem.pub".format(
-        primary_vol=args.primary_vol, secondary_vol=secondary_vol)
 
-    # Copy Pub file to Main Secondary node
-    copy_to_main_secondary_node(ssh, args, secondary_host, georep_dir, pubfile)
+def setup_batch(args, georep_dir):
+    """
+    Setup all the sessions listed in the manifest. Sessions are grouped
+    by Secondary host, each host is handled by a worker from a bounded
+    pool. gsec_create is run only once for the batch.
+    """
+    from prettytable import PrettyTable
 
-    # Distribute SSH Keys to All the Secondary nodes
-    distribute_to_all_secondary_nodes(ssh, pubfile)
+    sessions = parse_manifest(args.manifest)
+    hosts = {}
+    for host_session in sessions:
+        hosts.setdefault(host_session["secondary_host"],
+                         []).append(host_session)
 
-    # Add the SSH Keys to authorized_keys file of all Secondary nodes
-    add_to_authorized_keys(ssh, pubfile, secondary_session_user)
+    # Collect the password of each Secondary host upfront
+    passwords = {}
+    for secondary_host in hosts:
+        passwords[secondary_host] = getpass.getpass(
+            f"{args.secondary_user}@{secondary_host}'s password: ")
 
-    # Last Step: Create Geo-rep Session
-    create_georep_session(args, secondary_session_user, secondary_host, secondary_vol)
+    try:
+        primary_version = session.get_primary_gluster_version()
+        with phase("gsec_create"):
+            output_ok(session.run_gsec_create(georep_dir))
+    except SetupError as err:
+        output_notok(err.msg, err=err.err)
+
+    results = []
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = [
+            executor.submit(session.timed(
+                "setup {0}".format(secondary_host),
+                session.setup_host_sessions, host_sessions,
+                passwords[secondary_host], primary_version, georep_dir,
+                secondary_user=args.secondary_user, force=args.force,
+                connect_timeout=args.connect_timeout,
+                keepalive=args.keepalive, probe_timeout=args.probe_timeout,
+                volstat_backend=args.volstat_backend,
+                empty_check_timeout=args.empty_check_timeout,
+                redistribute_keys=args.redistribute_keys,
+                warn=output_warning))
+            for secondary_host, host_sessions in hosts.items()
+        ]
+        for future in futures:
+            results += future.result()
+
+    table = PrettyTable(["PRIMARY VOLUME", "SECONDARY", "RESULT", "MESSAGE"])
+    table.align["MESSAGE"] = "l"
+    for host_session, error in results:
+        table.add_row([host_session["primary_vol"], host_session["secondary"],
+                       "OK" if error is None else "NOT OK",
+                       "" if error is None else error])
+    print(table)
+
+    if any(error is not None for _, error in results):
+        sys.exit(1)
 
 
 def get_args():
@@ -499,11 +286,11 @@ def get_args():
                             description=PROG_DESCRIPTION)
 
     parser.add_argument("primary_vol", help="Primary Volume Name",
-                        metavar="PRIMARY_VOL")
+                        metavar="PRIMARY_VOL", nargs="?")
     parser.add_argument("secondary",
                         help="Secondary, HOSTNAME or "
                         "HOSTNAME::SECONDARY_VOL",
-                        metavar="SECONDARY")
+                        metavar="SECONDARY", nargs="?")
     parser.add_argument(
         "--secondary-user", default="root",
         help="Admin user in one of the node of the secondary cluster"
@@ -512,19 +299,91 @@ def get_args():
                         action="store_true")
     parser.add_argument("--no-color", help="No Terminal Colors",
                         action="store_true")
-
-    return parser.parse_args()
+    parser.add_argument("--connect-timeout", type=float,
+                        default=DEFAULT_CONNECT_TIMEOUT, metavar="SECONDS",
+                        help="SSH connect timeout "
+                        "(Default: {0})".format(DEFAULT_CONNECT_TIMEOUT))
+    parser.add_argument("--probe-timeout", type=float, metavar="SECONDS",
+                        default=peers.DEFAULT_PROBE_TIMEOUT,
+                        help="Consider a Secondary node port not reachable "
+                        "if not connected within SECONDS (Default: "
+                        "{0})".format(peers.DEFAULT_PROBE_TIMEOUT))
+    parser.add_argument("--keepalive", type=int, default=DEFAULT_KEEPALIVE,
+                        metavar="SECONDS",
+                        help="SSH keepalive interval, 0 to disable "
+                        "(Default: {0})".format(DEFAULT_KEEPALIVE))
+    parser.add_argument("--volstat-backend", choices=volstat.BACKENDS,
+                        default="detail",
+                        help="How to get the Volume sizes. detail: from "
+                        "volume status detail, gfapi: using libgfapi, "
+                        "mount: using FUSE mount. Falls back to mount "
+                        "if not available (Default: detail)")
+    parser.add_argument("--empty-check-timeout", type=float,
+                        default=volstat.DEFAULT_EMPTY_CHECK_TIMEOUT,
+                        metavar="SECONDS",
+                        help="Fail if the Secondary Volume can't be checked "
+                        "for emptiness within SECONDS (Default: "
+                        "{0})".format(volstat.DEFAULT_EMPTY_CHECK_TIMEOUT))
+    parser.add_argument("--command-timeout", type=int, metavar="SECONDS",
+                        default=runner.DEFAULT_COMMAND_TIMEOUT,
+                        help="Kill the gluster/glusterfs commands not "
+                        "completed within SECONDS (Default: "
+                        "{0})".format(runner.DEFAULT_COMMAND_TIMEOUT))
+    parser.add_argument("--retries", type=int,
+                        default=runner.DEFAULT_RETRIES,
+                        help="Number of retries of the commands failed "
+                        "due to transient glusterd errors (Default: "
+                        "{0})".format(runner.DEFAULT_RETRIES))
+    parser.add_argument("--retry-backoff", type=float, metavar="SECONDS",
+                        default=runner.DEFAULT_BACKOFF,
+                        help="Wait before the first retry, doubled for "
+                        "each retry (Default: "
+                        "{0})".format(runner.DEFAULT_BACKOFF))
+    parser.add_argument("--log-file", default=DEFAULT_LOG_FILE,
+                        help="Log the output of the commands to this "
+                        "file, empty to disable (Default: "
+                        "{0})".format(DEFAULT_LOG_FILE))
+    parser.add_argument("--redistribute-keys", action="store_true",
+                        help="Copy the SSH Keys to all the Secondary nodes "
+                        "even if already present in the Main Secondary node")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip the steps completed by the previous run")
+    parser.add_argument("--from-step", choices=journal.STEPS,
+                        help="Start the setup from the given step")
+    parser.add_argument("--journal-dir", default=journal.DEFAULT_JOURNAL_DIR,
+                        help="Directory to record the completed steps "
+                        "(Default: {0})".format(journal.DEFAULT_JOURNAL_DIR))
+    parser.add_argument("--manifest", metavar="FILE",
+                        help="Setup all the sessions listed in FILE, one "
+                        "PRIMARY_VOL SECONDARY per line")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="With --manifest, number of Secondary hosts "
+                        "to setup concurrently (Default: 4)")
+    add_timings_args(parser)
+
+    args = parser.parse_args()
+    if args.manifest is None and (args.primary_vol is None or
+                                  args.secondary is None):
+        parser.error("PRIMARY_VOL and SECONDARY are required "
+                     "without --manifest")
+
+    return args
 
 
 def main():
     """
     Main function to handle Keyboard inturrupt.
     """
+    # Parse/Validate the CLI arguments
+    args = get_args()
+    enable_timings(args)
     try:
-        setup_georep()
+        setup_georep(args)
     except KeyboardInterrupt:
         sys.stderr.write("\nExiting..\n")
         sys.exit(1)
+    finally:
+        TIMINGS.report(args)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+
+class SetupError(Exception):
+    """
+    Failure of a setup step, raised by the steps which run
+    concurrently so that all the failures can be reported together.
+    """
+    def __init__(self, msg, err=""):
+        super().__init__(msg)
+        self.msg = msg
+        self.err = err
+
+
+class UnreachableError(SetupError):
+    """
+    Secondary host is not reachable
+    """
+
+
+class SSHConnectionError(SetupError):
+    """
+    SSH connection or authentication to the Secondary host failed
+    """
+
+
+class EmptyCheckTimeoutError(SetupError):
+    """
+    Listing the Secondary Volume did not complete within the timeout.
+    The abandoned reader is still blocked in the mount.
+    """
+
+
+class PreflightError(SetupError):
+    """
+    One or more pre-flight checks failed. failures is the list of
+    (msg, err) of all the failed checks.
+    """
+    def __init__(self, failures):
+        super().__init__("Pre-flight checks failed",
+                         "\n".join(msg for msg, _ in failures))
+        self.failures = failures
+
+
+class KeyDistributionError(SetupError):
+    """
+    Copying or distributing the SSH Keys to the Secondary failed
+    """
+
+
+class SessionCreateError(SetupError):
+    """
+    gluster volume geo-replication create failed
+    """
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Journal of the completed setup steps of a session. Rerun of the setup
+with --resume skips the steps which are already completed. Steps which
+depend on the common secret pub file record its digest, they are
+repeated if the pub file changed since.
+"""
+
+import hashlib
+import json
+import os
+import time
+
+DEFAULT_JOURNAL_DIR = "/var/lib/gluster-georep-tools/setup"
+
+# Setup steps in the order of execution
+STEPS = ("preflight", "gsec_create", "copy", "distribute",
+         "authorized_keys", "create")
+
+
+def file_digest(path):
+    """
+    sha256 of the file content, None if the file doesn't exist
+    """
+    try:
+        with open(path, "rb") as data_file:
+            return hashlib.sha256(data_file.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+class Journal:
+    """
+    Completed steps of a session, stored as JSON file. If
+    journal_dir is None, steps are tracked only in memory.
+    """
+    def __init__(self, journal_dir, primary_vol, secondary_host,
+                 secondary_vol):
+        self.path = None
+        self.steps = {}
+        if journal_dir is None:
+            return
+
+        self.path = os.path.join(
+            journal_dir, "{0}_{1}_{2}.json".format(primary_vol,
+                                                   secondary_host,
+                                                   secondary_vol))
+        try:
+            with open(self.path) as journal_file:
+                self.steps = json.load(journal_file).get("steps", {})
+        except (OSError, ValueError):
+            pass
+
+    def reset(self):
+        self.steps = {}
+        self.save()
+
+    def save(self):
+        if self.path is None:
+            return
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as journal_file:
+            json.dump({"steps": self.steps}, journal_file, indent=4)
+        os.replace(tmp_path, self.path)
+
+    def completed(self, step, pub_digest=None):
+        """
+        True if the step is completed. If pub_digest is given, step
+        is considered completed only if it was done with the same
+        pub file.
+        """
+        if step not in self.steps:
+            return False
+
+        if pub_digest is not None:
+            return self.steps[step].get("pub_sha256") == pub_digest
+
+        return True
+
+    def done(self, step, pub_digest=None):
+        self.steps[step] = {"time": time.time()}
+        if pub_digest is not None:
+            self.steps[step]["pub_sha256"] = pub_digest
+        self.save()
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+Discover the nodes of the Secondary cluster and check if they are
+reachable. All the nodes and ports are probed concurrently, each
+probe gives up after the timeout so that a black-holed node doesn't
+stall the setup.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import socket
+import xml.etree.ElementTree as ET
+
+from gluster_georep_tools.setup.errors import SetupError
+
+SSH_PORT = 22
+GLUSTERD_PORT = 24007
+DEFAULT_PROBE_TIMEOUT = 3
+DEFAULT_SCAN_WORKERS = 32
+
+
+def is_port_open(hostname, port, timeout=DEFAULT_PROBE_TIMEOUT):
+    """
+    True if TCP connection to the port succeeds within the timeout
+    """
+    try:
+        sock = socket.create_connection((hostname, port), timeout=timeout)
+    except (socket.error, socket.timeout):
+        return False
+
+    sock.close()
+    return True
+
+
+def parse_pool_list(pool_xml, main_host):
+    """
+    Returns the list of (hostname, connected) from `gluster pool
+    list --xml` run in main_host. localhost entry is main_host.
+    """
+    try:
+        peers = ET.fromstring(pool_xml).findall("peerStatus/peer")
+    except ET.ParseError as err:
+        raise SetupError("Unable to parse Secondary pool list", str(err))
+
+    nodes = []
+    for peer in peers:
+        hostname = peer.find("hostname").text
+        if hostname == "localhost":
+            hostname = main_host
+
+        connected = peer.find("connected")
+        nodes.append((hostname,
+                      connected is not None and connected.text == "1"))
+
+    return nodes
+
+
+def scan(hostnames, ports=(SSH_PORT, GLUSTERD_PORT),
+         timeout=DEFAULT_PROBE_TIMEOUT, workers=DEFAULT_SCAN_WORKERS):
+    """
+    Probe all the ports of all the hosts concurrently. Returns
+    dict of hostname => {port: reachable}
+    """
+    probes = [(hostname, port) for hostname in hostnames for port in ports]
+    results = {hostname: {} for hostname in hostnames}
+    if not probes:
+        return results
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(probes))) \
+            as executor:
+        reachable = executor.map(
+            lambda probe: is_port_open(probe[0], probe[1], timeout), probes)
+        for (hostname, port), is_open in zip(probes, reachable):
+            results[hostname][port] = is_open
+
+    return results
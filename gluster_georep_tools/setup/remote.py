@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+Remote command execution over one persistent SSH transport.
+Commands are run on separate channels of the same transport, so
+several independent commands can be pipelined without waiting for
+each other's round trip. Exit status of every command is collected.
+Failures of the transport or the SFTP session are raised as SetupError.
+"""
+
+from gluster_georep_tools.setup.errors import SetupError
+
+DEFAULT_CONNECT_TIMEOUT = 30
+DEFAULT_KEEPALIVE = 30
+
+
+class RemoteResult:
+    """
+    Result of a remote command
+    """
+    def __init__(self, cmd, returncode, out, err):
+        self.cmd = cmd
+        self.returncode = returncode
+        self.out = out
+        self.err = err
+
+    @property
+    def ok(self):
+        return self.returncode == 0
+
+
+def transport_errors():
+    """
+    Exceptions raised by paramiko when the channel, the transport
+    or the SFTP session fails
+    """
+    import paramiko
+
+    return (paramiko.SSHException, OSError, EOFError)
+
+
+class RemoteExecutor:
+    """
+    Wraps a connected paramiko SSHClient. Commands are prefixed
+    with sudo if use_sudo is set.
+    """
+    def __init__(self, ssh, use_sudo=False):
+        self.ssh = ssh
+        self.use_sudo = use_sudo
+        self.sftp = None
+
+    def _start(self, cmd, timeout=None):
+        if self.use_sudo:
+            cmd = "sudo " + cmd
+
+        transport = self.ssh.get_transport()
+        if transport is None or not transport.is_active():
+            import paramiko
+
+            raise paramiko.SSHException("SSH connection is closed")
+
+        channel = transport.open_session()
+        if timeout is not None:
+            channel.settimeout(timeout)
+        channel.exec_command(cmd)
+        return cmd, channel
+
+    @staticmethod
+    def _collect(cmd, channel):
+        with channel.makefile("rb") as stdout, \
+             channel.makefile_stderr("rb") as stderr:
+            out = stdout.read().decode("utf-8", errors="replace")
+            err = stderr.read().decode("utf-8", errors="replace")
+        returncode = channel.recv_exit_status()
+        channel.close()
+        return RemoteResult(cmd, returncode, out, err)
+
+    def run(self, cmd, timeout=None, error=SetupError):
+        """
+        Run the command and wait for its exit status. Raises
+        error(SetupError by default) if the SSH channel fails.
+        """
+        return self.run_many([cmd], timeout, error)[0]
+
+    def run_many(self, cmds, timeout=None, error=SetupError):
+        """
+        Start all the commands on concurrent channels before
+        waiting for any of them. Returns the results in the
+        same order as the commands. Raises error(SetupError by
+        default) if the SSH channel of any command fails.
+        """
+        started = []
+        cmd = None
+        try:
+            for cmd in cmds:
+                started.append(self._start(cmd, timeout))
+
+            results = []
+            for cmd, channel in started:
+                results.append(self._collect(cmd, channel))
+        except transport_errors() as err:
+            for _, channel in started:
+                channel.close()
+            raise error("Failed to run the command in Secondary",
+                        "{0}: {1}".format(cmd, err))
+
+        return results
+
+    def put(self, local_path, remote_path, error=SetupError):
+        """
+        Upload the file, SFTP session is reused across the uploads.
+        Raises error(SetupError by default) if the upload fails.
+        """
+        try:
+            if self.sftp is None:
+                self.sftp = self.ssh.open_sftp()
+
+            self.sftp.put(local_path, remote_path)
+        except transport_errors() as err:
+            raise error("Failed to upload the file to Secondary",
+                        "{0} => {1}: {2}".format(local_path, remote_path,
+                                                 err))
+
+    def close(self):
+        if self.sftp is not None:
+            self.sftp.close()
+            self.sftp = None
+
+        self.ssh.close()
+
+
+def connect(hostname, username, password,
+            timeout=DEFAULT_CONNECT_TIMEOUT, keepalive=DEFAULT_KEEPALIVE):
+    """
+    Establish the SSH connection and return the RemoteExecutor.
+    Raises paramiko exceptions or socket errors on failure.
+    """
+    # paramiko and its crypto stack are imported only when SSH
+    # connection is required, keeps --help and argument errors fast
+    import paramiko
+
+    ssh = paramiko.SSHClient()
+    ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    ssh.connect(hostname, username=username, password=password,
+                timeout=timeout, banner_timeout=timeout,
+                auth_timeout=timeout)
+    if keepalive:
+        ssh.get_transport().set_keepalive(keepalive)
+
+    return RemoteExecutor(ssh, use_sudo=username != "root")
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+Local command execution with a deadline per command. Output of the
+command is streamed to the log line by line while it runs, and the
+command is retried with backoff if it fails with one of the transient
+glusterd errors (For example, cluster lock held by another
+transaction).
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import os
+import signal
+import subprocess
+import threading
+import time
+
+DEFAULT_COMMAND_TIMEOUT = 300
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF = 2
+
+# Failures worth retrying, glusterd is busy or restarting
+TRANSIENT_ERRORS = (
+    "Another transaction is in progress",
+    "Locking failed",
+    "locking failed",
+    "Connection failed. Please check if gluster daemon is operational",
+    "Request timed out",
+)
+
+logger = logging.getLogger(__name__)
+
+
+class CommandResult:
+    """
+    Result of a local command. returncode is None if the command
+    was killed after the timeout.
+    """
+    def __init__(self, cmd, returncode, out, err, attempts=1):
+        self.cmd = cmd
+        self.returncode = returncode
+        self.out = out
+        self.err = err
+        self.attempts = attempts
+
+    @property
+    def ok(self):
+        return self.returncode == 0
+
+    @property
+    def timed_out(self):
+        return self.returncode is None
+
+    @property
+    def transient(self):
+        output = self.err + self.out
+        return not self.ok and not self.timed_out and \
+            any(msg in output for msg in TRANSIENT_ERRORS)
+
+
+def _stream(pipe, name, cmdname, lines):
+    """
+    Collect the lines from the pipe while logging them
+    """
+    for line in iter(pipe.readline, ""):
+        logger.debug("%s %s: %s", cmdname, name, line.rstrip("\n"))
+        lines.append(line)
+    pipe.close()
+
+
+class CommandRunner:
+    """
+    Runs the commands with the configured timeout and retries
+    """
+    def __init__(self, timeout=DEFAULT_COMMAND_TIMEOUT,
+                 retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+
+    def _run_once(self, cmd, timeout):
+        cmdname = " ".join(cmd)
+        logger.debug("Running %s", cmdname)
+        try:
+            # New session, so that the children of the command are
+            # also killed on timeout
+            p = subprocess.Popen(cmd, universal_newlines=True,
+                                 stdin=subprocess.DEVNULL,
+                                 stdout=subprocess.PIPE,
+                                 stderr=subprocess.PIPE,
+                                 start_new_session=True)
+        except OSError as err:
+            return CommandResult(cmd, 127, "", str(err))
+
+        out = []
+        err = []
+        readers = [
+            threading.Thread(target=_stream,
+                             args=(p.stdout, "stdout", cmdname, out),
+                             daemon=True),
+            threading.Thread(target=_stream,
+                             args=(p.stderr, "stderr", cmdname, err),
+                             daemon=True),
+        ]
+        for reader in readers:
+            reader.start()
+
+        try:
+            returncode = p.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            logger.warning("%s did not finish in %ss, killing it",
+                           cmdname, timeout)
+            try:
+                os.killpg(p.pid, signal.SIGKILL)
+            except OSError:
+                pass
+            p.wait()
+            returncode = None
+
+        # Daemonized children may keep the pipes open, don't
+        # wait for them beyond the deadline
+        for reader in readers:
+            reader.join(timeout=1)
+
+        logger.debug("%s exited with %s", cmdname, returncode)
+        return CommandResult(cmd, returncode, "".join(out), "".join(err))
+
+    def run(self, cmd, timeout=None):
+        """
+        Run the command, retrying on transient glusterd errors.
+        Returns the CommandResult of the last attempt.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        attempt = 0
+        while True:
+            attempt += 1
+            result = self._run_once(cmd, timeout)
+            result.attempts = attempt
+            if not result.transient or attempt > self.retries:
+                return result
+
+            delay = self.backoff * 2 ** (attempt - 1)
+            logger.info("%s failed with a transient error, retrying "
+                        "in %ss", " ".join(cmd), delay)
+            time.sleep(delay)
+
+    def run_many(self, cmds, workers=4, timeout=None):
+        """
+        Run the commands concurrently. Returns the results in
+        the same order as the commands.
+        """
+        if not cmds:
+            return []
+
+        with ThreadPoolExecutor(max_workers=min(workers, len(cmds))) \
+                as executor:
+            return list(executor.map(lambda cmd: self.run(cmd, timeout),
+                                     cmds))
@@ -0,0 +1,1025 @@
+# -*- coding: utf-8 -*-
+"""
+Setup of Geo-replication sessions as a library. Nothing is printed and
+nothing exits the process: each step returns a StepResult and raises a
+SetupError subclass on failure. Warnings are passed to the optional
+warn callback, results of the steps to the optional listener as they
+complete. gluster-georep-setup is a wrapper which prints them.
+
+    setup = SessionSetup("gvol1", "geoaccount@snode1::gvol2", password)
+    try:
+        results = setup.run()
+    finally:
+        setup.close()
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import os
+import socket
+import tempfile
+
+from gluster_georep_tools.setup import journal, peers, remote, runner, \
+    volstat
+from gluster_georep_tools.setup.errors import SetupError, UnreachableError, \
+    SSHConnectionError, PreflightError, KeyDistributionError, \
+    SessionCreateError, EmptyCheckTimeoutError
+from gluster_georep_tools.setup.remote import DEFAULT_CONNECT_TIMEOUT, \
+    DEFAULT_KEEPALIVE
+from gluster_georep_tools.timings import phase
+
+BUFFER_SIZE = 104857600  # Considering buffer_size 100MB
+SESSION_MOUNT_LOG_FILE = ("/var/log/glusterfs/geo-replication"
+                          "/georepsetup.mount.log")
+SYMBOLS = ('K', 'M', 'G', 'T', 'P', 'E', 'Z', 'Y')
+DEFAULT_GLUSTERD_WORKDIR = "/var/lib/glusterd"
+COMMAND_RUNNER = runner.CommandRunner()
+
+
+def set_command_runner(command_runner):
+    """
+    Runner used for all the local commands
+    """
+    global COMMAND_RUNNER
+    COMMAND_RUNNER = command_runner
+
+
+def human_readable_size(num):
+    """
+    To show size as 100K, 100M, 10G instead of
+    showing in bytes.
+    """
+    for s in reversed(SYMBOLS):
+        power = SYMBOLS.index(s)+1
+        if num >= 1024**power:
+            value = float(num) / (1024**power)
+            return '%.1f%s' % (value, s)
+
+    # if size less than 1024 or human readable not required
+    return '%s' % num
+
+
+def run_command(cmd, failure_msg="", timeout=None, error=SetupError):
+    """
+    Execute the CLI command and return the Output. Command is
+    killed if not completed within the timeout (Default: the
+    configured command timeout). Raises error(SetupError by
+    default) on failure.
+    """
+    result = COMMAND_RUNNER.run(cmd, timeout=timeout)
+    if result.timed_out:
+        raise error(failure_msg, "{0} did not complete in {1}s".format(
+            " ".join(cmd),
+            COMMAND_RUNNER.timeout if timeout is None else timeout))
+
+    if not result.ok:
+        raise error(failure_msg, result.err if result.err else result.out)
+
+    return result.out
+
+
+def cleanup(hostname, volname, mnt, lazy=False):
+    """
+    Unmount the Volume and Remove the temporary directory. Lazy
+    unmount detaches the mount even if it is busy.
+    """
+    run_command(["umount", "-l", mnt] if lazy else ["umount", mnt],
+                failure_msg="Unable to Unmount Gluster Volume "
+                "{0}:{1}(Mounted at {2})".format(hostname, volname, mnt))
+    run_command(["rmdir", mnt],
+                failure_msg="Unable to Remove temp directory "
+                "{0}".format(mnt))
+
+
+@contextmanager
+def glustermount(hostname, volname):
+    """
+    Context manager for Mounting Gluster Volume
+    Use as
+        with glustermount(HOSTNAME, VOLNAME) as MNT:
+            # Do your stuff
+    Automatically unmounts it in case of Exceptions/out of context.
+    Raises SetupError if mount fails.
+    """
+    mnt = tempfile.mkdtemp(prefix="georepsetup_")
+    try:
+        run_command(["glusterfs",
+                     "--xlator-option=\"*dht.lookup-unhashed=off\"",
+                     "--volfile-server", hostname,
+                     "--volfile-id", volname,
+                     "-l", SESSION_MOUNT_LOG_FILE,
+                     "--client-pid=-1",
+                     mnt],
+                    failure_msg="Unable to Mount Gluster Volume "
+                    "{0}:{1}".format(hostname, volname))
+    except SetupError:
+        os.rmdir(mnt)
+        raise
+
+    if not os.path.ismount(mnt):
+        os.rmdir(mnt)
+        raise SetupError("Unable to Mount Gluster Volume "
+                         "{0}:{1}".format(hostname, volname))
+
+    try:
+        yield mnt
+    except EmptyCheckTimeoutError as err:
+        # Reader thread abandoned after the timeout keeps the mount
+        # busy. Detach it lazily, and report an unmount failure along
+        # with the timeout instead of replacing it.
+        try:
+            cleanup(hostname, volname, mnt, lazy=True)
+        except SetupError as cleanup_err:
+            err.err = "\n".join(msg for msg in (
+                err.err, cleanup_err.msg, cleanup_err.err) if msg)
+        raise
+    except BaseException:
+        cleanup(hostname, volname, mnt)
+        raise
+
+    cleanup(hostname, volname, mnt)
+
+
+def is_port_enabled(hostname, port, timeout=peers.DEFAULT_PROBE_TIMEOUT):
+    """
+    To check if a port is enabled or not. For example
+    To check ssh port is enabled or not,
+        is_port_enabled(HOSTNAME, 22)
+
+    To see glusterd port is enabled,
+        is_port_enabled(HOSTNAME, 24007)
+
+    Port is considered not enabled if not connected within
+    the timeout.
+    """
+    return peers.is_port_open(hostname, port, timeout)
+
+
+def get_glusterd_workdir():
+    """
+    Command to get Glusterd working dir. If failed returns the
+    default directory /var/lib/glusterd
+    """
+    result = COMMAND_RUNNER.run(["gluster", "system::", "getwd"])
+
+    if result.ok:
+        return result.out.strip()
+    else:
+        return DEFAULT_GLUSTERD_WORKDIR
+
+
+def check_host_reachable(secondary_host,
+                         timeout=peers.DEFAULT_PROBE_TIMEOUT):
+    """
+    Check if SSH port is open for given secondary_host. Raises
+    UnreachableError if not.
+    """
+    if not is_port_enabled(secondary_host, 22, timeout):
+        raise UnreachableError("{0} is Not Reachable(Port 22)".format(
+            secondary_host))
+
+    return "{0} is Reachable(Port 22)".format(secondary_host)
+
+
+def ssh_initialize(secondary_host, username, passwd,
+                   timeout=DEFAULT_CONNECT_TIMEOUT,
+                   keepalive=DEFAULT_KEEPALIVE):
+    """
+    Initialize the SSH connection. Returns the RemoteExecutor which
+    runs all the remote commands over this connection. Raises
+    SSHConnectionError on failure.
+    """
+    import paramiko
+
+    try:
+        return remote.connect(secondary_host, username, passwd,
+                              timeout=timeout, keepalive=keepalive)
+    except (paramiko.ssh_exception.SSHException, socket.error) as e:
+        raise SSHConnectionError("Unable to establish SSH connection "
+                                 "to {0}@{1}:\n{2}".format(username,
+                                                           secondary_host,
+                                                           e))
+
+
+def get_primary_gluster_version():
+    """
+    Collect Primary version by directly executing CLI command
+    """
+    out = run_command(["gluster", "--version"],
+                      failure_msg="Failed to get Gluster version "
+                      "from Primary Cluster")
+    return out.split()[1]
+
+
+def get_secondary_gluster_version(ssh):
+    """
+    Collect Secondary version via SSH command execution
+    """
+    result = ssh.run("gluster --version")
+    if not result.ok:
+        raise SetupError("Unable to get Secondary Gluster Version",
+                         result.err)
+
+    return result.out.split()[1]
+
+
+def compare_gluster_versions(primary_version, secondary_version):
+    """
+    Compare the Primary and Secondary Gluster versions. Returns
+    the list of failures.
+    """
+    if primary_version == secondary_version:
+        return []
+
+    return ["Primary Volume({0}) and Secondary Volume({1}) "
+            "versions not Compatible".format(primary_version,
+                                             secondary_version)]
+
+
+def get_volume_size(hostname, volname, check_empty=False,
+                    empty_check_timeout=volstat.DEFAULT_EMPTY_CHECK_TIMEOUT):
+    """
+    Mount the Volume and collect the disk size and used size.
+    Returns the tuple of disk size, used size and the sample of
+    entries in the Volume if check_empty is True.
+    """
+    with glustermount(hostname, volname) as mnt:
+        files = None
+        if check_empty:
+            files = volstat.probe_entries(mnt, timeout=empty_check_timeout)
+        data = os.statvfs(mnt)
+
+    disk_size = data.f_blocks * data.f_bsize
+    used_size = (data.f_blocks - data.f_bavail) * data.f_bsize
+    return disk_size, used_size, files
+
+
+def remote_runner(ssh):
+    """
+    Returns a function to run the gluster command in the
+    Secondary node, similar to run_command.
+    """
+    def run(cmd):
+        result = ssh.run(" ".join(cmd))
+        if not result.ok:
+            raise SetupError("Failed to run {0} in Secondary".format(
+                " ".join(cmd)), result.err)
+        return result.out
+
+    return run
+
+
+def get_volume_stat(backend, hostname, volname, check_empty=False,
+                    run=None,
+                    empty_check_timeout=volstat.DEFAULT_EMPTY_CHECK_TIMEOUT,
+                    warn=None):
+    """
+    Size, used size and emptiness of the Volume using the given
+    backend. Falls back to the FUSE mount if the backend fails, or
+    only to check emptiness if the backend doesn't support it.
+    """
+    stat = None
+    try:
+        if backend == "detail":
+            stat = volstat.detail_volume_size(
+                run_command if run is None else run, volname)
+        elif backend == "gfapi":
+            stat = volstat.gfapi_volume_size(hostname, volname, check_empty)
+    except SetupError as err:
+        if warn is not None:
+            warn("{0}, using mount to get details of {1}:{2}".format(
+                err.msg, hostname, volname))
+
+    if stat is None:
+        return get_volume_size(hostname, volname, check_empty,
+                               empty_check_timeout)
+
+    if check_empty and stat[2] is None:
+        with glustermount(hostname, volname) as mnt:
+            return stat[0], stat[1], volstat.probe_entries(
+                mnt, timeout=empty_check_timeout)
+
+    return stat
+
+
+def compare_disk_sizes(force, secondary_host, secondary_vol,
+                       primary_size, secondary_size, warn=None):
+    """
+    Compare the disk sizes and available sizes. Also
+    Check Secondary volume is empty or not. Returns the
+    list of failures. With force, failures are passed
+    to warn instead.
+    """
+    errors = []
+
+    def failed(msg):
+        if not force:
+            errors.append(msg)
+        elif warn is not None:
+            warn(msg)
+
+    primary_disk_size, primary_used_size, _ = primary_size
+    secondary_disk_size, secondary_used_size, secondary_files = \
+        secondary_size
+
+    if secondary_files:
+        found = ", ".join(secondary_files)
+        if not force:
+            errors.append("{0}::{1} is not empty(Found: {2}). Please delete "
+                          "existing files in {0}::{1} and retry, or use "
+                          "--force to continue without deleting the "
+                          "existing files.".format(secondary_host,
+                                                   secondary_vol, found))
+        elif warn is not None:
+            warn("{0}::{1} is not empty(Found: {2}).".format(
+                secondary_host, secondary_vol, found))
+
+    if secondary_disk_size < primary_disk_size:
+        failed("Total disk size of primary({0}) is greater "
+               "than disk size of secondary({1})".format(
+                   human_readable_size(primary_disk_size),
+                   human_readable_size(secondary_disk_size)))
+
+    effective_primary_used_size = primary_used_size + BUFFER_SIZE
+    secondary_available_size = secondary_disk_size - secondary_used_size
+    primary_available_size = primary_disk_size - effective_primary_used_size
+
+    if secondary_available_size < primary_available_size:
+        failed("Total available size of primary({0}) is greater "
+               "than available size of secondary({1})".format(
+                   human_readable_size(primary_available_size),
+                   human_readable_size(secondary_available_size)))
+
+    return errors
+
+
+def timed(name, func, *args, **kwargs):
+    """
+    Wrap the function to record its wall time as a phase
+    """
+    def run():
+        with phase(name):
+            return func(*args, **kwargs)
+
+    return run
+
+
+def run_gsec_create(georep_dir):
+    """
+    gsec_create command to generate pem keys in all the primary nodes
+    and collect all pub keys to single node
+    """
+    run_command(["gluster", "system::", "execute", "gsec_create"],
+                failure_msg="Common secret pub file generation failed")
+    return "Common secret pub file present at " \
+        "{0}/common_secret.pem.pub".format(georep_dir)
+
+
+def scan_secondary_nodes(ssh, secondary_host,
+                         timeout=peers.DEFAULT_PROBE_TIMEOUT):
+    """
+    Check the SSH and Glusterd ports of all the Secondary nodes
+    concurrently. Returns the list of dicts with hostname, connected
+    and ports(port => reachable). Raises SetupError if the nodes
+    can't be listed.
+    """
+    result = ssh.run("gluster pool list --xml")
+    if not result.ok:
+        raise SetupError("Unable to list the Secondary nodes", result.err)
+
+    nodes = peers.parse_pool_list(result.out, secondary_host)
+    reachable = peers.scan([hostname for hostname, _ in nodes],
+                           (peers.SSH_PORT, peers.GLUSTERD_PORT), timeout)
+    return [{"hostname": hostname, "connected": connected,
+             "ports": reachable[hostname]}
+            for hostname, connected in nodes]
+
+
+def unreachable_nodes(nodes):
+    """
+    Hostnames of the scanned nodes which are disconnected or
+    have any port not reachable
+    """
+    return [node["hostname"] for node in nodes
+            if not node["connected"] or not all(node["ports"].values())]
+
+
+def missing_pub_keys(ssh, georep_dir, pubfiles, session_users):
+    """
+    Compare the common secret pub file with the copies present on the
+    Main Secondary node and the authorized_keys of the session users.
+    Returns the list of pubfiles to be copied and the list of session
+    users whose authorized_keys doesn't have all the keys.
+    """
+    pubpath = os.path.join(georep_dir, "common_secret.pem.pub")
+    pub_digest = journal.file_digest(pubpath)
+    with open(pubpath) as pub_file:
+        pub_keys = set(line.strip() for line in pub_file if line.strip())
+
+    # All the checks in a single round trip
+    results = ssh.run_many(
+        [f"sha256sum {georep_dir}/{pubfile}" for pubfile in pubfiles] +
+        [f"cat ~{user}/.ssh/authorized_keys" for user in session_users],
+        error=KeyDistributionError
+    )
+
+    copy_pubfiles = []
+    for pubfile, result in zip(pubfiles, results[:len(pubfiles)]):
+        remote_digest = result.out.split()[0] if result.out.strip() else ""
+        if not result.ok or remote_digest != pub_digest:
+            copy_pubfiles.append(pubfile)
+
+    add_users = []
+    for user, result in zip(session_users, results[len(pubfiles):]):
+        authorized = set(line.strip() for line in result.out.splitlines())
+        if not result.ok or not pub_keys.issubset(authorized):
+            add_users.append(user)
+
+    return copy_pubfiles, add_users
+
+
+def copy_to_main_secondary_node(ssh, secondary_user, secondary_host,
+                                georep_dir, pubfiles):
+    """
+    Copy common_secret.pem.pub file to Main Secondary node. File is
+    uploaded once and copied as each of the given pubfile names.
+    """
+    home_dir = "/root"
+    if secondary_user != "root":
+        home_dir = f"/home/{secondary_user}"
+
+    # Copy common_secret.pem.pub file to Main Secondary node
+    ssh.put(
+        f"{georep_dir}/common_secret.pem.pub",
+        f"{home_dir}/{pubfiles[0]}",
+        error=KeyDistributionError
+    )
+
+    results = ssh.run_many([
+        f"cp {home_dir}/{pubfiles[0]} {georep_dir}/{pubfile}"
+        for pubfile in pubfiles
+    ], error=KeyDistributionError)
+    for result in results:
+        if not result.ok:
+            raise KeyDistributionError(
+                "Unable to copy common_secret.pem.pub file "
+                "to {0}".format(secondary_host), result.err)
+
+    return "common_secret.pem.pub file copied to {0}".format(secondary_host)
+
+
+def distribute_to_all_secondary_nodes(ssh, pubfiles):
+    """
+    Distribute the pem.pub files to all the secondary nodes using
+    Glusterd copy file infrastructure
+    """
+    # Run one after the other, concurrent glusterd transactions
+    # fail to acquire the cluster lock
+    for pubfile in pubfiles:
+        result = ssh.run(
+            f"gluster system:: copy file /geo-replication/{pubfile}",
+            error=KeyDistributionError)
+        if not result.ok:
+            raise KeyDistributionError("Unable to copy Primary SSH Keys to "
+                                       "all Up Secondary nodes", result.err)
+
+    return "Primary SSH Keys copied to all Up Secondary nodes"
+
+
+def add_to_authorized_keys(ssh, pubfile, secondary_session_user):
+    """
+    Add these pub keys to authorized_keys file of all Secondary nodes
+    """
+    result = ssh.run(
+        f"gluster system:: execute add_secret_pub {secondary_session_user} "
+        f"geo-replication/{pubfile}",
+        error=KeyDistributionError
+    )
+
+    if not result.ok:
+        raise KeyDistributionError("Unable to update Primary SSH Keys to "
+                                   "all Up Secondary nodes authorized_keys "
+                                   "file", result.err)
+
+    return "Updated Primary SSH Keys to all Up Secondary nodes " \
+        "authorized_keys file"
+
+
+def create_georep_session(primary_vol, secondary_session_user,
+                          secondary_host, secondary_vol, force=False):
+    """
+    Create Geo-rep session using gluster volume geo-replication command
+    """
+    secondary = secondary_host
+    if secondary_session_user != "root":
+        secondary = "{0}@{1}".format(secondary_session_user, secondary_host)
+
+    cmd = ["gluster", "volume", "geo-replication",
+           primary_vol,
+           "{0}::{1}".format(secondary, secondary_vol),
+           "create",
+           "no-verify"]
+
+    cmd += ["force"] if force else []
+    run_command(cmd,
+                failure_msg="Failed to Establish Geo-replication Session",
+                error=SessionCreateError)
+    return "Geo-replication Session Established"
+
+
+def parse_secondary(secondary):
+    """
+    Returns the tuple of session user, secondary host and secondary
+    volume from [USER@]HOST::VOLUME
+    """
+    if "::" not in secondary:
+        raise SetupError("Invalid Secondary {0}, expected "
+                         "[USER@]HOST::VOLUME".format(secondary))
+
+    secondary_host_data, secondary_vol = secondary.split("::")
+    secondary = secondary_host_data.split("@")
+    secondary_session_user = "root" if len(secondary) == 1 else secondary[0]
+    return secondary_session_user, secondary[-1], secondary_vol
+
+
+def file_digest_or_missing(path):
+    """
+    Digest of the file, or a value which never matches the
+    journal if the file is missing.
+    """
+    digest = journal.file_digest(path)
+    return "missing" if digest is None else digest
+
+
+def pubfile_name(primary_vol, secondary_vol):
+    """
+    Target name for Pubfile
+    """
+    return "{0}_{1}_common_secret.pem.pub".format(primary_vol, secondary_vol)
+
+
+class StepResult:
+    """
+    Result of a setup step. details has the step specific data,
+    for example the versions and sizes collected by preflight.
+    """
+    def __init__(self, step, message, skipped=False, warnings=None,
+                 details=None):
+        self.step = step
+        self.message = message
+        self.skipped = skipped
+        self.warnings = warnings if warnings is not None else []
+        self.details = details if details is not None else {}
+
+    def __repr__(self):
+        return "StepResult({0!r}, {1!r}, skipped={2})".format(
+            self.step, self.message, self.skipped)
+
+
+class SessionSetup:
+    """
+    Setup of a Geo-replication session from this Primary node. Steps
+    can be run individually in the order of journal.STEPS, or all of
+    them with run(). SSH connection is established by preflight (or
+    connect) and reused by the later steps until close().
+    """
+    def __init__(self, primary_vol, secondary, password,
+                 secondary_user="root", force=False, georep_dir=None,
+                 connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 keepalive=DEFAULT_KEEPALIVE,
+                 probe_timeout=peers.DEFAULT_PROBE_TIMEOUT,
+                 volstat_backend="detail",
+                 empty_check_timeout=volstat.DEFAULT_EMPTY_CHECK_TIMEOUT,
+                 redistribute_keys=False, journal_dir=None, listener=None):
+        self.primary_vol = primary_vol
+        self.secondary = secondary
+        self.session_user, self.secondary_host, self.secondary_vol = \
+            parse_secondary(secondary)
+        self.password = password
+        self.secondary_user = secondary_user
+        self.force = force
+        self.georep_dir = georep_dir
+        self.connect_timeout = connect_timeout
+        self.keepalive = keepalive
+        self.probe_timeout = probe_timeout
+        self.volstat_backend = volstat_backend
+        self.empty_check_timeout = empty_check_timeout
+        self.redistribute_keys = redistribute_keys
+        self.journal = journal.Journal(journal_dir, primary_vol,
+                                       self.secondary_host,
+                                       self.secondary_vol)
+        self.listener = listener
+        self.pubfile = pubfile_name(primary_vol, self.secondary_vol)
+        self.ssh = None
+        self.results = []
+
+        if self.georep_dir is None:
+            self.georep_dir = os.path.join(get_glusterd_workdir(),
+                                           "geo-replication")
+        self.pubpath = os.path.join(self.georep_dir, "common_secret.pem.pub")
+
+    def _done(self, step, message, skipped=False, warnings=None,
+              **details):
+        result = StepResult(step, message, skipped=skipped,
+                            warnings=warnings, details=details)
+        self.results.append(result)
+        if self.listener is not None:
+            self.listener(result)
+        return result
+
+    def check_reachable(self):
+        """
+        Check the SSH port of the Main Secondary node
+        """
+        with phase("check host reachable"):
+            msg = check_host_reachable(self.secondary_host,
+                                       self.probe_timeout)
+        return self._done("reachable", msg)
+
+    def connect(self):
+        """
+        Establish the SSH connection to the Main Secondary node
+        """
+        with phase("ssh connect"):
+            self.ssh = ssh_initialize(self.secondary_host,
+                                      self.secondary_user, self.password,
+                                      timeout=self.connect_timeout,
+                                      keepalive=self.keepalive)
+        return self._done("connect", "SSH Connection established "
+                          "{0}@{1}".format(self.secondary_user,
+                                           self.secondary_host))
+
+    def preflight(self):
+        """
+        Pre-flight checks. Local Gluster version query and the Volume
+        stats run concurrently while the SSH connection is established,
+        Secondary version is collected once connected. Failures of all
+        the checks, including the SSH connection, are raised together
+        as PreflightError.
+        """
+        backend = self.volstat_backend
+        warnings = []
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [
+                ("primary_version", executor.submit(timed(
+                    "primary gluster version",
+                    get_primary_gluster_version))),
+                ("primary_size", executor.submit(timed(
+                    "primary volume stat", get_volume_stat,
+                    backend, "localhost", self.primary_vol,
+                    warn=warnings.append))),
+            ]
+
+            # Secondary status detail is collected over SSH, other
+            # backends can start without waiting for the SSH connection
+            if backend != "detail":
+                futures.append(("secondary_size", executor.submit(timed(
+                    "secondary volume stat", get_volume_stat,
+                    backend, self.secondary_host, self.secondary_vol, True,
+                    empty_check_timeout=self.empty_check_timeout,
+                    warn=warnings.append))))
+
+            # Checks which need SSH are skipped if the connection
+            # fails, it is reported with the other failures
+            failures = []
+            try:
+                self.connect()
+            except SSHConnectionError as err:
+                failures.append((err.msg, err.err))
+            else:
+                futures.append(("secondary_version", executor.submit(timed(
+                    "secondary gluster version",
+                    get_secondary_gluster_version, self.ssh))))
+
+                if backend == "detail":
+                    futures.append(("secondary_size", executor.submit(timed(
+                        "secondary volume stat", get_volume_stat,
+                        backend, self.secondary_host, self.secondary_vol,
+                        True, remote_runner(self.ssh),
+                        self.empty_check_timeout, warn=warnings.append))))
+
+        results = {}
+        for name, future in futures:
+            try:
+                results[name] = future.result()
+            except SetupError as err:
+                failures.append((err.msg, err.err))
+
+        if "primary_version" in results and "secondary_version" in results:
+            # Compare Gluster Version in Primary Cluster and
+            # Secondary Cluster
+            failures += [(msg, "") for msg in compare_gluster_versions(
+                results["primary_version"], results["secondary_version"])]
+
+        if "primary_size" in results and "secondary_size" in results:
+            # Compare disk size and used size to decide
+            # Primary and Secondary are compatible
+            # Also check if Secondary is empty or not
+            failures += [(msg, "") for msg in compare_disk_sizes(
+                self.force, self.secondary_host, self.secondary_vol,
+                results["primary_size"], results["secondary_size"],
+                warn=warnings.append)]
+
+        if failures:
+            raise PreflightError(failures)
+
+        return self._done(
+            "preflight", "Primary Volume and Secondary Volume are "
+            "compatible (Version: {0})".format(results["primary_version"]),
+            warnings=warnings, **results)
+
+    def gsec_create(self):
+        """
+        Generate the pem keys in all the Primary nodes
+        """
+        with phase("gsec_create"):
+            msg = run_gsec_create(self.georep_dir)
+        return self._done("gsec_create", msg)
+
+    def scan_secondary_nodes(self):
+        """
+        Check the SSH and Glusterd ports of all the Secondary nodes.
+        Keys are distributed only to the Up Secondary nodes, so the
+        unreachable nodes are reported as warning.
+        """
+        with phase("scan secondary nodes"):
+            try:
+                nodes = scan_secondary_nodes(self.ssh, self.secondary_host,
+                                             self.probe_timeout)
+            except SetupError as err:
+                return self._done(
+                    "scan", "Reachability check of the Secondary nodes "
+                    "skipped", skipped=True, nodes=[],
+                    warnings=["{0}, skipping the reachability check of the "
+                              "Secondary nodes".format(err.msg)])
+
+        warnings = []
+        unreachable = unreachable_nodes(nodes)
+        if unreachable:
+            warnings.append("Secondary nodes not reachable: {0}. SSH Keys "
+                            "will not be copied to these nodes, rerun with "
+                            "--redistribute-keys once they are "
+                            "reachable".format(", ".join(unreachable)))
+            msg = "{0} of {1} Secondary nodes are reachable".format(
+                len(nodes) - len(unreachable), len(nodes))
+        else:
+            msg = "All {0} Secondary nodes are reachable".format(len(nodes))
+
+        return self._done("scan", msg, warnings=warnings, nodes=nodes)
+
+    def missing_keys(self):
+        """
+        Returns tuple of (keys to be copied, authorized_keys to be
+        updated) after comparing with the Main Secondary node.
+        """
+        with phase("check keys"):
+            copy_pubfiles, add_users = missing_pub_keys(
+                self.ssh, self.georep_dir, [self.pubfile],
+                [self.session_user])
+        return bool(copy_pubfiles), bool(add_users)
+
+    def copy_keys(self):
+        """
+        Copy the pub file to the Main Secondary node
+        """
+        with phase("sftp copy"):
+            msg = copy_to_main_secondary_node(
+                self.ssh, self.secondary_user, self.secondary_host,
+                self.georep_dir, [self.pubfile])
+        return self._done("copy", msg)
+
+    def distribute_keys(self):
+        """
+        Distribute the pub file to all the Secondary nodes
+        """
+        with phase("distribute keys"):
+            msg = distribute_to_all_secondary_nodes(self.ssh, [self.pubfile])
+        return self._done("distribute", msg)
+
+    def add_authorized_keys(self):
+        """
+        Add the pub keys to authorized_keys of the session user
+        in all the Secondary nodes
+        """
+        with phase("add to authorized_keys"):
+            msg = add_to_authorized_keys(self.ssh, self.pubfile,
+                                         self.session_user)
+        return self._done("authorized_keys", msg)
+
+    def create_session(self):
+        """
+        Create the Geo-replication session
+        """
+        with phase("create session"):
+            msg = create_georep_session(self.primary_vol, self.session_user,
+                                        self.secondary_host,
+                                        self.secondary_vol, self.force)
+        return self._done("create", msg)
+
+    def run(self, resume=False, from_step=None):
+        """
+        Run all the steps. Completed steps are recorded in the journal,
+        with resume the completed steps are skipped. With from_step,
+        steps before it are skipped. Returns the list of StepResults.
+        """
+        jrnl = self.journal
+        # Keys copied to the Main Secondary node by the previous run
+        # but not distributed to the other nodes
+        distribute_pending = jrnl.completed("copy") and \
+            not jrnl.completed("distribute")
+        if not resume and from_step is None:
+            jrnl.reset()
+
+        def should_run(step, pub_digest=None):
+            if from_step is not None and \
+               journal.STEPS.index(step) < journal.STEPS.index(from_step):
+                return False
+
+            if resume and jrnl.completed(step, pub_digest):
+                self._done(step, "Skipping {0}, already "
+                           "completed".format(step), skipped=True)
+                return False
+
+            return True
+
+        if should_run("preflight"):
+            self.check_reachable()
+            with phase("pre-flight checks"):
+                self.preflight()
+            jrnl.done("preflight")
+        else:
+            self.connect()
+
+        # Pub file is regenerated only if missing or changed
+        # after the previous run
+        if should_run("gsec_create", file_digest_or_missing(self.pubpath)):
+            self.gsec_create()
+            jrnl.done("gsec_create", journal.file_digest(self.pubpath))
+
+        pub_digest = journal.file_digest(self.pubpath)
+        self.scan_secondary_nodes()
+
+        run_copy = should_run("copy", pub_digest)
+        run_distribute = should_run("distribute", pub_digest)
+        run_authorized_keys = should_run("authorized_keys", pub_digest)
+
+        # gsec_create is skipped with from_step, but never ran
+        if pub_digest is None and (run_copy or run_distribute or
+                                   run_authorized_keys):
+            raise KeyDistributionError(
+                "Common secret pub file {0} not found".format(self.pubpath),
+                "Run the setup from the gsec_create step to generate it")
+
+        # Skip the key steps if the same keys are already present
+        # in the Secondary cluster
+        if not self.redistribute_keys and (run_copy or run_distribute or
+                                           run_authorized_keys):
+            copy_needed, add_needed = self.missing_keys()
+            if not copy_needed and not distribute_pending:
+                self._done("copy", "Primary SSH Keys already present in "
+                           "Secondary nodes", skipped=True)
+                jrnl.done("copy", pub_digest)
+                jrnl.done("distribute", pub_digest)
+                run_copy = run_distribute = False
+            if not add_needed:
+                self._done("authorized_keys", "Primary SSH Keys already "
+                           "present in Secondary nodes authorized_keys file",
+                           skipped=True)
+                jrnl.done("authorized_keys", pub_digest)
+                run_authorized_keys = False
+
+        if run_copy:
+            self.copy_keys()
+            jrnl.done("copy", pub_digest)
+
+        if run_distribute:
+            self.distribute_keys()
+            jrnl.done("distribute", pub_digest)
+
+        if run_authorized_keys:
+            self.add_authorized_keys()
+            jrnl.done("authorized_keys", pub_digest)
+
+        # Last Step: Create Geo-rep Session
+        if should_run("create"):
+            self.create_session()
+            jrnl.done("create")
+
+        return self.results
+
+    def close(self):
+        """
+        Close the SSH connection
+        """
+        if self.ssh is not None:
+            self.ssh.close()
+            self.ssh = None
+
+
+def setup_host_sessions(sessions, password, primary_version, georep_dir,
+                        secondary_user="root", force=False,
+                        connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                        keepalive=DEFAULT_KEEPALIVE,
+                        probe_timeout=peers.DEFAULT_PROBE_TIMEOUT,
+                        volstat_backend="detail",
+                        empty_check_timeout=volstat.DEFAULT_EMPTY_CHECK_TIMEOUT,
+                        redistribute_keys=False, warn=None):
+    """
+    Setup all the sessions of a Secondary host using one SSH
+    connection and one upload of the pub file. sessions is the list
+    of dicts with primary_vol, session_user, secondary_host and
+    secondary_vol. gsec_create must be run before. Returns the list
+    of (session, error message) where error message is None for the
+    successful sessions. Unexpected errors are also returned as the
+    failure of the remaining sessions, so that one host doesn't abort
+    the setup of the other hosts.
+    """
+    secondary_host = sessions[0]["secondary_host"]
+    try:
+        check_host_reachable(secondary_host, probe_timeout)
+        ssh = ssh_initialize(secondary_host, secondary_user, password,
+                             timeout=connect_timeout, keepalive=keepalive)
+    except SetupError as err:
+        return [(session, err.msg) for session in sessions]
+
+    results = []
+    ready = []
+    try:
+        secondary_version = get_secondary_gluster_version(ssh)
+        for session in sessions:
+            try:
+                errors = compare_gluster_versions(primary_version,
+                                                  secondary_version)
+                errors += compare_disk_sizes(
+                    force, secondary_host, session["secondary_vol"],
+                    get_volume_stat(volstat_backend, "localhost",
+                                    session["primary_vol"], warn=warn),
+                    get_volume_stat(volstat_backend, secondary_host,
+                                    session["secondary_vol"],
+                                    check_empty=True,
+                                    run=remote_runner(ssh),
+                                    empty_check_timeout=empty_check_timeout,
+                                    warn=warn),
+                    warn=warn)
+            except SetupError as err:
+                errors = [err.msg]
+
+            if errors:
+                results.append((session, "; ".join(errors)))
+            else:
+                ready.append(session)
+
+        if not ready:
+            return results
+
+        pubfiles = [pubfile_name(session["primary_vol"],
+                                 session["secondary_vol"])
+                    for session in ready]
+        # Pub keys are same for all the sessions, add them
+        # once per session user
+        session_users = {}
+        for session, pubfile in zip(ready, pubfiles):
+            session_users.setdefault(session["session_user"], pubfile)
+
+        try:
+            unreachable = unreachable_nodes(
+                scan_secondary_nodes(ssh, secondary_host, probe_timeout))
+            if unreachable and warn is not None:
+                warn("{0}: Secondary nodes not reachable: {1}".format(
+                    secondary_host, ", ".join(unreachable)))
+        except SetupError as err:
+            if warn is not None:
+                warn("{0}: {1}".format(secondary_host, err.msg))
+
+        copy_pubfiles, add_users = pubfiles, list(session_users)
+        if not redistribute_keys:
+            copy_pubfiles, add_users = missing_pub_keys(
+                ssh, georep_dir, pubfiles, add_users)
+
+        if copy_pubfiles:
+            copy_to_main_secondary_node(ssh, secondary_user, secondary_host,
+                                        georep_dir, copy_pubfiles)
+            distribute_to_all_secondary_nodes(ssh, copy_pubfiles)
+
+        for user in add_users:
+            add_to_authorized_keys(ssh, session_users[user], user)
+    except Exception as err:
+        msg = err.msg if isinstance(err, SetupError) else \
+            "Unable to setup the sessions of {0}: {1}".format(
+                secondary_host, err)
+        done = [session for session, _ in results]
+        return results + [(session, msg) for session in sessions
+                          if not any(session is other for other in done)]
+    finally:
+        ssh.close()
+
+    for session in ready:
+        try:
+            create_georep_session(session["primary_vol"],
+                                  session["session_user"], secondary_host,
+                                  session["secondary_vol"], force)
+            results.append((session, None))
+        except SetupError as err:
+            results.append((session, err.msg))
+
+    return results
@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+Backends to get the size, used size and emptiness of a Volume
+without mounting it using FUSE.
+
+detail: Parses `gluster volume info` and `gluster volume status
+        detail` XML output. Size of the Volume is calculated from the
+        brick sizes and the Volume type. Emptiness is not known.
+gfapi:  Uses libgfapi-python(`gluster.gfapi`) to stat and list the
+        Volume root without FUSE mount.
+
+Backends raise SetupError if the details can't be collected, callers
+fall back to the FUSE mount in that case.
+"""
+
+import os
+import threading
+import xml.etree.ElementTree as ET
+
+from gluster_georep_tools.setup.errors import SetupError, \
+    EmptyCheckTimeoutError
+
+BACKENDS = ("detail", "gfapi", "mount")
+DEFAULT_EMPTY_CHECK_TIMEOUT = 60
+
+# Entries which are present even in an empty Volume
+IGNORED_ENTRIES = (".trashcan",)
+
+
+def int_text(element, path, default=0):
+    value = element.find(path)
+    if value is None or value.text is None:
+        return default
+
+    return int(value.text)
+
+
+def parse_volume_info(volinfo_xml):
+    """
+    Returns the list of bricks(HOST:PATH) and the Volume type
+    details from `gluster volume info VOLNAME --xml`
+    """
+    try:
+        volume = ET.fromstring(volinfo_xml).find("volInfo/volumes/volume")
+    except ET.ParseError as err:
+        raise SetupError("Unable to parse Volume info", str(err))
+
+    if volume is None:
+        raise SetupError("Volume info not available")
+
+    bricks = [brick.find("name").text
+              for brick in volume.findall("bricks/brick")]
+    return {
+        "bricks": bricks,
+        "replica": int_text(volume, "replicaCount", 1),
+        "arbiter": int_text(volume, "arbiterCount"),
+        "disperse": int_text(volume, "disperseCount"),
+        "redundancy": int_text(volume, "redundancyCount"),
+    }
+
+
+def parse_status_detail(status_xml):
+    """
+    Returns dict of HOST:PATH => (size total, size free) from
+    `gluster volume status VOLNAME detail --xml`
+    """
+    try:
+        volume = ET.fromstring(status_xml).find("volStatus/volumes/volume")
+    except ET.ParseError as err:
+        raise SetupError("Unable to parse Volume status detail", str(err))
+
+    if volume is None:
+        raise SetupError("Volume status detail not available")
+
+    bricks = {}
+    for node in volume.findall("node"):
+        # Offline bricks will not have the size details
+        if int_text(node, "status") != 1:
+            continue
+
+        name = "{0}:{1}".format(node.find("hostname").text,
+                                node.find("path").text)
+        bricks[name] = (int_text(node, "sizeTotal"),
+                        int_text(node, "sizeFree"))
+
+    return bricks
+
+
+def volume_size_from_bricks(volinfo, brick_sizes):
+    """
+    Usable size and used size of the Volume. In each subvolume,
+    smallest brick decides the size of replica sets and disperse
+    sets. Arbiter bricks do not store data, so they are excluded.
+    """
+    subvol_size = 1
+    data_factor = 1
+    if volinfo["disperse"] > 0:
+        subvol_size = volinfo["disperse"]
+        data_factor = volinfo["disperse"] - volinfo["redundancy"]
+    elif volinfo["replica"] > 1:
+        subvol_size = volinfo["replica"]
+
+    bricks = volinfo["bricks"]
+    total_size = 0
+    free_size = 0
+    for idx in range(0, len(bricks), subvol_size):
+        subvol = bricks[idx:idx + subvol_size]
+        if volinfo["arbiter"] > 0:
+            subvol = subvol[:-1]
+
+        missing = [brick for brick in subvol if brick not in brick_sizes]
+        if missing:
+            raise SetupError("Size details not available for bricks "
+                             "{0}".format(", ".join(missing)))
+
+        total_size += min(brick_sizes[brick][0]
+                          for brick in subvol) * data_factor
+        free_size += min(brick_sizes[brick][1]
+                         for brick in subvol) * data_factor
+
+    return total_size, total_size - free_size
+
+
+def detail_volume_size(run, volname):
+    """
+    Size and used size using volume info and status detail. run
+    executes the gluster command(list of args) locally or remotely
+    and returns the output. Emptiness is not known, returns None.
+    """
+    volinfo = parse_volume_info(
+        run(["gluster", "volume", "info", volname, "--xml"]))
+    brick_sizes = parse_status_detail(
+        run(["gluster", "volume", "status", volname, "detail", "--xml"]))
+    disk_size, used_size = volume_size_from_bricks(volinfo, brick_sizes)
+    return disk_size, used_size, None
+
+
+def gfapi_volume_size(hostname, volname, check_empty=False):
+    """
+    Size, used size and first few entries of the Volume root
+    using libgfapi. Raises SetupError if gfapi is not available.
+    """
+    try:
+        from gluster import gfapi
+    except ImportError:
+        raise SetupError("libgfapi-python is not installed")
+
+    vol = gfapi.Volume(hostname, volname)
+    try:
+        vol.mount()
+        data = vol.statvfs("/")
+        files = None
+        if check_empty:
+            files = [entry for entry in vol.listdir("/")
+                     if entry not in IGNORED_ENTRIES][:10]
+    except Exception as err:
+        raise SetupError("Unable to get Volume details using gfapi "
+                         "{0}:{1}".format(hostname, volname), str(err))
+    finally:
+        if vol.mounted:
+            vol.umount()
+
+    disk_size = data.f_blocks * data.f_bsize
+    used_size = (data.f_blocks - data.f_bavail) * data.f_bsize
+    return disk_size, used_size, files
+
+
+def probe_entries(path, timeout=DEFAULT_EMPTY_CHECK_TIMEOUT, sample_size=3):
+    """
+    Returns a sample of the entries present in the given directory,
+    empty list if the directory is empty. Directory is read as a
+    stream and reading stops once the sample is collected. Raises
+    EmptyCheckTimeoutError if the directory can't be read within
+    timeout seconds, for example, when the first readdir of a cold
+    FUSE mount stalls.
+    """
+    result = {}
+
+    def scan():
+        entries = []
+        try:
+            with os.scandir(path) as dir_entries:
+                for entry in dir_entries:
+                    if entry.name in IGNORED_ENTRIES:
+                        continue
+
+                    entries.append(entry.name)
+                    if len(entries) >= sample_size:
+                        break
+        except OSError as err:
+            result["error"] = err
+            return
+
+        result["entries"] = entries
+
+    # Daemon thread, a stalled readdir is abandoned after the timeout
+    thread = threading.Thread(target=scan, daemon=True)
+    thread.start()
+    thread.join(timeout)
+
+    if thread.is_alive():
+        raise EmptyCheckTimeoutError(
+            "Timed out after {0}s checking if {1} is empty".format(
+                timeout, path))
+
+    if "error" in result:
+        raise SetupError("Unable to list the entries of {0}".format(path),
+                         str(result["error"]))
+
+    return result["entries"]
@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""
+Geo-replication status as a library. Returns the list of Sessions
+(see status.model) and raises StatusError on failure, nothing is
+printed. gluster-georep-status is a wrapper which displays them.
+
+    from gluster_georep_tools.status.api import status
+
+    for name, summary, rows in status("gvol1", with_status="Faulty"):
+        print(name, summary.faulty)
+"""
+
+from argparse import Namespace
+import time
+
+from gluster_georep_tools.status.cache import cached_status, DEFAULT_CACHE_DIR
+from gluster_georep_tools.status.filters import compile_filters
+from gluster_georep_tools.status.model import Session, parse_session
+from gluster_georep_tools.status.parallel import DEFAULT_SESSION_TIMEOUT, \
+    NO_SESSIONS_MSG
+from gluster_georep_tools.timings import phase
+
+# Keyword arguments of status() to filter the brick rows
+FILTERS = ("with_status", "with_crawl_status", "crawl_status_regex",
+           "primary_node", "secondary_node", "brick", "min_lag", "max_lag")
+
+# Collect the status using glustercli, or by parsing the gluster CLI
+# XML output as it is read(see status.xmlstream)
+BACKENDS = ("glustercli", "stream")
+
+
+class StatusError(Exception):
+    """
+    Failed to collect the Geo-replication status
+    """
+    def __init__(self, msg, err=""):
+        super().__init__(msg)
+        self.msg = msg
+        self.err = err
+
+
+class InvalidSecondaryError(StatusError):
+    """
+    Secondary is not in [USER@]HOST::VOLUME format
+    """
+
+
+class NoSessionsError(StatusError):
+    """
+    No Geo-replication sessions for the given Primary Volume
+    or Secondary
+    """
+
+
+def parse_secondary(secondary):
+    """
+    Returns the tuple of session user, secondary host and secondary
+    volume from [USER@]HOST::VOLUME
+    """
+    if "::" not in secondary:
+        raise InvalidSecondaryError("Invalid Secondary details")
+
+    secondary_host_tmp, secondary_vol = secondary.split("::")
+    secondary_host_data = secondary_host_tmp.split("@")
+    secondary_user = "root"
+    if len(secondary_host_data) > 1:
+        secondary_user = secondary_host_data[0]
+
+    return secondary_user, secondary_host_data[-1], secondary_vol
+
+
+def apply_filters(status_data, args):
+    """
+    Convert the glustercli status to the list of Sessions. Summary
+    is counted while converting the rows, only the rows matching the
+    filters given in args are retained.
+    """
+    now = time.time()
+    row_filter = compile_filters(args, now)
+    sessions = []
+    for session in status_data:
+        # Collect the Session name and apply filter
+        # Session name will be present even though filters don't match
+        session_name = "{0} ==> {1}".format(
+            session[0]["primary_volume"],
+            session[0]["secondary"].replace("ssh://", ""))
+        sessions.append(parse_session(session_name, session, now,
+                                      row_filter))
+
+    return sessions
+
+
+def filter_sessions(status_data, args):
+    """
+    Apply the filters to the rows of already summarised sessions,
+    for example the sessions collected from the remote clusters.
+    Summary is retained as is.
+    """
+    row_filter = compile_filters(args)
+    if row_filter is None:
+        return status_data
+
+    return [Session(session.name, session.summary,
+                    [row for row in session.rows if row_filter(row)])
+            for session in status_data]
+
+
+def collect_status(volname=None, secondary_host=None, secondary_vol=None,
+                   secondary_user="root", parallel=None,
+                   session_timeout=DEFAULT_SESSION_TIMEOUT, cache_ttl=0,
+                   max_age=None, cache_dir=DEFAULT_CACHE_DIR, warn=None):
+    """
+    Collect the Geo-replication status as returned by glustercli,
+    list of rows of each session. Returns an empty list if there
+    are no sessions. Uses the shared status cache if enabled with
+    cache_ttl. Raises StatusError if the gluster command fails.
+    """
+    def fetch():
+        # glustercli is imported only when the status is collected,
+        # which keeps --help and cached status calls fast
+        from glustercli.cli import georep
+        from glustercli.cli.utils import GlusterCmdException
+
+        try:
+            # Collect all the sessions concurrently if requested
+            if parallel and volname is None:
+                from gluster_georep_tools.status.parallel import \
+                    parallel_status
+
+                return parallel_status(workers=parallel,
+                                       timeout=session_timeout, warn=warn)
+
+            return georep.status(primary_volume=volname,
+                                 secondary_host=secondary_host,
+                                 secondary_volume=secondary_vol,
+                                 secondary_user=secondary_user)
+        except GlusterCmdException as err:
+            if NO_SESSIONS_MSG.lower() in str(err).lower():
+                return []
+            raise StatusError("Failed to get Geo-replication status",
+                              str(err))
+
+    if not cache_ttl:
+        return fetch()
+
+    return cached_status(
+        fetch,
+        (volname, secondary_host, secondary_vol, secondary_user),
+        cache_ttl if max_age is None else max_age,
+        cache_dir=cache_dir
+    )
+
+
+def stream_status(volname=None, secondary_host=None, secondary_vol=None,
+                  secondary_user="root", args=None):
+    """
+    List of Sessions parsed from the gluster CLI output as it is
+    read, only the rows matching the filters given in args are
+    retained. Raises StatusError if the gluster command fails.
+    """
+    # status.xmlstream uses StatusError of this module
+    from gluster_georep_tools.status import xmlstream
+
+    now = time.time()
+    return xmlstream.stream_status(volname, secondary_host, secondary_vol,
+                                   secondary_user,
+                                   row_filter=compile_filters(args, now),
+                                   now=now)
+
+
+def status(primary_vol=None, secondary=None, parallel=None,
+           session_timeout=DEFAULT_SESSION_TIMEOUT, cache_ttl=0,
+           max_age=None, cache_dir=DEFAULT_CACHE_DIR, warn=None,
+           backend="glustercli", **filters):
+    """
+    Geo-replication status of the sessions, optionally of the given
+    Primary Volume and [USER@]HOST::VOLUME Secondary. Filters are the
+    names in FILTERS, same as the gluster-georep-status options.
+    Returns the list of Sessions, summary is of all the rows of the
+    session even if filtered. Raises NoSessionsError if
+    no sessions match the given Primary Volume or Secondary.
+    With the "stream" backend the filters are applied while parsing,
+    parallel and cache_ttl are not supported.
+    """
+    unknown = set(filters) - set(FILTERS)
+    if unknown:
+        raise TypeError("Unknown filters: {0}".format(
+            ", ".join(sorted(unknown))))
+
+    if backend not in BACKENDS:
+        raise ValueError("Unknown backend: {0}".format(backend))
+
+    if backend == "stream" and (parallel or cache_ttl):
+        raise ValueError("parallel and cache_ttl are not supported "
+                         "with the stream backend")
+
+    secondary_user, secondary_host, secondary_vol = "root", None, None
+    if secondary is not None:
+        secondary_user, secondary_host, secondary_vol = \
+            parse_secondary(secondary)
+
+    with phase("georep.status"):
+        if backend == "stream":
+            status_data = stream_status(primary_vol, secondary_host,
+                                        secondary_vol, secondary_user,
+                                        Namespace(**filters))
+        else:
+            status_data = collect_status(primary_vol, secondary_host,
+                                         secondary_vol, secondary_user,
+                                         parallel=parallel,
+                                         session_timeout=session_timeout,
+                                         cache_ttl=cache_ttl,
+                                         max_age=max_age,
+                                         cache_dir=cache_dir, warn=warn)
+
+    if not status_data:
+        if secondary is not None:
+            raise NoSessionsError("No active Geo-replication sessions "
+                                  "between {0} and {1}".format(primary_vol,
+                                                               secondary))
+        if primary_vol is not None:
+            raise NoSessionsError("No active Geo-replication sessions "
+                                  "for {0}".format(primary_vol))
+        raise NoSessionsError("No active Geo-replication sessions")
+
+    if backend == "stream":
+        return status_data
+
+    with phase("apply_filters"):
+        return apply_filters(status_data, Namespace(**filters))
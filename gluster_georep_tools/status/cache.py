@@ -0,0 +1,98 @@
+"""
+Shared on-disk cache of Geo-replication status. Concurrent callers
+asking for the same sessions reuse one gluster query: the first one
+refreshes the cache holding a file lock while others wait on the lock
+and read the refreshed result.
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import time
+
+DEFAULT_CACHE_DIR = "/var/cache/gluster-georep-tools"
+
+
+def cache_file_path(cache_dir, key):
+    """
+    Cache file name for the given key. Key is the tuple of
+    primary volume, secondary host, secondary volume and user.
+    """
+    digest = hashlib.sha1(
+        json.dumps(list(key)).encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir, "status-{0}.json".format(digest))
+
+
+def read_cache(path, max_age):
+    """
+    Returns the cached status if it is not older than max_age
+    seconds, else None.
+    """
+    try:
+        with open(path) as cache_file:
+            data = json.load(cache_file)
+    except (OSError, ValueError):
+        return None
+
+    if time.time() - data.get("time", 0) > max_age:
+        return None
+
+    return data.get("status")
+
+
+def write_cache(path, status_data):
+    """
+    Atomically replace the cache file so that readers never see
+    a partially written file.
+    """
+    tmp_path = "{0}.{1}.tmp".format(path, os.getpid())
+    try:
+        with open(tmp_path, "w") as tmp_file:
+            json.dump({"time": time.time(), "status": status_data},
+                      tmp_file)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def cached_status(fetch, key, max_age, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Returns the cached status if it is fresh enough, otherwise calls
+    fetch() to refresh the cache. Only one process refreshes the
+    cache at a time, others wait and read the refreshed result.
+    Falls back to calling fetch() directly if the cache directory
+    is not usable.
+    """
+    path = cache_file_path(cache_dir, key)
+
+    if max_age > 0:
+        status_data = read_cache(path, max_age)
+        if status_data is not None:
+            return status_data
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        lock_file = open(path + ".lock", "a")
+    except OSError:
+        return fetch()
+
+    with lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+        # Some other process may have refreshed the cache while
+        # this process was waiting for the lock
+        if max_age > 0:
+            status_data = read_cache(path, max_age)
+            if status_data is not None:
+                return status_data
+
+        status_data = fetch()
+        try:
+            write_cache(path, status_data)
+        except OSError:
+            pass
+
+    return status_data
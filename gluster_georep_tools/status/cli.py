@@ -4,129 +4,386 @@ Gluster Geo-replication Status
 """
 
 from argparse import ArgumentParser, RawDescriptionHelpFormatter
+import json
+import shutil
 import sys
+import time
 
-from glustercli.cli import georep
-from prettytable import PrettyTable
+from gluster_georep_tools.status.api import apply_filters, \
+    filter_sessions, collect_status, parse_secondary, status, \
+    stream_status, BACKENDS, FILTERS, StatusError
+from gluster_georep_tools.status.cache import DEFAULT_CACHE_DIR
+from gluster_georep_tools.status.history import HistoryStore, \
+    record_history, sync_estimate, brick_lag, DEFAULT_HISTORY_DB, \
+    DEFAULT_HISTORY_SIZE, DEFAULT_HISTORY_WINDOW
+from gluster_georep_tools.status.model import SUMMARY_KEYS
+from gluster_georep_tools.status.parallel import DEFAULT_SESSION_TIMEOUT
+from gluster_georep_tools.timings import phase, add_timings_args, \
+    enable_timings, TIMINGS
 
 
-def apply_filters(status_data, args):
-    session_rows = []
-    for session in status_data:
-        # Collect the Session name and apply filter
-        # Session name will be present even though filters don't match
-        session_name = "{0} ==> {1}".format(
-            session[0]["primary_volume"],
-            session[0]["secondary"].replace("ssh://", ""))
-        session_rows.append([session_name, {}, []])
-
-        summary = {
-            "active": 0,
-            "passive": 0,
-            "created": 0,
-            "stopped": 0,
-            "offline": 0,
-            "initializing": 0,
-            "faulty": 0,
-            "total": len(session)
-        }
-
-        # Apply all filters, do not add if filter not satisfied
-        for row in session:
-            summary[row["status"].replace("...", "").lower()] += 1
-
-            # --with-status filter
-            if args.with_status is not None and \
-               args.with_status.lower() not in row["status"].lower():
-                continue
-
-            # --with-crawl-status filter
-            if args.with_crawl_status is not None and \
-               args.with_crawl_status.lower() not in \
-               row["crawl_status"].lower():
-                continue
-
-            # Add to final output
-            session_rows[-1][2].append(row)
-
-        session_rows[-1][1] = summary.copy()
-
-    return session_rows
+# Rendered lines of each session, reused across watch ticks when
+# the rows and the summary of that session are unchanged.
+_rendered_sessions = {}
+
+
+def session_render_key(session):
+    """
+    Key which changes only when the displayed content of the
+    session changes.
+    """
+    rows = tuple(
+        (row.primary_node, row.primary_brick, row.status,
+         row.crawl_status, row.secondary_node, row.last_synced)
+        for row in session.rows
+    )
+    # Lag changes every second but it is not displayed
+    summary = tuple(getattr(session.summary, key)
+                    for key in SUMMARY_KEYS + ("total",))
+    return (rows, summary)
+
+
+def render_session(session):
+    """
+    Lines to display for a session. Table is rebuilt only if
+    the session content changed since the previous render.
+    """
+    key = session_render_key(session)
+    cached = _rendered_sessions.get(session.name)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    # Imported here to keep the startup fast for JSON outputs
+    from prettytable import PrettyTable
+
+    # Display heading and initiate table
+    lines = ["SESSION: " + session.name]
+    table = PrettyTable([
+        "PRIMARY", "STATUS",
+        "CRAWL STATUS", "SECONDARY NODE", "LAST SYNCED"
+    ])
+    for row in session.rows:
+        table.add_row([
+            row.primary_node + ":" + row.primary_brick,
+            row.status.value, row.crawl_status.value,
+            row.secondary_node, row.last_synced
+        ])
+
+    # If Table has data
+    if session.rows:
+        lines += table.get_string().splitlines()
+    else:
+        # When no filters match
+        lines.append("-")
+
+    lines.append("Active: {active} | Passive: {passive} | "
+                 "Faulty: {faulty} | Created: {created} | "
+                 "Offline: {offline} | Stopped: {stopped} | "
+                 "Initializing: {initializing} | Paused: {paused} | "
+                 "Total: {total}".format(**session.summary.as_dict()))
+
+    # Empty line in output
+    lines.append("")
+
+    _rendered_sessions[session.name] = (key, lines)
+    return lines
 
 
 def display_status(status_data):
     for session in status_data:
-        # Display heading and initiate table
-        print("SESSION: " + session[0])
-        table = PrettyTable([
-            "PRIMARY", "STATUS",
-            "CRAWL STATUS", "SECONDARY NODE", "LAST SYNCED"
+        print("\n".join(render_session(session)))
+
+
+def format_duration(seconds):
+    """
+    Show the duration as 1d2h, 2h3m, 4m5s or 6s
+    """
+    if seconds is None:
+        return "N/A"
+
+    seconds = int(seconds)
+    for unit1, size1, unit2, size2 in (("d", 86400, "h", 3600),
+                                        ("h", 3600, "m", 60),
+                                        ("m", 60, "s", 1)):
+        if seconds >= size1:
+            return "{0}{1}{2}{3}".format(seconds // size1, unit1,
+                                         (seconds % size1) // size2, unit2)
+
+    return "{0}s".format(seconds)
+
+
+def display_history(status_data, store, window, worst_count=5):
+    """
+    Sync rate and ETA to catch up for each session based on the
+    lag history, and the bricks with the highest lag.
+    """
+    from prettytable import PrettyTable
+
+    now = time.time()
+    table = PrettyTable(["SESSION", "LAG", "SYNC RATE", "ETA", "SAMPLES"])
+    bricks = []
+    for session in status_data:
+        samples = store.samples(session.name, since=now - window)
+        sync_rate, eta = sync_estimate(samples)
+        if session.summary.lag == 0:
+            eta = 0
+
+        table.add_row([
+            session.name,
+            format_duration(session.summary.lag),
+            "N/A" if sync_rate is None else "{0:.2f}x".format(sync_rate),
+            format_duration(eta),
+            len(samples)
         ])
-        for row in session[2]:
-            table.add_row([
-                row["primary_node"] + ":" + row["primary_brick"],
-                row["status"], row["crawl_status"],
-                row["secondary_node"], row["last_synced"]
-            ])
-
-        # If Table has data
-        if session[2]:
-            print(table)
-        else:
-            # When no filters match
-            print("-")
-
-        print("Active: {active} | Passive: {passive} | "
-               "Faulty: {faulty} | Created: {created} | "
-               "Offline: {offline} | Stopped: {stopped} | "
-               "Initializing: {initializing} | "
-               "Total: {total}".format(**session[1]))
-
-        # Empty line in output
-        print()
+
+        for row in session.rows:
+            lag = brick_lag(row, now)
+            if lag is not None:
+                bricks.append((lag, session.name, row))
+
+    print(table)
+    print()
+
+    print("Worst lag bricks")
+    table = PrettyTable(["SESSION", "PRIMARY", "STATUS", "LAG",
+                         "LAST SYNCED"])
+    bricks.sort(key=lambda brick: brick[0], reverse=True)
+    for lag, name, row in bricks[:worst_count]:
+        table.add_row([name,
+                       row.primary_node + ":" + row.primary_brick,
+                       row.status.value, format_duration(lag),
+                       row.last_synced])
+    print(table)
+
+
+def display_status_ndjson(status_data, out=None):
+    """
+    Stream one record per brick row and one summary record
+    per session, one JSON document per line.
+    """
+    out = sys.stdout if out is None else out
+    now = time.time()
+    for session in status_data:
+        for row in session.rows:
+            record = {"type": "row", "session": session.name}
+            record.update(row.as_record())
+            record["lag"] = brick_lag(row, now)
+            out.write(json.dumps(record) + "\n")
+
+        record = {"type": "summary", "session": session.name}
+        record.update(session.summary.as_dict())
+        out.write(json.dumps(record) + "\n")
+
+    out.flush()
+
+
+def display_status_json(status_data, out=None):
+    """
+    Stream the sessions as a JSON list. Rows are written one by one
+    instead of building the complete document in memory.
+    """
+    out = sys.stdout if out is None else out
+    now = time.time()
+    out.write("[")
+    for sidx, session in enumerate(status_data):
+        out.write(",\n" if sidx > 0 else "\n")
+        out.write('{{"session": {0}, "summary": {1}, "rows": ['.format(
+            json.dumps(session.name),
+            json.dumps(session.summary.as_dict())))
+        for ridx, row in enumerate(session.rows):
+            out.write(", " if ridx > 0 else "")
+            record = row.as_record()
+            record["lag"] = brick_lag(row, now)
+            out.write(json.dumps(record))
+        out.write("]}")
+
+    out.write("\n]\n")
+    out.flush()
+
+
+OUTPUT_FORMATS = {
+    "table": display_status,
+    "json": display_status_json,
+    "ndjson": display_status_ndjson,
+}
+
+
+def clip_frame(lines, columns, rows):
+    """
+    Clip the frame to the terminal size. Lines wider than the
+    terminal wrap and taller frames scroll, either way the rows
+    would no longer be at their absolute positions. Last line of
+    the terminal is left for the cursor.
+    """
+    lines = [line[:columns] for line in lines]
+    rows = max(rows, 3)
+    if len(lines) < rows:
+        return lines
+
+    hidden = len(lines) - rows + 2
+    return lines[:rows - 2] + [
+        "... {0} more lines, use filters or a larger terminal".format(
+            hidden)[:columns]]
+
+
+def draw_frame(prev_lines, lines):
+    """
+    Redraw only the lines which differ from the previous frame.
+    If output is not a terminal, full frame is printed only
+    when something changed. Returns the lines drawn, which are
+    clipped to the terminal size.
+    """
+    if not sys.stdout.isatty():
+        if prev_lines[1:] != lines[1:]:
+            print("\n".join(lines))
+            sys.stdout.flush()
+        return lines
+
+    columns, rows = shutil.get_terminal_size()
+    lines = clip_frame(lines, columns, rows)
+
+    out = []
+    if len(prev_lines) >= rows or \
+            any(len(line) > columns for line in prev_lines):
+        # Terminal is resized to smaller than the previous frame
+        prev_lines = []
+
+    if not prev_lines:
+        # Clear the screen before the first frame
+        out.append("\033[2J")
+
+    for idx, line in enumerate(lines):
+        if idx < len(prev_lines) and prev_lines[idx] == line:
+            continue
+        out.append("\033[{0};1H{1}\033[K".format(idx + 1, line))
+
+    # Previous frame was longer, clear the remaining lines
+    if len(prev_lines) > len(lines):
+        out.append("\033[{0};1H\033[J".format(len(lines) + 1))
+
+    out.append("\033[{0};1H".format(len(lines) + 1))
+    sys.stdout.write("".join(out))
+    sys.stdout.flush()
+    return lines
+
+
+def watch_status(args, collect):
+    """
+    Poll the status in the same process and redraw only the
+    changed rows and summaries on every interval. Failed polls
+    are shown in the frame and the polling continues.
+    """
+    prev_lines = []
+    while True:
+        error = None
+        try:
+            status_data = collect()
+        except StatusError as err:
+            status_data = []
+            error = "Failed to collect status: {0} {1}".format(
+                err.msg, err.err).strip()
+
+        # Machine readable outputs are emitted in full on every tick
+        if args.output != "table":
+            if error is not None:
+                sys.stderr.write(error + "\n")
+            else:
+                OUTPUT_FORMATS[args.output](status_data)
+            time.sleep(args.watch)
+            continue
+
+        lines = ["Every {0}s: gluster-georep-status{1:>30}".format(
+            args.watch, time.strftime("%Y-%m-%d %H:%M:%S")), ""]
+        if error is not None:
+            lines += error.splitlines()
+        elif not status_data:
+            lines.append("No active Geo-replication sessions")
+
+        for session in status_data:
+            lines += render_session(session)
+
+        prev_lines = draw_frame(prev_lines, lines)
+        time.sleep(args.watch)
 
 
 def handle_status(args):
     secondary_user = "root"
     secondary_host = None
     secondary_vol = None
-    volname = None
-
-    if args.primary_vol is not None:
-        volname = args.primary_vol
+    volname = args.primary_vol
 
     if args.secondary is not None:
-        if "::" not in args.secondary:
-            sys.stderr.write("Invalid Secondary details\n")
-            sys.exit(1)
-
-        secondary_host_tmp, secondary_vol = args.secondary.split("::")
-
-        secondary_host_data = secondary_host_tmp.split("@")
-        secondary_host = secondary_host_data[-1]
-        if len(secondary_host_data) > 1:
-            secondary_user = secondary_host_data[0]
-
-    status_data = georep.status(primary_volume=volname,
-                                secondary_host=secondary_host,
-                                secondary_volume=secondary_vol,
-                                secondary_user=secondary_user)
-
-    if not status_data:
-        if args.secondary is not None:
-            sys.stderr.write("No active Geo-replication "
-                             "sessions between {0} and {1}\n".format(
-                                 args.primary_vol,
-                                 args.secondary))
-            sys.exit(1)
-        elif args.primary_vol is not None and args.secondary is None:
-            sys.stderr.write("No active Geo-replication "
-                             "sessions for {0}\n".format(
-                                 args.primary_vol))
-            sys.exit(1)
-
-    status_data = apply_filters(status_data, args)
-    display_status(status_data)
+        secondary_user, secondary_host, secondary_vol = \
+            parse_secondary(args.secondary)
+
+    pool = None
+    if args.inventory is not None:
+        # Imported only when required, paramiko is not
+        # required for the local status
+        from gluster_georep_tools.status.fleet import SSHPool, \
+            parse_inventory
+
+        pool = SSHPool(parse_inventory(args.inventory),
+                       connect_timeout=args.connect_timeout,
+                       accept_new_host_keys=args.accept_new_host_keys)
+        remote_args = [arg for arg in (args.primary_vol, args.secondary)
+                       if arg is not None]
+
+    def warn(msg):
+        sys.stderr.write(msg + "\n")
+
+    def collect():
+        if pool is not None:
+            with phase("remote status"):
+                status_data = pool.status(remote_args, warn=warn)
+
+            with phase("apply_filters"):
+                return filter_sessions(status_data, args)
+
+        if args.backend == "stream":
+            # Filters are applied while parsing
+            with phase("georep.status"):
+                return stream_status(volname, secondary_host,
+                                     secondary_vol, secondary_user, args)
+
+        with phase("georep.status"):
+            status_data = collect_status(
+                volname, secondary_host, secondary_vol, secondary_user,
+                parallel=args.parallel, session_timeout=args.session_timeout,
+                cache_ttl=args.cache_ttl, max_age=args.max_age,
+                cache_dir=args.cache_dir, warn=warn)
+
+        with phase("apply_filters"):
+            return apply_filters(status_data, args)
+
+    if args.watch is not None:
+        watch_status(args, collect)
+        return
+
+    if pool is not None:
+        status_data = collect()
+        pool.close()
+    else:
+        status_data = status(
+            args.primary_vol, args.secondary, parallel=args.parallel,
+            session_timeout=args.session_timeout, cache_ttl=args.cache_ttl,
+            max_age=args.max_age, cache_dir=args.cache_dir, warn=warn,
+            backend=args.backend,
+            **{name: getattr(args, name) for name in FILTERS})
+
+    if args.record_history or args.history:
+        store = HistoryStore(args.history_db, args.history_size)
+        record_history(store, status_data, time.time())
+        if args.history:
+            with phase("display_history"):
+                display_history(status_data, store, args.history_window)
+            store.close()
+            return
+
+        store.close()
+
+    with phase("display_status"):
+        OUTPUT_FORMATS[args.output](status_data)
 
 
 def get_args():
@@ -137,15 +394,112 @@ def get_args():
                         "<secondary_host>::<secondary_vol>, "
                         "Example: secondary_node1::myvol")
     parser.add_argument("--with-status",
-                        help="Show only nodes with matching Status")
+                        help="Show only nodes with matching Status. "
+                        "Comma separated list to match any of them")
     parser.add_argument("--with-crawl-status",
-                        help="Show only nodes with matching Crawl Status")
-    return parser.parse_args()
+                        help="Show only nodes with matching Crawl Status. "
+                        "Comma separated list to match any of them")
+    parser.add_argument("--crawl-status-regex", metavar="REGEX",
+                        help="Show only nodes whose Crawl Status matches "
+                        "the regular expression")
+    parser.add_argument("--primary-node",
+                        help="Show only the given Primary nodes "
+                        "(Comma separated)")
+    parser.add_argument("--secondary-node",
+                        help="Show only the given Secondary nodes "
+                        "(Comma separated)")
+    parser.add_argument("--brick", metavar="GLOB",
+                        help="Show only the bricks whose path matches "
+                        "the glob pattern. Example: /bricks/b*")
+    parser.add_argument("--min-lag", type=float, metavar="SECONDS",
+                        help="Show only the bricks lagging at least SECONDS")
+    parser.add_argument("--max-lag", type=float, metavar="SECONDS",
+                        help="Show only the bricks lagging at most SECONDS")
+    parser.add_argument("--output", choices=list(OUTPUT_FORMATS.keys()),
+                        default="table",
+                        help="Output format (Default: table)")
+    parser.add_argument("--watch", type=float, metavar="INTERVAL",
+                        help="Refresh the status every INTERVAL seconds, "
+                        "redrawing only the changed rows")
+    parser.add_argument("--parallel", type=int, metavar="WORKERS",
+                        help="Collect the status of all sessions "
+                        "concurrently using WORKERS threads")
+    parser.add_argument("--session-timeout", type=float,
+                        default=DEFAULT_SESSION_TIMEOUT, metavar="SECONDS",
+                        help="With --parallel, skip the sessions whose "
+                        "status is not collected within SECONDS "
+                        "(Default: {0})".format(DEFAULT_SESSION_TIMEOUT))
+    parser.add_argument("--backend", choices=BACKENDS, default="glustercli",
+                        help="Collect the status using glustercli, or "
+                        "stream by parsing the gluster XML output as it is "
+                        "read and dropping the rows not matching the filters "
+                        "(Default: glustercli)")
+    parser.add_argument("--inventory", metavar="FILE",
+                        help="Collect the status from all the Primary "
+                        "clusters listed in FILE over SSH, one "
+                        "[USER@]HOST [NAME] per line")
+    parser.add_argument("--connect-timeout", type=float, default=10,
+                        metavar="SECONDS",
+                        help="With --inventory, SSH connect timeout "
+                        "(Default: 10)")
+    parser.add_argument("--accept-new-host-keys", action="store_true",
+                        help="With --inventory, accept the host keys of "
+                        "the clusters not present in known_hosts. By "
+                        "default they are rejected")
+    parser.add_argument("--cache-ttl", type=float, default=0,
+                        metavar="SECONDS",
+                        help="Share the status collected by other callers "
+                        "if it is not older than SECONDS (Default: 0, "
+                        "cache disabled)")
+    parser.add_argument("--max-age", type=float, metavar="SECONDS",
+                        help="Maximum age of the cached status accepted "
+                        "by this call, use 0 to bypass the cache "
+                        "(Default: value of --cache-ttl)")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help="Directory to store the status cache "
+                        "(Default: {0})".format(DEFAULT_CACHE_DIR))
+    parser.add_argument("--record-history", action="store_true",
+                        help="Record the lag of each session in the "
+                        "history store")
+    parser.add_argument("--history", action="store_true",
+                        help="Record the lag and show the sync rate, ETA to "
+                        "catch up and the worst lag bricks based on the "
+                        "history")
+    parser.add_argument("--history-window", type=float,
+                        default=DEFAULT_HISTORY_WINDOW, metavar="SECONDS",
+                        help="With --history, use the samples of last "
+                        "SECONDS (Default: {0})".format(
+                            DEFAULT_HISTORY_WINDOW))
+    parser.add_argument("--history-db", default=DEFAULT_HISTORY_DB,
+                        help="History store path "
+                        "(Default: {0})".format(DEFAULT_HISTORY_DB))
+    parser.add_argument("--history-size", type=int,
+                        default=DEFAULT_HISTORY_SIZE, metavar="SAMPLES",
+                        help="Maximum number of samples in the history "
+                        "store (Default: {0})".format(DEFAULT_HISTORY_SIZE))
+    add_timings_args(parser)
+    args = parser.parse_args()
+    if args.backend == "stream" and (args.parallel or args.cache_ttl):
+        parser.error("--parallel and --cache-ttl are not supported "
+                     "with --backend stream")
+
+    return args
 
 
 def main():
     args = get_args()
-    handle_status(args)
+    enable_timings(args)
+    try:
+        handle_status(args)
+    except StatusError as err:
+        sys.stderr.write(err.msg + "\n")
+        if err.err:
+            sys.stderr.write(err.err + "\n")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        sys.exit(1)
+    finally:
+        TIMINGS.report(args)
 
 
 if __name__ == "__main__":
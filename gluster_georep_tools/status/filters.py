@@ -0,0 +1,144 @@
+"""
+Filters for the Geo-replication status rows. All the filters are
+compiled once from the CLI arguments into a single predicate which
+is then applied to each BrickStatus row.
+"""
+
+import fnmatch
+import re
+import time
+
+from gluster_georep_tools.status.history import brick_lag
+from gluster_georep_tools.status.model import Status, CrawlStatus, \
+    UnknownValue
+
+
+def split_values(value):
+    """
+    Lower case values from a comma separated filter argument
+    """
+    return tuple(val.strip().lower() for val in value.split(",")
+                 if val.strip())
+
+
+def enum_filter(field, members, match):
+    """
+    Matches if the field is one of the given enum members. Values
+    unknown to the enums are matched using match(text).
+    """
+    members = frozenset(members)
+
+    def predicate(row):
+        value = getattr(row, field)
+        if isinstance(value, UnknownValue):
+            return match(value)
+        return value in members
+
+    return predicate
+
+
+def substring_filter(field, enum_cls, value):
+    """
+    Matches if any of the comma separated values is present
+    in the field(case insensitive). Values are matched with the
+    enum members once instead of with every row.
+    """
+    values = split_values(value)
+
+    def match(text):
+        return any(val in text.lower() for val in values)
+
+    return enum_filter(field, [member for member in enum_cls
+                               if match(member.value)], match)
+
+
+def exact_filter(field, value):
+    """
+    Matches if the field is one of the comma separated
+    values(case insensitive)
+    """
+    values = frozenset(split_values(value))
+    return lambda row: getattr(row, field).lower() in values
+
+
+def regex_filter(field, enum_cls, pattern):
+    regex = re.compile(pattern, re.IGNORECASE)
+
+    def match(text):
+        return regex.search(text) is not None
+
+    return enum_filter(field, [member for member in enum_cls
+                               if match(member.value)], match)
+
+
+def glob_filter(field, pattern):
+    regex = re.compile(fnmatch.translate(pattern))
+    return lambda row: regex.match(getattr(row, field)) is not None
+
+
+def lag_filter(min_lag, max_lag, now):
+    """
+    Matches the bricks whose lag is within the given limits.
+    Bricks which never synced do not match.
+    """
+    def predicate(row):
+        lag = brick_lag(row, now)
+        if lag is None:
+            return False
+        if min_lag is not None and lag < min_lag:
+            return False
+        if max_lag is not None and lag > max_lag:
+            return False
+        return True
+
+    return predicate
+
+
+def compile_filters(args, now=None):
+    """
+    Compile the filters given in the arguments into a single predicate.
+    Returns None if no filters are given.
+    """
+    now = time.time() if now is None else now
+    predicates = []
+
+    if getattr(args, "with_status", None) is not None:
+        predicates.append(substring_filter("status", Status,
+                                           args.with_status))
+
+    if getattr(args, "with_crawl_status", None) is not None:
+        predicates.append(substring_filter("crawl_status", CrawlStatus,
+                                           args.with_crawl_status))
+
+    if getattr(args, "crawl_status_regex", None) is not None:
+        predicates.append(regex_filter("crawl_status", CrawlStatus,
+                                       args.crawl_status_regex))
+
+    if getattr(args, "primary_node", None) is not None:
+        predicates.append(exact_filter("primary_node", args.primary_node))
+
+    if getattr(args, "secondary_node", None) is not None:
+        predicates.append(exact_filter("secondary_node",
+                                       args.secondary_node))
+
+    if getattr(args, "brick", None) is not None:
+        predicates.append(glob_filter("primary_brick", args.brick))
+
+    min_lag = getattr(args, "min_lag", None)
+    max_lag = getattr(args, "max_lag", None)
+    if min_lag is not None or max_lag is not None:
+        predicates.append(lag_filter(min_lag, max_lag, now))
+
+    if not predicates:
+        return None
+
+    if len(predicates) == 1:
+        return predicates[0]
+
+    def match_all(row):
+        for predicate in predicates:
+            if not predicate(row):
+                return False
+        return True
+
+    return match_all
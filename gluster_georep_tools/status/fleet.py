@@ -0,0 +1,194 @@
+"""
+Geo-replication status of many Primary clusters. Each cluster is
+queried over SSH by running gluster-georep-status remotely, the SSH
+connections are kept in a pool and reused across refreshes. All the
+clusters are queried concurrently and the results are merged into
+one report.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import shlex
+import threading
+import time
+
+import paramiko
+
+from gluster_georep_tools.status.model import BrickStatus, Session, \
+    SessionSummary
+
+DEFAULT_CONNECT_TIMEOUT = 10
+DEFAULT_REMOTE_COMMAND = "gluster-georep-status"
+SYSTEM_KNOWN_HOSTS = "/etc/ssh/ssh_known_hosts"
+
+
+class Cluster:
+    """
+    Primary cluster from the inventory
+    """
+    def __init__(self, host, user="root", name=None):
+        self.host = host
+        self.user = user
+        self.name = host if name is None else name
+
+
+def parse_inventory(path):
+    """
+    Inventory file has one cluster per line as
+        [USER@]HOST [NAME]
+    Empty lines and lines starting with # are ignored.
+    """
+    clusters = []
+    with open(path) as inventory:
+        for line in inventory:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+
+            parts = line.split()
+            user_host = parts[0].split("@")
+            user = "root" if len(user_host) == 1 else user_host[0]
+            name = parts[1] if len(parts) > 1 else None
+            clusters.append(Cluster(user_host[-1], user, name))
+
+    return clusters
+
+
+def parse_ndjson_status(output, prefix, now=None):
+    """
+    Convert the NDJSON output of gluster-georep-status to the
+    list of Sessions. last_synced is in the local time of the remote
+    cluster, which may be in another timezone, so the lag of each
+    brick is taken from the lag computed by the remote cluster.
+    """
+    now = time.time() if now is None else now
+    sessions = {}
+    status_data = []
+    for line in output.splitlines():
+        if not line.strip():
+            continue
+
+        record = json.loads(line)
+        name = "{0}: {1}".format(prefix, record.pop("session"))
+        if name not in sessions:
+            sessions[name] = Session(name, SessionSummary(), [])
+            status_data.append(sessions[name])
+
+        if record.pop("type") == "summary":
+            sessions[name].summary = SessionSummary(**record)
+        else:
+            # Older versions don't send the lag, fall back to
+            # the last_synced in that case
+            has_lag = "lag" in record
+            lag = record.pop("lag", None)
+            brick = BrickStatus.from_row(record)
+            if has_lag:
+                brick.synced_at = None if lag is None else now - lag
+            sessions[name].rows.append(brick)
+
+    return status_data
+
+
+class SSHPool:
+    """
+    Persistent SSH connections to the Primary clusters, reused
+    across the refreshes. Uses the SSH keys of the current user.
+    Host keys are verified with the system and the user known_hosts,
+    hosts not listed there are rejected unless accept_new_host_keys
+    is set.
+    """
+    def __init__(self, clusters, workers=None,
+                 connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 remote_command=DEFAULT_REMOTE_COMMAND,
+                 accept_new_host_keys=False):
+        self.clusters = clusters
+        self.connect_timeout = connect_timeout
+        self.remote_command = remote_command
+        self.accept_new_host_keys = accept_new_host_keys
+        self.clients = {}
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers or max(1, len(clusters)))
+
+    def client(self, cluster):
+        """
+        Connected SSH client of the cluster, reconnects if the
+        previous connection is closed.
+        """
+        with self.lock:
+            ssh = self.clients.get(cluster.name)
+
+        transport = ssh.get_transport() if ssh is not None else None
+        if transport is not None and transport.is_active():
+            return ssh
+
+        ssh = paramiko.SSHClient()
+        if os.path.exists(SYSTEM_KNOWN_HOSTS):
+            ssh.load_system_host_keys(SYSTEM_KNOWN_HOSTS)
+        # User's ~/.ssh/known_hosts
+        ssh.load_system_host_keys()
+        # Changed keys of the known hosts are always rejected
+        ssh.set_missing_host_key_policy(
+            paramiko.AutoAddPolicy() if self.accept_new_host_keys
+            else paramiko.RejectPolicy())
+        ssh.connect(cluster.host, username=cluster.user,
+                    timeout=self.connect_timeout,
+                    banner_timeout=self.connect_timeout)
+        # Keep the idle connection alive between refreshes
+        ssh.get_transport().set_keepalive(30)
+        with self.lock:
+            self.clients[cluster.name] = ssh
+
+        return ssh
+
+    def cluster_status(self, cluster, remote_args):
+        ssh = self.client(cluster)
+        sudo_pfx = "sudo " if cluster.user != "root" else ""
+        cmd = sudo_pfx + " ".join(
+            [self.remote_command, "--output", "ndjson"] +
+            [shlex.quote(arg) for arg in remote_args])
+        _, stdout, stderr = ssh.exec_command(cmd)
+        out = stdout.read().decode("utf-8")
+        rc = stdout.channel.recv_exit_status()
+        if rc != 0:
+            raise RuntimeError(stderr.read().decode("utf-8").strip()
+                               or "exit status {0}".format(rc))
+
+        return parse_ndjson_status(out, cluster.name)
+
+    def status(self, remote_args, warn=None):
+        """
+        Query all the clusters concurrently and merge the sessions
+        in the inventory order. Failed clusters are reported using
+        the warn callback and excluded.
+        """
+        futures = [
+            (cluster, self.executor.submit(self.cluster_status,
+                                           cluster, remote_args))
+            for cluster in self.clusters
+        ]
+
+        status_data = []
+        for cluster, future in futures:
+            try:
+                status_data += future.result()
+            except Exception as err:
+                # Drop the connection, reconnect in the next refresh
+                with self.lock:
+                    ssh = self.clients.pop(cluster.name, None)
+                if ssh is not None:
+                    ssh.close()
+
+                if warn is not None:
+                    warn("Unable to collect status from {0}: {1}".format(
+                        cluster.name, err))
+
+        return status_data
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        with self.lock:
+            for ssh in self.clients.values():
+                ssh.close()
+            self.clients = {}
@@ -0,0 +1,156 @@
+"""
+Sync lag of Geo-replication sessions and its local history.
+
+Lag of a brick is the seconds elapsed since its last synced time,
+lag of a session is the lag of its worst brick. Session lag samples
+are stored in a fixed size ring buffer in a SQLite database, so the
+store stays bounded and appending a sample is cheap.
+"""
+
+import os
+import time
+
+DEFAULT_HISTORY_DB = "/var/lib/gluster-georep-tools/history.db"
+DEFAULT_HISTORY_SIZE = 10080  # One week of samples, if collected every min
+DEFAULT_HISTORY_WINDOW = 3600
+
+# Format of last synced time in the status output
+LAST_SYNCED_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def last_synced_timestamp(last_synced):
+    """
+    Convert the last synced time of a brick to the Unix timestamp.
+    Returns None if not available(N/A)
+    """
+    try:
+        return time.mktime(time.strptime(last_synced, LAST_SYNCED_FORMAT))
+    except (TypeError, ValueError):
+        return None
+
+
+def brick_lag(row, now):
+    """
+    Seconds since the last sync of the brick, None if
+    the brick never synced.
+    """
+    if row.synced_at is None:
+        return None
+
+    return max(0, int(now - row.synced_at))
+
+
+class HistoryStore:
+    """
+    Ring buffer of session lag samples in SQLite. Oldest samples
+    are overwritten once the store is full.
+    """
+    def __init__(self, path=DEFAULT_HISTORY_DB, size=DEFAULT_HISTORY_SIZE):
+        # Imported only when the history is used
+        import sqlite3
+
+        self.size = size
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript("""
+        CREATE TABLE IF NOT EXISTS samples (
+            slot INTEGER PRIMARY KEY,
+            time REAL NOT NULL,
+            session TEXT NOT NULL,
+            lag INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS samples_session_time
+            ON samples (session, time);
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+        """)
+        self.resize()
+
+    def resize(self):
+        """
+        Slots of a store created with a different size don't form
+        a ring of the new size. Keep only the latest samples which
+        fit, renumbered from the first slot in time order, and
+        point next_slot after them.
+        """
+        with self.conn:
+            row = self.conn.execute(
+                "SELECT value FROM meta WHERE key = 'size'").fetchone()
+            if row is not None and row[0] == self.size:
+                return
+
+            latest = self.conn.execute(
+                "SELECT time, session, lag FROM samples "
+                "ORDER BY time DESC, slot DESC LIMIT ?",
+                (self.size,)).fetchall()
+            self.conn.execute("DELETE FROM samples")
+            self.conn.executemany(
+                "INSERT INTO samples (slot, time, session, lag) "
+                "VALUES (?, ?, ?, ?)",
+                [(slot,) + tuple(sample)
+                 for slot, sample in enumerate(reversed(latest))])
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                [("next_slot", len(latest) % self.size),
+                 ("size", self.size)])
+
+    def append(self, samples):
+        """
+        Append the list of (time, session, lag) samples
+        """
+        with self.conn:
+            row = self.conn.execute(
+                "SELECT value FROM meta WHERE key = 'next_slot'").fetchone()
+            next_slot = 0 if row is None else row[0]
+            for sample in samples:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO samples "
+                    "(slot, time, session, lag) VALUES (?, ?, ?, ?)",
+                    (next_slot % self.size,) + tuple(sample))
+                next_slot = (next_slot + 1) % self.size
+
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) "
+                "VALUES ('next_slot', ?)", (next_slot,))
+
+    def samples(self, session, since=0):
+        """
+        List of (time, lag) samples of the session ordered by time
+        """
+        return self.conn.execute(
+            "SELECT time, lag FROM samples WHERE session = ? AND time >= ? "
+            "AND lag IS NOT NULL ORDER BY time",
+            (session, since)).fetchall()
+
+    def close(self):
+        self.conn.close()
+
+
+def record_history(store, status_data, now):
+    """
+    Append the current lag of every session to the store
+    """
+    store.append([(now, session.name, session.summary.lag)
+                  for session in status_data])
+
+
+def sync_estimate(samples):
+    """
+    Returns (sync rate, ETA in seconds) from the lag samples.
+    Sync rate is the seconds of changes synced per second, more
+    than 1 means the session is catching up. ETA is None if the
+    session is not catching up.
+    """
+    if len(samples) < 2 or samples[-1][0] <= samples[0][0]:
+        return None, None
+
+    elapsed = samples[-1][0] - samples[0][0]
+    lag_change = samples[-1][1] - samples[0][1]
+    sync_rate = 1 - (lag_change / elapsed)
+    if lag_change >= 0:
+        return sync_rate, None
+
+    return sync_rate, samples[-1][1] / (-lag_change / elapsed)
@@ -0,0 +1,215 @@
+"""
+Compact model of the Geo-replication status.
+
+Rows returned by glustercli are dicts with eighteen fields, of which
+the outputs use six. Each row is converted to a BrickStatus which keeps
+only those fields in slots, Status and Crawl status are enum members
+and the node names are interned, so the rows of a large fleet share
+the strings. Summary of the session is counted while converting, the
+glustercli rows are not retained.
+"""
+
+from enum import Enum
+import sys
+
+from gluster_georep_tools.status.history import brick_lag, \
+    last_synced_timestamp
+
+
+class Status(Enum):
+    """
+    Status of the brick worker
+    """
+    ACTIVE = "Active"
+    PASSIVE = "Passive"
+    CREATED = "Created"
+    STOPPED = "Stopped"
+    OFFLINE = "Offline"
+    INITIALIZING = "Initializing..."
+    FAULTY = "Faulty"
+    PAUSED = "Paused"
+
+    @property
+    def key(self):
+        """
+        Name of the counter in the session summary
+        """
+        return self.name.lower()
+
+
+class CrawlStatus(Enum):
+    """
+    Crawl status of the brick worker
+    """
+    CHANGELOG = "Changelog Crawl"
+    HISTORY = "History Crawl"
+    HYBRID = "Hybrid Crawl"
+    NA = "N/A"
+
+
+# Counters of the session summary, one per Status
+SUMMARY_KEYS = tuple(status.key for status in Status)
+
+# Enum lookup by value is slow compared to a dict lookup, these
+# are used to convert every row. Initializing is also shown
+# without the dots.
+STATUS_BY_VALUE = dict({status.value: status for status in Status},
+                       Initializing=Status.INITIALIZING)
+CRAWL_STATUS_BY_VALUE = {crawl.value: crawl for crawl in CrawlStatus}
+
+
+class UnknownValue(str):
+    """
+    Status or Crawl status not known to this version, retained as
+    the text shown by gluster. Has value like the enum members so
+    that it is displayed as is. Counted only in the total of the
+    session summary.
+    """
+    __slots__ = ()
+
+    @property
+    def value(self):
+        return str(self)
+
+
+def from_value(members, value):
+    """
+    Enum member of the Status or Crawl status text using the given
+    *_BY_VALUE dict, UnknownValue if the text is not known.
+    """
+    member = members.get(value)
+    return UnknownValue(value) if member is None else member
+
+
+# Brick row fields included in JSON and NDJSON outputs
+ROW_FIELDS = ("primary_node", "primary_brick", "status",
+              "crawl_status", "secondary_node", "last_synced")
+
+
+class BrickStatus:
+    """
+    Status of a brick worker. synced_at is the Unix timestamp of
+    last_synced, None if the brick never synced.
+    """
+    __slots__ = ("primary_node", "primary_brick", "secondary_node",
+                 "status", "crawl_status", "last_synced", "synced_at")
+
+    def __init__(self, primary_node, primary_brick, secondary_node, status,
+                 crawl_status, last_synced):
+        self.primary_node = sys.intern(primary_node)
+        self.primary_brick = primary_brick
+        self.secondary_node = sys.intern(secondary_node)
+        self.status = status
+        self.crawl_status = crawl_status
+        self.last_synced = last_synced
+        self.synced_at = last_synced_timestamp(last_synced)
+
+    @classmethod
+    def from_row(cls, row):
+        """
+        From the glustercli status row, or a row record
+        of the JSON outputs.
+        """
+        return cls(row["primary_node"], row["primary_brick"],
+                   row["secondary_node"],
+                   from_value(STATUS_BY_VALUE, row["status"]),
+                   from_value(CRAWL_STATUS_BY_VALUE, row["crawl_status"]),
+                   row["last_synced"])
+
+    def as_record(self):
+        """
+        Fields of ROW_FIELDS as dict, Status and Crawl status
+        as text
+        """
+        return {
+            "primary_node": self.primary_node,
+            "primary_brick": self.primary_brick,
+            "status": self.status.value,
+            "crawl_status": self.crawl_status.value,
+            "secondary_node": self.secondary_node,
+            "last_synced": self.last_synced,
+        }
+
+
+class SessionSummary:
+    """
+    Number of workers of the session in each Status, total number
+    of workers and the lag of the worst brick
+    """
+    __slots__ = SUMMARY_KEYS + ("total", "lag")
+
+    def __init__(self, total=0, lag=None, **counters):
+        for key in SUMMARY_KEYS:
+            setattr(self, key, counters.pop(key, 0))
+
+        if counters:
+            raise TypeError("Unknown counters: {0}".format(
+                ", ".join(sorted(counters))))
+
+        self.total = total
+        self.lag = lag
+
+    def as_dict(self):
+        return {key: getattr(self, key) for key in self.__slots__}
+
+
+class Session:
+    """
+    Name, summary and the brick rows of a session. Unpacks as
+    name, summary, rows.
+    """
+    __slots__ = ("name", "summary", "rows")
+
+    def __init__(self, name, summary, rows):
+        self.name = name
+        self.summary = summary
+        self.rows = rows
+
+    def __iter__(self):
+        return iter((self.name, self.summary, self.rows))
+
+
+class SessionBuilder:
+    """
+    Counts the summary of a session as the rows are added, only the
+    rows matching row_filter are retained.
+    """
+    def __init__(self, now, row_filter=None):
+        self.now = now
+        self.row_filter = row_filter
+        self.counts = dict.fromkeys(Status, 0)
+        self.total = 0
+        self.lag = None
+        self.rows = []
+
+    def add(self, brick):
+        if brick.status in self.counts:
+            self.counts[brick.status] += 1
+        self.total += 1
+
+        # Session lag is the lag of the worst brick
+        worker_lag = brick_lag(brick, self.now)
+        if worker_lag is not None and (self.lag is None or
+                                       worker_lag > self.lag):
+            self.lag = worker_lag
+
+        if self.row_filter is None or self.row_filter(brick):
+            self.rows.append(brick)
+
+    def session(self, name):
+        summary = SessionSummary(total=self.total, lag=self.lag,
+                                 **{status.key: count
+                                    for status, count in self.counts.items()})
+        return Session(name, summary, self.rows)
+
+
+def parse_session(name, rows, now, row_filter=None):
+    """
+    Session from the glustercli rows of a session. Summary is of all
+    the rows, only the rows matching row_filter are retained.
+    """
+    builder = SessionBuilder(now, row_filter)
+    for row in rows:
+        builder.add(BrickStatus.from_row(row))
+
+    return builder.session(name)
@@ -0,0 +1,126 @@
+"""
+Collect Geo-replication status of all the sessions concurrently.
+Volumes are listed first and the status of each Primary Volume's
+sessions is collected in a bounded pool of worker threads, so that
+one slow or hung Secondary does not block the whole report.
+"""
+
+import queue
+import threading
+import time
+
+DEFAULT_WORKERS = 8
+DEFAULT_SESSION_TIMEOUT = 120
+
+# Error message from gluster CLI when a Volume has no sessions
+NO_SESSIONS_MSG = "No active geo-replication sessions"
+
+
+def run_bounded(items, func, workers, timeout):
+    """
+    Run func(item) for each item using at most `workers` threads.
+    Returns the tuple of results dict (item => (result, error)) and
+    the list of items which did not complete within `timeout`
+    seconds. Worker threads are daemon threads, a hung call is
+    abandoned and a new worker is started in its place.
+    """
+    tasks = queue.Queue()
+    for item in items:
+        tasks.put(item)
+
+    results = queue.Queue()
+    started = {}
+
+    def worker():
+        while True:
+            try:
+                item = tasks.get_nowait()
+            except queue.Empty:
+                return
+
+            started[item] = time.monotonic()
+            try:
+                results.put((item, func(item), None))
+            except Exception as err:
+                results.put((item, None, err))
+
+    def start_worker():
+        thread = threading.Thread(target=worker, daemon=True)
+        thread.start()
+
+    for _ in range(min(workers, len(items))):
+        start_worker()
+
+    done = {}
+    timed_out = []
+    while len(done) + len(timed_out) < len(items):
+        try:
+            item, result, err = results.get(timeout=0.1)
+            # Ignore the results which arrived after the timeout
+            if item not in timed_out:
+                done[item] = (result, err)
+        except queue.Empty:
+            pass
+
+        if timeout is None:
+            continue
+
+        now = time.monotonic()
+        for item, start_time in list(started.items()):
+            if item in done or item in timed_out:
+                continue
+
+            if now - start_time > timeout:
+                timed_out.append(item)
+                # Worker is stuck with this item, replace it
+                start_worker()
+
+    return done, timed_out
+
+
+def parallel_status(workers=DEFAULT_WORKERS,
+                    timeout=DEFAULT_SESSION_TIMEOUT,
+                    warn=None):
+    """
+    Status of all the Geo-replication sessions, collected per Primary
+    Volume concurrently. Returns the same structure as
+    glustercli.cli.georep.status(). Volumes which failed or timed out
+    are reported using the warn callback and excluded.
+    """
+    from glustercli.cli import volume
+    from glustercli.cli.parsers import parse_georep_status
+    from glustercli.cli.utils import georep_execute_xml, GlusterCmdException
+
+    # Volume info is collected only once and reused to
+    # merge the Offline status of all the Volumes
+    volinfo = volume.info()
+    volnames = [vol["name"] for vol in volinfo]
+
+    def volume_status(volname):
+        return parse_georep_status(
+            georep_execute_xml([volname, "status"]), volinfo)
+
+    done, timed_out = run_bounded(volnames, volume_status, workers, timeout)
+
+    status_data = []
+    for volname in volnames:
+        if volname not in done:
+            continue
+
+        sessions, err = done[volname]
+        if err is None:
+            status_data += sessions
+            continue
+
+        if isinstance(err, GlusterCmdException) and \
+           NO_SESSIONS_MSG.lower() in str(err).lower():
+            continue
+
+        if warn is not None:
+            warn("Unable to collect status of {0}: {1}".format(volname, err))
+
+    if warn is not None:
+        for volname in timed_out:
+            warn("Timed out collecting status of {0}".format(volname))
+
+    return status_data
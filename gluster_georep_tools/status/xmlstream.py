@@ -0,0 +1,202 @@
+"""
+Geo-replication status directly from the gluster CLI, without
+glustercli. Output of `gluster volume geo-replication status --xml`
+is parsed incrementally as it is read from the pipe. Each brick pair
+is converted to a BrickStatus, counted in the session summary and
+dropped immediately if it doesn't match the filters, so the peak
+memory doesn't grow with the number of bricks in the output.
+
+Bricks listed in the Volume info but missing from the status are
+added as Offline after the bricks of the session, same as glustercli.
+"""
+
+import subprocess
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+
+from gluster_georep_tools.status.api import StatusError
+from gluster_georep_tools.status.model import BrickStatus, CrawlStatus, \
+    SessionBuilder, Status, STATUS_BY_VALUE, CRAWL_STATUS_BY_VALUE, \
+    from_value
+from gluster_georep_tools.status.parallel import NO_SESSIONS_MSG
+
+GLUSTER_CMD = "gluster"
+
+
+def parse_volume_info(source):
+    """
+    Bricks of each Volume from the `gluster volume info --xml`
+    output, as dict of Volume name => list of HOST:PATH. source
+    is a file name or a file object.
+    """
+    volumes = {}
+    tags = []
+    bricks = None
+    parent = None
+    try:
+        for event, elem in ET.iterparse(source, events=("start", "end")):
+            if event == "start":
+                tags.append(elem.tag)
+                if elem.tag == "volume":
+                    bricks = []
+                elif elem.tag == "bricks":
+                    parent = elem
+                continue
+
+            tags.pop()
+            if elem.tag == "name" and tags[-1:] == ["brick"]:
+                bricks.append(elem.text)
+            elif elem.tag == "name" and tags[-1:] == ["volume"]:
+                volumes[elem.text] = bricks
+            elif elem.tag == "brick":
+                parent.remove(elem)
+            elif elem.tag == "volume":
+                elem.clear()
+    except ET.ParseError as err:
+        raise StatusError("Failed to parse the Volume info", str(err))
+
+    return volumes
+
+
+def brick_from_pair(pair):
+    return BrickStatus(pair.findtext("primary_node"),
+                       pair.findtext("primary_brick"),
+                       pair.findtext("secondary_node"),
+                       from_value(STATUS_BY_VALUE, pair.findtext("status")),
+                       from_value(CRAWL_STATUS_BY_VALUE,
+                                  pair.findtext("crawl_status")),
+                       pair.findtext("last_synced"))
+
+
+def parse_status_xml(source, volinfo, now=None, row_filter=None):
+    """
+    Sessions from the `gluster volume geo-replication status --xml`
+    output. volinfo is the return value of parse_volume_info. Summary
+    is of all the bricks, only the bricks matching row_filter are
+    retained. Returns an empty list if there are no sessions, raises
+    StatusError if the output has any other error.
+    """
+    now = time.time() if now is None else now
+    sessions = []
+    tags = []
+    pvol = None
+    session_secondary = None
+    secondary = None
+    builder = None
+    offline = None
+    parent = None
+    try:
+        for event, elem in ET.iterparse(source, events=("start", "end")):
+            if event == "start":
+                tags.append(elem.tag)
+                if elem.tag == "session":
+                    builder = SessionBuilder(now, row_filter)
+                    session_secondary = None
+                    secondary = None
+                    # Bricks of the Volume not seen in the status
+                    offline = dict.fromkeys(volinfo.get(pvol, []))
+                    parent = elem
+                continue
+
+            tags.pop()
+            if elem.tag == "pair":
+                brick = brick_from_pair(elem)
+                offline.pop("{0}:{1}".format(brick.primary_node,
+                                             brick.primary_brick), None)
+                if secondary is None:
+                    secondary = elem.findtext("secondary")
+                builder.add(brick)
+
+                # Release the parsed pair, only the matching
+                # BrickStatus rows are retained by the builder
+                parent.remove(elem)
+            elif elem.tag == "session_secondary":
+                session_secondary = elem.text
+            elif elem.tag == "session":
+                # Same as glustercli, Secondary of the Offline
+                # bricks is from the session_secondary
+                offline_secondary = "{0}:{1}".format(
+                    pvol, session_secondary).split(":", 2)[-1]
+                for bname in offline:
+                    node, brick_path = bname.split(":", 1)
+                    builder.add(BrickStatus(node, brick_path, "N/A",
+                                            Status.OFFLINE, CrawlStatus.NA,
+                                            "N/A"))
+
+                if secondary is None:
+                    secondary = offline_secondary
+
+                sessions.append(builder.session("{0} ==> {1}".format(
+                    pvol, secondary.replace("ssh://", ""))))
+                builder = None
+                offline = None
+                elem.clear()
+            elif elem.tag == "name" and tags[-1:] == ["volume"]:
+                pvol = elem.text
+            elif elem.tag == "opErrstr" and elem.text:
+                if NO_SESSIONS_MSG.lower() in elem.text.lower():
+                    return []
+                raise StatusError("Failed to get Geo-replication status",
+                                  elem.text)
+    except ET.ParseError as err:
+        raise StatusError("Failed to parse the Geo-replication status",
+                          str(err))
+
+    return sessions
+
+
+def gluster_xml(args, parse):
+    """
+    Run the gluster command with --xml and parse its output as it
+    is read. Errors reported in the XML are raised by parse, if the
+    command fails without a valid XML output StatusError is raised
+    with its stderr.
+    """
+    cmd = [GLUSTER_CMD, "--mode=script"] + args + ["--xml"]
+
+    # stderr is not read while the output is parsed, a pipe would
+    # block the command once it is full
+    with tempfile.TemporaryFile() as errfile:
+        try:
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE,
+                                    stderr=errfile)
+        except OSError as err:
+            raise StatusError("Failed to run {0}".format(GLUSTER_CMD),
+                              str(err))
+
+        with proc:
+            try:
+                return parse(proc.stdout)
+            except StatusError as parse_err:
+                # Stop the command if the output is not consumed fully
+                proc.kill()
+                returncode = proc.wait()
+                errfile.seek(0)
+                err = errfile.read().decode("utf-8", "replace").strip()
+                if returncode != 0 and err:
+                    raise StatusError("Failed to run {0}".format(
+                        " ".join(cmd)), err)
+                raise parse_err
+
+
+def stream_status(volname=None, secondary_host=None, secondary_vol=None,
+                  secondary_user="root", row_filter=None, now=None):
+    """
+    Geo-replication status as the list of Sessions, parsed from the
+    gluster CLI output as it is read. Same arguments as
+    api.collect_status.
+    """
+    cmd = []
+    if volname is not None:
+        cmd += [volname]
+
+        if secondary_host is not None and secondary_vol is not None:
+            cmd += ["{0}@{1}::{2}".format(secondary_user, secondary_host,
+                                          secondary_vol)]
+
+    volinfo = gluster_xml(["volume", "info"] + cmd[:1], parse_volume_info)
+    return gluster_xml(
+        ["volume", "geo-replication"] + cmd + ["status"],
+        lambda out: parse_status_xml(out, volinfo, now, row_filter)
+    )
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Wall time of each phase of the tools. Enabled using --timings to
+print the summary or --trace to write the phases as a JSON trace
+file(Chrome trace event format, can be opened in chrome://tracing
+or https://ui.perfetto.dev).
+"""
+
+from contextlib import contextmanager
+import json
+import os
+import sys
+import threading
+import time
+
+
+class Timings:
+    """
+    Collects the start time and duration of the phases
+    """
+    def __init__(self):
+        self.enabled = False
+        self.start_time = time.time()
+        self.phases = []
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        if not self.enabled:
+            yield
+            return
+
+        start = time.time()
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.phases.append((name, start, time.time() - start,
+                                    threading.get_ident()))
+
+    def summary(self, out=None):
+        """
+        Print the duration of each phase and the total duration
+        """
+        out = sys.stderr if out is None else out
+        width = max([len(phase[0]) for phase in self.phases] + [5])
+        out.write("\n{0:<{1}}  {2:>10}\n".format("PHASE", width, "TIME(s)"))
+        for name, _, duration, _ in sorted(self.phases,
+                                           key=lambda phase: phase[1]):
+            out.write("{0:<{1}}  {2:>10.3f}\n".format(name, width, duration))
+
+        out.write("{0:<{1}}  {2:>10.3f}\n".format(
+            "total", width, time.time() - self.start_time))
+
+    def write_trace(self, path):
+        events = []
+        for name, start, duration, tid in self.phases:
+            events.append({
+                "name": name,
+                "ph": "X",
+                "ts": int((start - self.start_time) * 1000000),
+                "dur": int(duration * 1000000),
+                "pid": os.getpid(),
+                "tid": tid
+            })
+
+        with open(path, "w") as trace_file:
+            json.dump({"traceEvents": events,
+                       "displayTimeUnit": "ms"}, trace_file)
+
+    def report(self, args):
+        """
+        Print the summary and/or write the trace file as
+        requested in the CLI arguments
+        """
+        if args.timings:
+            self.summary()
+
+        if args.trace is not None:
+            self.write_trace(args.trace)
+
+
+TIMINGS = Timings()
+
+
+def phase(name):
+    """
+    Context manager to measure the wall time of a phase
+    """
+    return TIMINGS.phase(name)
+
+
+def enable_timings(args):
+    """
+    Enable the timings if --timings or --trace is used
+    """
+    TIMINGS.enabled = args.timings or args.trace is not None
+
+
+def add_timings_args(parser):
+    parser.add_argument("--timings", action="store_true",
+                        help="Print the time taken by each phase")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="Write the time taken by each phase as "
+                        "JSON trace to FILE")
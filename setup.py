@@ -12,13 +12,17 @@ setup(
     version=__version__,
     packages=["gluster_georep_tools",
               "gluster_georep_tools.status",
-              "gluster_georep_tools.setup"],
+              "gluster_georep_tools.setup",
+              "gluster_georep_tools.exporter",
+              "gluster_georep_tools.events"],
     include_package_data=True,
     install_requires=['paramiko', 'glustercli', 'prettytable'],
     entry_points={
         "console_scripts": [
             "gluster-georep-setup = gluster_georep_tools.setup.cli:main",
             "gluster-georep-status = gluster_georep_tools.status.cli:main",
+            "gluster-georep-exporter = gluster_georep_tools.exporter.cli:main",
+            "gluster-georep-events = gluster_georep_tools.events.cli:main",
         ]
     },
     platforms="linux",
@@ -0,0 +1,92 @@
+"""
+Tests of the setup steps and the batch setup of the sessions of a
+Secondary host with a mocked SSH client. Run with
+`python -m pytest tests`.
+"""
+
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from gluster_georep_tools.setup import session
+from gluster_georep_tools.setup.errors import SetupError
+from gluster_georep_tools.setup.remote import RemoteExecutor, RemoteResult
+
+SESSIONS = [
+    {"primary_vol": "gvol1", "session_user": "geoaccount",
+     "secondary_host": "snode1", "secondary_vol": "svol1"},
+    {"primary_vol": "gvol2", "session_user": "geoaccount",
+     "secondary_host": "snode1", "secondary_vol": "svol2"},
+]
+
+
+class FakeExecutor(RemoteExecutor):
+    """
+    Commands succeed, the pub file upload fails with put_error
+    """
+    def __init__(self, put_error):
+        super().__init__(mock.MagicMock())
+        self.ssh.open_sftp.return_value.put.side_effect = put_error
+
+    def run_many(self, cmds, timeout=None, error=None):
+        return [RemoteResult(cmd, 0, "glusterfs 10.1", "") for cmd in cmds]
+
+
+class SetupHostSessionsTest(unittest.TestCase):
+    def setup_sessions(self, executor):
+        with mock.patch.object(session, "check_host_reachable"), \
+                mock.patch.object(session, "ssh_initialize",
+                                  return_value=executor), \
+                mock.patch.object(session, "get_volume_stat",
+                                  return_value=(100, 0, [])), \
+                mock.patch.object(session, "scan_secondary_nodes",
+                                  return_value=[]):
+            return session.setup_host_sessions(
+                SESSIONS, "password", "10.1", "/var/lib/glusterd/geo-rep",
+                secondary_user="geoaccount", redistribute_keys=True)
+
+    def test_upload_failure_fails_the_sessions(self):
+        executor = FakeExecutor(FileNotFoundError(2, "No such file"))
+        results = self.setup_sessions(executor)
+
+        self.assertEqual([sess for sess, _ in results], SESSIONS)
+        for _, error in results:
+            self.assertIn("Failed to upload", error)
+        executor.ssh.close.assert_called()
+
+    def test_unexpected_error_fails_the_sessions(self):
+        executor = FakeExecutor(None)
+        with mock.patch.object(session, "copy_to_main_secondary_node",
+                               side_effect=ValueError("unexpected")):
+            results = self.setup_sessions(executor)
+
+        self.assertEqual(len(results), 2)
+        for _, error in results:
+            self.assertIn("unexpected", error)
+        executor.ssh.close.assert_called()
+
+
+class ResumeTest(unittest.TestCase):
+    def setUp(self):
+        self.georep_dir = tempfile.mkdtemp(prefix="georep_setup_test_")
+
+    def tearDown(self):
+        shutil.rmtree(self.georep_dir)
+
+    def test_from_step_without_pub_file(self):
+        setup = session.SessionSetup("gvol1", "geoaccount@snode1::svol1",
+                                     "password", georep_dir=self.georep_dir)
+        with mock.patch.object(session, "ssh_initialize",
+                               return_value=FakeExecutor(None)), \
+                mock.patch.object(session, "scan_secondary_nodes",
+                                  return_value=[]):
+            with self.assertRaises(SetupError) as ctx:
+                setup.run(from_step="copy")
+
+        self.assertIn("common_secret.pem.pub", ctx.exception.msg)
+        self.assertIn("gsec_create", ctx.exception.err)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+"""
+Tests of the brick state transitions with the glustercli calls
+mocked. Run with `python -m pytest tests`.
+"""
+
+from argparse import Namespace
+import unittest
+from unittest import mock
+
+from glustercli.cli import georep
+from glustercli.cli.utils import GlusterCmdException
+
+from gluster_georep_tools.events import cli
+from gluster_georep_tools.events.transitions import StateIndex
+
+NO_SESSIONS_ERR = GlusterCmdException(
+    (2, "", "No active geo-replication sessions"))
+
+
+def glustercli_row(node, brick, status="Active"):
+    return {
+        "primary_volume": "gvol1",
+        "secondary": "ssh://snode1::gvol2",
+        "primary_node": node,
+        "primary_brick": brick,
+        "secondary_node": "snode1",
+        "status": status,
+        "crawl_status": "Changelog Crawl",
+        "last_synced": "N/A",
+    }
+
+
+SESSION = [glustercli_row("pnode1", "/bricks/b1"),
+           glustercli_row("pnode2", "/bricks/b2", "Passive")]
+
+
+class StopPolling(Exception):
+    pass
+
+
+class SessionsDeletedTest(unittest.TestCase):
+    def poll_events(self, status_results):
+        """
+        Run poll_loop once for each of the glustercli status results
+        (list of sessions or an exception), returns the emitted events
+        and the mocked stderr
+        """
+        args = Namespace(primary_vol=None, secondary=None, parallel=None,
+                         session_timeout=10, interval=0)
+        emitted = []
+        sleeps = [None] * (len(status_results) - 1) + [StopPolling()]
+        with mock.patch.object(georep, "status",
+                               side_effect=status_results), \
+                mock.patch.object(cli.time, "sleep", side_effect=sleeps), \
+                mock.patch.object(cli.sys, "stderr") as stderr:
+            with self.assertRaises(StopPolling):
+                cli.poll_loop(args, StateIndex(), emitted.extend)
+
+        return emitted, stderr
+
+    def test_all_sessions_deleted(self):
+        events, stderr = self.poll_events([[SESSION], NO_SESSIONS_ERR])
+
+        self.assertFalse(stderr.write.called)
+        self.assertEqual(
+            sorted((event["primary_node"], event["primary_brick"],
+                    event["old_status"], event["status"])
+                   for event in events),
+            [("pnode1", "/bricks/b1", "Active", None),
+             ("pnode2", "/bricks/b2", "Passive", None)])
+
+    def test_no_sessions_at_start(self):
+        events, stderr = self.poll_events(
+            [NO_SESSIONS_ERR, NO_SESSIONS_ERR, [SESSION]])
+
+        self.assertFalse(stderr.write.called)
+        self.assertEqual(len(events), 2)
+        self.assertEqual(set(event["old_status"] for event in events),
+                         set([None]))
+
+    def test_removal_is_debounced(self):
+        index = StateIndex(debounce=30)
+        session = cli.apply_filters([SESSION], Namespace())
+        self.assertEqual(index.update(session, 0), [])
+        self.assertEqual(index.update([], 10, complete=True), [])
+        self.assertEqual(len(index.update([], 40, complete=True)), 2)
+        self.assertEqual(len(index), 0)
+
+    def test_missing_session_is_retained_if_incomplete(self):
+        index = StateIndex()
+        index.update(cli.apply_filters([SESSION], Namespace()), 0)
+        self.assertEqual(index.update([], 10), [])
+        self.assertEqual(len(index), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
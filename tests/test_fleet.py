@@ -0,0 +1,35 @@
+"""
+Tests of the SSH pool of the multi-cluster status with a mocked
+paramiko client. Run with `python -m pytest tests`.
+"""
+
+import unittest
+from unittest import mock
+
+import paramiko
+
+from gluster_georep_tools.status import fleet
+
+
+class SSHPoolHostKeysTest(unittest.TestCase):
+    def connect(self, **kwargs):
+        pool = fleet.SSHPool([fleet.Cluster("server1")], **kwargs)
+        with mock.patch.object(fleet.paramiko, "SSHClient") as client:
+            pool.client(pool.clusters[0])
+
+        pool.close()
+        ssh = client.return_value
+        ssh.load_system_host_keys.assert_called_with()
+        ssh.connect.assert_called_once()
+        return ssh.set_missing_host_key_policy.call_args[0][0]
+
+    def test_unknown_hosts_are_rejected(self):
+        self.assertIsInstance(self.connect(), paramiko.RejectPolicy)
+
+    def test_accept_new_host_keys(self):
+        self.assertIsInstance(self.connect(accept_new_host_keys=True),
+                              paramiko.AutoAddPolicy)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+Tests of the remote command errors with a mocked SSH client.
+Run with `python -m pytest tests`.
+"""
+
+import socket
+import unittest
+from unittest import mock
+
+import paramiko
+
+from gluster_georep_tools.setup import session
+from gluster_georep_tools.setup.errors import SetupError, \
+    KeyDistributionError
+from gluster_georep_tools.setup.remote import RemoteExecutor
+
+
+def fake_ssh(active=True):
+    ssh = mock.MagicMock()
+    ssh.get_transport.return_value.is_active.return_value = active
+    return ssh
+
+
+class RemoteErrorsTest(unittest.TestCase):
+    def test_put_failure(self):
+        ssh = fake_ssh()
+        ssh.open_sftp.return_value.put.side_effect = FileNotFoundError(
+            2, "No such file")
+        executor = RemoteExecutor(ssh)
+
+        with self.assertRaises(SetupError) as ctx:
+            executor.put("/tmp/a.pub", "/home/geoaccount/a.pub")
+
+        self.assertIn("/home/geoaccount/a.pub", ctx.exception.err)
+
+    def test_channel_timeout(self):
+        ssh = fake_ssh()
+        channel = ssh.get_transport.return_value.open_session.return_value
+        channel.makefile.return_value.__enter__.return_value.read \
+            .side_effect = socket.timeout("timed out")
+        executor = RemoteExecutor(ssh)
+
+        with self.assertRaises(SetupError) as ctx:
+            executor.run_many(["true", "gluster --version"])
+
+        self.assertIn("true", ctx.exception.err)
+        self.assertEqual(channel.close.call_count, 2)
+
+    def test_closed_transport(self):
+        executor = RemoteExecutor(fake_ssh(active=False))
+        with self.assertRaises(SetupError) as ctx:
+            executor.run("gluster --version")
+
+        self.assertIn("gluster --version", ctx.exception.err)
+
+    def test_open_session_failure(self):
+        ssh = fake_ssh()
+        ssh.get_transport.return_value.open_session.side_effect = \
+            paramiko.SSHException("Administratively prohibited")
+
+        with self.assertRaises(SetupError):
+            RemoteExecutor(ssh).run("gluster --version")
+
+    def test_copy_keys_raises_key_distribution_error(self):
+        ssh = fake_ssh()
+        ssh.open_sftp.return_value.put.side_effect = IOError(
+            2, "No such file")
+
+        with self.assertRaises(KeyDistributionError):
+            session.copy_to_main_secondary_node(
+                RemoteExecutor(ssh), "geoaccount", "snode1",
+                "/var/lib/glusterd/geo-replication",
+                ["common_secret.pem.pub"])
+
+
+if __name__ == "__main__":
+    unittest.main()
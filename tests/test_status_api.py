@@ -0,0 +1,44 @@
+"""
+Tests of the status library with the glustercli calls mocked.
+Run with `python -m pytest tests`.
+"""
+
+import unittest
+from unittest import mock
+
+from glustercli.cli import georep
+from glustercli.cli.utils import GlusterCmdException
+
+from gluster_georep_tools.status import api
+
+NO_SESSIONS_ERR = GlusterCmdException(
+    (2, "", "No active geo-replication sessions"))
+
+
+class NoSessionsTest(unittest.TestCase):
+    def test_collect_status_is_empty(self):
+        with mock.patch.object(georep, "status",
+                               side_effect=NO_SESSIONS_ERR):
+            self.assertEqual(api.collect_status(), [])
+
+    def test_status_raises_no_sessions_error(self):
+        with mock.patch.object(georep, "status",
+                               side_effect=NO_SESSIONS_ERR):
+            with self.assertRaises(api.NoSessionsError):
+                api.status()
+
+            with self.assertRaises(api.NoSessionsError):
+                api.status("gvol1")
+
+    def test_other_errors_are_not_no_sessions(self):
+        err = GlusterCmdException((1, "", "Volume gvol1 does not exist"))
+        with mock.patch.object(georep, "status", side_effect=err):
+            with self.assertRaises(api.StatusError) as ctx:
+                api.status("gvol1")
+
+        self.assertNotIsInstance(ctx.exception, api.NoSessionsError)
+        self.assertIn("does not exist", ctx.exception.err)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+"""
+Tests of the in-process Secondary emptiness check against local
+directories. Run with `python -m pytest tests`.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from gluster_georep_tools.setup import session, volstat
+from gluster_georep_tools.setup.errors import SetupError, \
+    EmptyCheckTimeoutError
+from gluster_georep_tools.setup.runner import CommandResult
+
+NUM_ENTRIES = 20000
+
+
+class ProbeEntriesTest(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp(prefix="georep_volstat_test_")
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_empty_directory(self):
+        self.assertEqual(volstat.probe_entries(self.path), [])
+
+    def test_only_trashcan(self):
+        os.mkdir(os.path.join(self.path, ".trashcan"))
+        self.assertEqual(volstat.probe_entries(self.path), [])
+
+    def test_trashcan_is_not_in_sample(self):
+        os.mkdir(os.path.join(self.path, ".trashcan"))
+        open(os.path.join(self.path, "file1"), "w").close()
+        self.assertEqual(volstat.probe_entries(self.path), ["file1"])
+
+    def test_many_entries(self):
+        for idx in range(NUM_ENTRIES):
+            open(os.path.join(self.path, "file{0}".format(idx)), "w").close()
+
+        # Count the entries read to check that the directory is
+        # not listed fully once the sample is collected
+        read = []
+        scandir = os.scandir
+
+        class CountingScandir:
+            def __init__(self, path):
+                self.entries = scandir(path)
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *args):
+                self.entries.close()
+
+            def __iter__(self):
+                for entry in self.entries:
+                    read.append(entry.name)
+                    yield entry
+
+        with mock.patch.object(volstat.os, "scandir", CountingScandir):
+            entries = volstat.probe_entries(self.path, sample_size=3)
+
+        self.assertEqual(len(entries), 3)
+        self.assertEqual(len(read), 3)
+        for name in entries:
+            self.assertTrue(os.path.exists(os.path.join(self.path, name)))
+
+    def test_stalled_directory_times_out(self):
+        # readdir of a cold FUSE mount which never returns
+        release = threading.Event()
+        scandir = os.scandir
+
+        def stalled_scandir(path):
+            release.wait()
+            return scandir(path)
+
+        start = time.monotonic()
+        try:
+            with mock.patch.object(volstat.os, "scandir", stalled_scandir):
+                with self.assertRaises(EmptyCheckTimeoutError):
+                    volstat.probe_entries(self.path, timeout=0.2)
+        finally:
+            release.set()
+
+        self.assertLess(time.monotonic() - start, 5)
+
+    def test_missing_directory(self):
+        with self.assertRaises(SetupError) as ctx:
+            volstat.probe_entries(os.path.join(self.path, "missing"))
+
+        self.assertNotIsInstance(ctx.exception, EmptyCheckTimeoutError)
+
+
+class FakeRunner:
+    """
+    Records the commands, plain umount fails since the mount
+    is busy with the stalled reader
+    """
+    timeout = 5
+
+    def __init__(self):
+        self.cmds = []
+
+    def run(self, cmd, timeout=None):
+        self.cmds.append(cmd)
+        if cmd[0] == "umount" and "-l" not in cmd:
+            return CommandResult(cmd, 32, "", "target is busy")
+
+        if cmd[0] == "rmdir":
+            os.rmdir(cmd[1])
+
+        return CommandResult(cmd, 0, "", "")
+
+
+class EmptyCheckMountTest(unittest.TestCase):
+    def setUp(self):
+        self.runner = FakeRunner()
+        self.saved_runner = session.COMMAND_RUNNER
+        session.set_command_runner(self.runner)
+
+    def tearDown(self):
+        session.set_command_runner(self.saved_runner)
+
+    def test_timeout_unmounts_lazily(self):
+        release = threading.Event()
+        scandir = os.scandir
+
+        def stalled_scandir(path):
+            release.wait()
+            return scandir(path)
+
+        try:
+            with mock.patch.object(session.os.path, "ismount",
+                                   return_value=True), \
+                    mock.patch.object(volstat.os, "scandir",
+                                      stalled_scandir):
+                with self.assertRaises(EmptyCheckTimeoutError):
+                    session.get_volume_size("secondary1", "svol", True,
+                                            empty_check_timeout=0.2)
+        finally:
+            release.set()
+
+        umounts = [cmd for cmd in self.runner.cmds if cmd[0] == "umount"]
+        self.assertEqual(len(umounts), 1)
+        self.assertIn("-l", umounts[0])
+        mnt = self.runner.cmds[-1][1]
+        self.assertEqual(self.runner.cmds[-1], ["rmdir", mnt])
+        self.assertFalse(os.path.exists(mnt))
+
+
+if __name__ == "__main__":
+    unittest.main()
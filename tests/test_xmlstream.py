@@ -0,0 +1,143 @@
+"""
+Tests of the streaming XML status backend against the recorded
+gluster CLI output in benchmarks/fixtures. Run with
+`python -m pytest tests`.
+"""
+
+from argparse import Namespace
+import importlib.util
+import io
+import os
+import time
+import unittest
+import xml.etree.ElementTree as ET
+
+from gluster_georep_tools.status.api import apply_filters, StatusError
+from gluster_georep_tools.status.filters import compile_filters
+from gluster_georep_tools.status.model import Status
+from gluster_georep_tools.status.xmlstream import parse_status_xml, \
+    parse_volume_info
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "benchmarks", "fixtures")
+STATUS_XML = os.path.join(FIXTURES_DIR, "georep-status.xml")
+VOLINFO_XML = os.path.join(FIXTURES_DIR, "volume-info.xml")
+NO_SESSIONS_XML = os.path.join(FIXTURES_DIR, "georep-status-no-sessions.xml")
+
+ERROR_XML = b"""<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<cliOutput>
+  <opRet>-1</opRet>
+  <opErrno>30800</opErrno>
+  <opErrstr>Volume gvol3 does not exist</opErrstr>
+</cliOutput>
+"""
+
+HAS_GLUSTERCLI = importlib.util.find_spec("glustercli") is not None
+
+
+def filter_args(**kwargs):
+    args = Namespace(with_status=None, with_crawl_status=None)
+    args.__dict__.update(kwargs)
+    return args
+
+
+def stream_sessions(args, now):
+    return parse_status_xml(STATUS_XML, parse_volume_info(VOLINFO_XML), now,
+                            compile_filters(args, now))
+
+
+def glustercli_sessions(args):
+    """
+    Same as collect_status followed by apply_filters, with the
+    Volume info reduced to the fields used by parse_georep_status
+    """
+    from glustercli.cli.parsers import parse_georep_status
+
+    tree = ET.parse(VOLINFO_XML)
+    volinfo = [{"name": vol.findtext("name"),
+                "bricks": [{"name": brick.findtext("name"),
+                            "uuid": brick.findtext("hostUuid")}
+                           for brick in vol.findall("bricks/brick")]}
+               for vol in tree.findall("volInfo/volumes/volume")]
+    with open(STATUS_XML) as status_file:
+        return apply_filters(parse_georep_status(status_file.read(),
+                                                 volinfo), args)
+
+
+def sessions_key(sessions):
+    """
+    Comparable form of the sessions, glustercli doesn't keep the order
+    of the sessions and sorts the rows in the Volume info order.
+    Lag is ignored since the backends are not run at the same time.
+    """
+    result = {}
+    for session in sessions:
+        summary = session.summary.as_dict()
+        summary.pop("lag")
+        result[session.name] = (
+            summary,
+            sorted(sorted(row.as_record().items()) for row in session.rows))
+
+    return result
+
+
+class ParseStatusXmlTest(unittest.TestCase):
+    def test_no_sessions(self):
+        volinfo = parse_volume_info(VOLINFO_XML)
+        self.assertEqual(parse_status_xml(NO_SESSIONS_XML, volinfo), [])
+
+    def test_error(self):
+        with self.assertRaises(StatusError) as ctx:
+            parse_status_xml(io.BytesIO(ERROR_XML), {})
+
+        self.assertEqual(ctx.exception.err, "Volume gvol3 does not exist")
+
+    def test_invalid_xml(self):
+        with self.assertRaises(StatusError):
+            parse_status_xml(io.BytesIO(b"<cliOutput><geoRep>"), {})
+
+    def test_missing_bricks_are_offline(self):
+        sessions = stream_sessions(filter_args(), time.time())
+        gvol1 = sessions[0]
+
+        self.assertEqual(gvol1.name, "gvol1 ==> secondary1::svol1")
+        offline = [row for row in gvol1.rows if row.status == Status.OFFLINE]
+        self.assertEqual([(row.primary_node, row.primary_brick,
+                           row.secondary_node) for row in offline],
+                         [("primary2", "/bricks/gvol1/b4", "N/A")])
+        self.assertEqual(gvol1.summary.offline, 1)
+
+    def test_summary_of_filtered_rows(self):
+        sessions = stream_sessions(filter_args(with_status="faulty"),
+                                   time.time())
+
+        self.assertEqual(len(sessions), 2)
+        gvol1, gvol2 = sessions
+        self.assertEqual(gvol1.summary.total, 4)
+        self.assertEqual(gvol1.summary.faulty, 1)
+        self.assertEqual(gvol1.summary.active, 1)
+        self.assertEqual([row.primary_brick for row in gvol1.rows],
+                         ["/bricks/gvol1/b3"])
+        # Session is retained even if none of its rows match
+        self.assertEqual(gvol2.summary.total, 2)
+        self.assertEqual(gvol2.rows, [])
+
+    @unittest.skipUnless(HAS_GLUSTERCLI, "glustercli is not installed")
+    def test_same_as_glustercli(self):
+        for args in (filter_args(), filter_args(with_status="active,offline"),
+                     filter_args(brick="/bricks/gvol1/*")):
+            with self.subTest(args=vars(args)):
+                self.assertEqual(
+                    sessions_key(stream_sessions(args, time.time())),
+                    sessions_key(glustercli_sessions(args)))
+
+
+class ParseVolumeInfoTest(unittest.TestCase):
+    def test_bricks(self):
+        self.assertEqual(parse_volume_info(VOLINFO_XML)["gvol2"],
+                         ["primary1:/bricks/gvol2/b1",
+                          "primary2:/bricks/gvol2/b2"])
+
+
+if __name__ == "__main__":
+    unittest.main()